@@ -0,0 +1,104 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+from datetime import datetime, timedelta
+from disease import kernels
+from ensemble import apply_overrides, split_config
+from libraries.args_handler import get_config
+from simulation import Simulation
+
+# Logs that have to be identical between the engines, as paths into the configuration
+COMPARED_LOGS = [
+    ("simulation", "disease", "logger", "tans_log_file_name"),
+    ("simulation", "disease", "logger", "disease_log_file_name"),
+    ("simulation", "disease", "logger", "sim_log_file_name"),
+]
+
+
+def main():
+    """
+    Entry point to verify that the numba engine yields the same outputs as the python engine, for both modes of
+    community sampling. Without Numba, the kernels of the numba engine run interpreted. The exit code is non-zero
+    when the logs of the engines differ.
+    """
+    args = process_args_as_dict()
+    config = get_config(args.get("conf"))
+    mismatches = []
+    for community_sampling in ["individual", "stratified"]:
+        digests = dict()
+        for engine in ["python", "numba"]:
+            start = time.perf_counter()
+            digests[engine] = run_engine(config, engine, community_sampling, args.get("days"), args.get("output"))
+            print(f"[EQUIVALENCE] {engine:<8} {community_sampling:<12} {time.perf_counter() - start:>8.1f}s")
+
+        for path in COMPARED_LOGS:
+            if digests["python"][path] != digests["numba"][path]:
+                mismatches.append(f"{path[-1]} differs for community sampling '{community_sampling}'")
+
+    for line in mismatches:
+        print(f"[MISMATCH] {line}")
+
+    if mismatches:
+        sys.exit(1)
+
+    print(f"[EQUIVALENCE] Engines yield identical logs (kernels {'compiled' if kernels.NUMBA_AVAILABLE else 'interpreted'}).")
+
+
+def run_engine(config, engine, community_sampling, num_days, output_directory) -> dict:
+    """
+    Function to simulate a number of days by means of an engine, without reporting or checkpointing.
+
+    :param config: (dict) configuration of the simulation
+    :param engine: (str) disease engine
+    :param community_sampling: (str) sampling of individuals in households without infectious members
+    :param num_days: (number) number of days to simulate
+    :param output_directory: (str) directory to write the logs to
+    :return: (dict) md5 digest of each compared log
+    """
+    _, global_config = split_config(config)
+    start_date = datetime.strptime(config["simulation"]["start_date"], global_config["date_format"])
+    end_date = start_date + timedelta(days=num_days - 1)
+    directory = os.path.join(output_directory, f"{engine}-{community_sampling}")
+    os.makedirs(directory, exist_ok=True)
+
+    overrides = {
+        ("simulation", "end_date"): end_date.strftime(global_config["date_format"]),
+        ("simulation", "checkpoint_file"): None,
+        ("simulation", "reporter", "sink"): "console",
+        ("simulation", "reporter", "log_level"): ["error"],
+        ("simulation", "disease", "engine"): engine,
+        ("simulation", "disease", "numba_fallback"): "interpreted",
+        ("simulation", "disease", "community_sampling"): community_sampling,
+        ("simulation", "disease", "logger", "enabled"): True,
+        ("simulation", "disease", "logger", "database"): None,
+    }
+    for path in COMPARED_LOGS:
+        overrides[path] = os.path.join(directory, f"{path[-1]}.csv")
+
+    simulation_config, global_config = split_config(apply_overrides(config, overrides))
+    Simulation(simulation_config, global_config).run()
+    return {path: file_md5(overrides[path]) for path in COMPARED_LOGS}
+
+
+def file_md5(location) -> str:
+    digest = hashlib.md5()
+    with open(location, "rb") as log_file:
+        for chunk in iter(lambda: log_file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def process_args_as_dict():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conf", type=str, help="configuration of the simulation", default="config/settings.toml")
+    parser.add_argument("--days", type=int, help="number of simulated days", default=90)
+    parser.add_argument("--output", type=str, help="directory of the logs", default="./output/equivalence")
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import csv
+import os
+
+from collections import defaultdict
+
+# Offset between the identifiers of two copies of the sample, exceeds the identifiers of the sample
+ID_OFFSET = 100000000
+
+# Columns that hold identifiers of individuals and households, which are offset per copy
+POPULATION_ID_COLUMNS = ["ID", "HH_ID"]
+EVENT_LOG_ID_COLUMNS = ["ID", "HH_ID", "HH_ID_target"]
+
+
+def scale_inputs(size, population_csv, event_log_csv, directory) -> (str, str):
+    """
+    Function to scale the sample population and event log to the given number of individuals, by replicating
+    the households of the sample (with offset identifiers). Events of replicated individuals are replicated
+    along. Scaled inputs are written once and reused afterwards.
+
+    :param size: (number) number of individuals of the scaled population
+    :param population_csv: (str) location of the sample population
+    :param event_log_csv: (str) location of the sample event log
+    :param directory: (str) directory to write the scaled inputs to
+    :return: (tuple) locations of the scaled population and event log
+    """
+    scaled_population_csv = os.path.join(directory, f"pop_{size}.csv")
+    scaled_event_log_csv = os.path.join(directory, f"event_log_{size}.csv")
+    if os.path.isfile(scaled_population_csv) and os.path.isfile(scaled_event_log_csv):
+        return scaled_population_csv, scaled_event_log_csv
+
+    os.makedirs(directory, exist_ok=True)
+    header, households = _read_households(population_csv)
+
+    # Individuals and households per copy, the last copy is partial
+    included = []
+    with open(scaled_population_csv, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(header)
+
+        num_written, copy = 0, 0
+        while num_written < size:
+            individuals, hh_ids = set(), set()
+            for hh_id, rows in households.items():
+                if num_written >= size:
+                    break
+
+                for row in rows:
+                    writer.writerow(_offset(row, header, POPULATION_ID_COLUMNS, copy))
+                    individuals.add(row[header.index("ID")])
+
+                hh_ids.add(hh_id)
+                num_written += len(rows)
+
+            included.append((individuals, hh_ids))
+            copy += 1
+
+    _write_event_log(event_log_csv, scaled_event_log_csv, included)
+    return scaled_population_csv, scaled_event_log_csv
+
+
+def _read_households(population_csv):
+    households = defaultdict(list)
+    with open(population_csv, newline="") as in_file:
+        reader = csv.reader(in_file)
+        header = next(reader)
+        for row in reader:
+            if row:
+                households[row[header.index("HH_ID")]].append(row)
+
+    return header, households
+
+
+def _write_event_log(event_log_csv, scaled_event_log_csv, included):
+    with open(event_log_csv, newline="") as in_file:
+        reader = csv.reader(in_file)
+        header = next(reader)
+        rows = [row for row in reader if row]
+
+    with open(scaled_event_log_csv, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(header)
+
+        # Events are written per date, such that the scaled event log remains ordered by date
+        for row in sorted(rows, key=lambda row: row[header.index("event_date")]):
+            for copy, (individuals, hh_ids) in enumerate(included):
+                # Individuals that enter the population belong to a household of the copy
+                entering = row[header.index("event_type")] in ("birth", "immigration")
+                if entering and row[header.index("HH_ID")] in hh_ids:
+                    individuals.add(row[header.index("ID")])
+
+                if row[header.index("ID")] in individuals:
+                    writer.writerow(_offset(row, header, EVENT_LOG_ID_COLUMNS, copy))
+
+
+def _offset(row, header, id_columns, copy):
+    if copy == 0:
+        return row
+
+    row = list(row)
+    for column in id_columns:
+        index = header.index(column)
+        if row[index] not in ("NA", ""):
+            row[index] = str(int(row[index]) + copy * ID_OFFSET)
+
+    return row
@@ -0,0 +1,85 @@
+import copy
+import os
+import time
+
+from datetime import datetime, timedelta
+from benchmarks.inputs import scale_inputs
+from events.synthetic import SyntheticInputGenerator
+from simulation import Simulation
+
+# Directory to which the scaled inputs are written, they are reused by subsequent runs
+INPUT_DIRECTORY = "./output/benchmarks/inputs"
+
+# Number of individuals infected at the start of the simulation, per thousand individuals
+INFLUX_PER_THOUSAND = 1
+
+
+def run_macro_benchmark(config, size, num_days, synthetic=False) -> dict:
+    """
+    Function to simulate a population of the given size for a number of days. The headline metric is the number
+    of simulated individual-days per second, i.e., the size of the population times the number of simulated days
+    divided by the duration of the simulation loop. Loading the inputs is timed separately.
+
+    :param config: (dict) configuration of the benchmarks
+    :param size: (number) number of individuals in the population
+    :param num_days: (number) number of days to simulate
+    :param synthetic: (bool) whether to generate the inputs (see events/synthetic.py) rather than scale the sample
+    :return: (dict) result of the benchmark
+    """
+    config = copy.deepcopy(config)
+    simulation_config, global_config = config["simulation"], config["global"]
+    log_player_config = simulation_config["log_player"]
+
+    # Simulation runs from the start date up to and including the end date
+    start_date = datetime.strptime(simulation_config["start_date"], global_config["date_format"])
+    if synthetic:
+        population_csv, event_log_csv = generate_inputs(size, start_date, num_days, global_config["seed"])
+    else:
+        population_csv, event_log_csv = scale_inputs(size, log_player_config["initial_population"],
+                                                     log_player_config["event_log"], INPUT_DIRECTORY)
+
+    log_player_config["initial_population"] = population_csv
+    log_player_config["event_log"] = event_log_csv
+    end_date = start_date + timedelta(days=num_days - 1)
+    simulation_config["end_date"] = end_date.strftime(global_config["date_format"])
+    simulation_config["initial_influx"] = max(1, size * INFLUX_PER_THOUSAND // 1000)
+    simulation_config["terminate_on_zero_infected"] = False
+
+    start = time.perf_counter()
+    simulation = Simulation(simulation_config, global_config)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulation.run()
+    run_seconds = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "days": num_days,
+        "load_seconds": load_seconds,
+        "run_seconds": run_seconds,
+        "individual_days_per_second": size * num_days / run_seconds,
+    }
+
+
+def generate_inputs(size, start_date, num_days, seed) -> (str, str):
+    """
+    Function to generate a synthetic population and event log, generated inputs are reused afterwards.
+
+    :param size: (number) number of individuals of the population
+    :param start_date: (datetime) first day of the event log
+    :param num_days: (number) number of days of the event log
+    :param seed: (number) seed value of the generator
+    :return: (tuple) locations of the population and event log
+    """
+    population_csv = os.path.join(INPUT_DIRECTORY, f"pop_synthetic_{size}_{seed}.csv")
+    event_log_csv = os.path.join(INPUT_DIRECTORY, f"event_log_synthetic_{size}_{seed}_{num_days}.csv")
+    if os.path.isfile(population_csv) and os.path.isfile(event_log_csv):
+        return population_csv, event_log_csv
+
+    # The event log follows from the state of the generated population, hence both are generated
+    os.makedirs(INPUT_DIRECTORY, exist_ok=True)
+    generator = SyntheticInputGenerator(size, start_date, seed)
+    generator.write_population(population_csv)
+    generator.write_event_log(event_log_csv, num_days)
+    return population_csv, event_log_csv
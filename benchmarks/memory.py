@@ -0,0 +1,87 @@
+import copy
+import gc
+import sys
+import types
+
+from datetime import datetime, timedelta
+from enum import Enum
+from benchmarks.inputs import scale_inputs
+from benchmarks.macro import INPUT_DIRECTORY
+from simulation import Simulation
+
+# Objects that are shared by the whole application rather than owned by the population
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, Enum)
+
+# Components of the population, in the order in which they are measured
+COMPONENTS = ["individuals", "households", "store", "indexes"]
+
+
+def run_memory_benchmark(config, size, num_days) -> dict:
+    """
+    Function to measure the memory footprint of a population of the given size, after it has been simulated for
+    a number of days (such that disease attributes and household metrics are populated).
+
+    :param config: (dict) configuration of the benchmarks
+    :param size: (number) number of individuals in the population
+    :param num_days: (number) number of days to simulate
+    :return: (dict) bytes per individual, in total and per component of the population
+    """
+    config = copy.deepcopy(config)
+    simulation_config, global_config = config["simulation"], config["global"]
+    log_player_config = simulation_config["log_player"]
+    log_player_config["initial_population"], log_player_config["event_log"] = scale_inputs(
+        size, log_player_config["initial_population"], log_player_config["event_log"], INPUT_DIRECTORY)
+
+    start_date = datetime.strptime(simulation_config["start_date"], global_config["date_format"])
+    simulation_config["end_date"] = (start_date + timedelta(days=num_days - 1)).strftime(global_config["date_format"])
+    simulation_config["initial_influx"] = max(1, size // 1000)
+    simulation = Simulation(simulation_config, global_config)
+    simulation.run()
+
+    result = measure_population(simulation.population, exclude=[simulation.random])
+    result["size"] = size
+    return result
+
+
+def measure_population(population, exclude=()) -> dict:
+    """
+    Function to measure the memory that is held by a population, by traversing the objects it references.
+    Components are measured in order, objects that are shared between components count towards the first.
+
+    :param population: (Population) population to measure
+    :param exclude: (list) objects that are referenced by the population, but not owned by it
+    :return: (dict) bytes per individual, in total and per component
+    """
+    gc.collect()
+    individuals = list(population.individual_gen())
+    households = list(population.household_gen())
+    store = population.get_store()
+    seen = {id(obj) for obj in exclude}
+
+    # Individuals exclude the store and households they refer to, those are measured separately
+    components = dict()
+    for name, roots, barriers in zip(COMPONENTS, [individuals, households, [store], [population]],
+                                     [[store, population] + households, [store, population], [population], []]):
+        visited = seen | {id(obj) for obj in barriers}
+        components[name] = _deep_size(roots, visited)
+        seen |= visited - {id(obj) for obj in barriers}
+
+    num_individuals = max(1, len(individuals))
+    result = {f"{name}_bytes_per_individual": size / num_individuals for name, size in components.items()}
+    result["bytes_per_individual"] = sum(components.values()) / num_individuals
+    return result
+
+
+def _deep_size(roots, seen) -> int:
+    # The visited objects are recorded in 'seen', such that subsequent components do not count them twice
+    total, stack = 0, list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+
+    return total
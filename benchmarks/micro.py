@@ -0,0 +1,159 @@
+import copy
+import time
+
+from datetime import datetime, timedelta
+from disease.disease_state import DiseaseStateEnum
+from disease.rolling_deque import RollingDeque
+from disease.state_machine import DiseaseFSM
+from disease.transmission import Transmission
+from events.event import AddToPopEventHandler, AGTransitionEventHandler, HHTransitionEventHandler, RemoveFromPopEventHandler
+from population.summary import PopulationSummary
+from simulation import Simulation
+
+# Number of days the simulation is run to obtain a population with infectious households
+WARMUP_DAYS = 20
+
+# Number of inputs per call of a benchmark, e.g., individuals evaluated by the transmission model
+BATCH_SIZE = 1000
+
+
+def measure(function, num_ops, min_time=0.2, repeat=5) -> dict:
+    """
+    Function to measure the throughput of a function. The function is called until at least 'min_time' seconds
+    have passed, the best of 'repeat' measurements is retained.
+
+    :param function: (function) function to measure, without arguments
+    :param num_ops: (number) number of operations performed by a single call of the function
+    :param min_time: (number) minimal duration of a measurement, in seconds
+    :param repeat: (number) number of measurements
+    :return: (dict) operations per second and seconds per operation
+    """
+    best = None
+    for _ in range(repeat):
+        num_calls, start = 0, time.perf_counter()
+        while True:
+            function()
+            num_calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+
+        seconds_per_op = elapsed / (num_calls * num_ops)
+        best = seconds_per_op if best is None else min(best, seconds_per_op)
+
+    return {"ops_per_second": 1 / best, "seconds_per_op": best}
+
+
+def run_micro_benchmarks(config) -> dict:
+    """
+    Function to run the micro-benchmarks on the sample population of the configuration, after it has been simulated
+    for a number of days.
+
+    :param config: (dict) configuration of the benchmarks
+    :return: (dict) name of the benchmark to its result
+    """
+    config = copy.deepcopy(config)
+    simulation_config, global_config = config["simulation"], config["global"]
+    start_date = datetime.strptime(simulation_config["start_date"], global_config["date_format"])
+    simulation_config["end_date"] = (start_date + timedelta(days=WARMUP_DAYS)).strftime(global_config["date_format"])
+
+    simulation = Simulation(simulation_config, global_config)
+    simulation.run()
+
+    population = simulation.population
+    current_date = simulation.simulation_end
+    results = dict()
+
+    # Population summary
+    results["population_summary"] = measure(
+        lambda: PopulationSummary(population, population.get_base_distribution()), 1)
+    summary = PopulationSummary(population, population.get_base_distribution())
+
+    # Transmission model, for susceptible individuals with and without infectious household members
+    transmission = Transmission(simulation_config["disease"]["transmission"], global_config, simulation.random)
+    transmission.set_population_summary(summary)
+    active_households = dict.fromkeys(population.active_household_gen())
+    for household in active_households:
+        household.compute_metrics()
+
+    susceptible = [individual for individual in population.individual_for_disease_state_gen(DiseaseStateEnum.STATE_SUSCEPTIBLE)
+                   if individual.get_household() is not None]
+    in_active = [(individual, individual.get_household()) for individual in susceptible
+                 if individual.get_household() in active_households][:BATCH_SIZE]
+    in_inactive = [(individual, None) for individual in susceptible
+                   if individual.get_household() not in active_households][:BATCH_SIZE]
+
+    for name, pairs in [("transmission_occurs_household", in_active), ("transmission_occurs_population", in_inactive)]:
+        if pairs:
+            results[name] = measure(lambda pairs=pairs: [transmission.occurs(individual, household, summary, current_date)
+                                                         for individual, household in pairs], len(pairs))
+
+    # Nodes of the disease state machine
+    fsm = DiseaseFSM(simulation_config["disease"], simulation.random)
+    individuals = susceptible[:BATCH_SIZE]
+    for disease_state in DiseaseStateEnum:
+        if disease_state == DiseaseStateEnum.STATE_SUSCEPTIBLE:
+            continue
+
+        node = fsm.get_node_for_type(disease_state)
+        if not node.is_end_state():
+            results[f"fsm_{disease_state.name.lower()}"] = measure(
+                lambda node=node: [node.get_next_state(individual, current_date) for individual in individuals], len(individuals))
+
+    # Disease queue, elements are spread over a month
+    def fill_and_drain():
+        deque = RollingDeque()
+        for position in range(BATCH_SIZE):
+            deque.put_element(current_date + timedelta(days=position % 30), position)
+
+        for offset in range(30):
+            for _ in deque.get_elements_for_date(current_date + timedelta(days=offset)):
+                pass
+
+    results["rolling_deque"] = measure(fill_and_drain, BATCH_SIZE)
+
+    # Event handlers, each benchmark applies a batch of events and reverts it
+    results.update(_measure_event_handlers(population, individuals, current_date))
+    return results
+
+
+def _measure_event_handlers(population, individuals, current_date) -> dict:
+    results = dict()
+    households = [individual.get_household().get_id() for individual in individuals]
+    first_id = max(individual.get_id() for individual in population.individual_gen()) + 1
+
+    def events(event_type, **columns):
+        batch = {"event_type": [event_type] * len(individuals), "ID": [individual.get_id() for individual in individuals],
+                 "HH_ID": households, "HH_ID_target": [None] * len(individuals), "sex": ["F"] * len(individuals),
+                 "birth_date": [current_date] * len(individuals), "age_group_pop": [1] * len(individuals),
+                 "age_group_hh": [1] * len(individuals), "hh_position": ["child"] * len(individuals),
+                 "hh_position_target": [None] * len(individuals),
+                 "NH": [1 if individual.get_nursing_home() else 0 for individual in individuals]}
+        batch.update(columns)
+        return batch
+
+    # Births into existing households, followed by the deaths of the newborns
+    births = events("birth", ID=list(range(first_id, first_id + len(individuals))))
+    deaths = events("death", ID=births["ID"])
+    results["event_handler_birth_death"] = measure(
+        lambda: (AddToPopEventHandler(population, births).process(), RemoveFromPopEventHandler(population, deaths).process()),
+        2 * len(individuals))
+
+    # Household transitions to a new household, followed by the transitions back
+    positions = [individual.get_hh_position() for individual in individuals]
+    moves = events("hh_transition", HH_ID_target=[max(households) + 1] * len(individuals),
+                   hh_position_target=["single"] * len(individuals))
+    returns = events("hh_transition", HH_ID_target=households, hh_position_target=positions)
+    results["event_handler_hh_transition"] = measure(
+        lambda: (HHTransitionEventHandler(population, moves).process(), HHTransitionEventHandler(population, returns).process()),
+        2 * len(individuals))
+
+    # Age group transitions, followed by the transitions back
+    age_groups = events("age_group_transition", age_group_pop=[2] * len(individuals), age_group_hh=[2] * len(individuals))
+    original = events("age_group_transition", age_group_pop=[individual.get_population_age_group() for individual in individuals],
+                      age_group_hh=[individual.get_household_age_group() for individual in individuals])
+    results["event_handler_age_group_transition"] = measure(
+        lambda: (AGTransitionEventHandler(population, age_groups).process(), AGTransitionEventHandler(population, original).process()),
+        2 * len(individuals))
+
+    return results
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import numpy as np
+
+from datetime import datetime
+from benchmarks.macro import run_macro_benchmark
+from benchmarks.memory import COMPONENTS, run_memory_benchmark
+from benchmarks.micro import run_micro_benchmarks
+from libraries.args_handler import get_config
+
+# Metric that is compared against the baseline, per suite (higher is better)
+METRICS = {"micro": "ops_per_second", "macro": "individual_days_per_second"}
+
+
+def main():
+    """
+    Entry point to run the benchmarks, i.e., micro-benchmarks of the hot paths of the simulation (transmission
+    model, disease state machine, population summary, disease queue and event handlers) and macro-benchmarks that
+    simulate populations of increasing size, along with their memory footprint. The results are written to a JSON file, along with information on the
+    machine, and compared against a baseline. The exit code is non-zero when a benchmark regressed.
+    """
+    args = process_args_as_dict()
+    config = get_config(args.get("conf"))
+    suites = ["micro", "macro", "memory"] if args.get("suite") == "all" else [args.get("suite")]
+
+    results = {"machine": get_machine_info(), "micro": dict(), "macro": dict(), "memory": dict()}
+    if "micro" in suites:
+        results["micro"] = run_micro_benchmarks(config)
+        for name, result in results["micro"].items():
+            print(f"[MICRO] {name:<40} {result['ops_per_second']:>14,.0f} ops/s")
+
+    if "macro" in suites:
+        for size in args.get("sizes"):
+            result = run_macro_benchmark(config, size, args.get("days"), args.get("inputs") == "synthetic")
+            results["macro"][f"simulation_{size}"] = result
+            print(f"[MACRO] simulation_{size:<29} {result['individual_days_per_second']:>14,.0f} individual-days/s "
+                  f"(load {result['load_seconds']:.1f}s, run {result['run_seconds']:.1f}s)")
+
+    if "memory" in suites:
+        for size in args.get("sizes"):
+            result = run_memory_benchmark(config, size, args.get("days"))
+            results["memory"][f"population_{size}"] = result
+            components = ", ".join(f"{name} {result[f'{name}_bytes_per_individual']:,.0f}" for name in COMPONENTS)
+            print(f"[MEMORY] population_{size:<28} {result['bytes_per_individual']:>14,.0f} bytes/individual ({components})")
+
+    write_results(results, args.get("output"))
+    if args.get("save_baseline"):
+        write_results(results, args.get("baseline"))
+        print(f"[BENCHMARK] Saved baseline to '{args.get('baseline')}'.")
+        return
+
+    if os.path.isfile(args.get("baseline")):
+        with open(args.get("baseline")) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(results, baseline, args.get("threshold"))
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+
+        if regressions:
+            sys.exit(1)
+
+
+def get_machine_info() -> dict:
+    """
+    Function to describe the machine on which the benchmarks run, results are only comparable on the same machine.
+
+    :return: (dict) information on the machine
+    """
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(results, baseline, threshold) -> list:
+    """
+    Function to compare the results against a baseline. A benchmark regressed when its metric dropped by more than
+    the threshold, benchmarks that are missing from either side are ignored.
+
+    :param results: (dict) results of the benchmarks
+    :param baseline: (dict) results of the baseline
+    :param threshold: (number) tolerated relative drop of the metric, e.g., 0.1 for 10%
+    :return: (list) descriptions of the regressions
+    """
+    regressions = []
+    for suite, metric in METRICS.items():
+        for name, result in results[suite].items():
+            if name not in baseline.get(suite, dict()):
+                continue
+
+            current, reference = result[metric], baseline[suite][name][metric]
+            change = current / reference - 1
+            print(f"[COMPARE] {name:<40} {change:>+8.1%}")
+            if change < -threshold:
+                regressions.append(f"{name}: {metric} dropped by {-change:.1%} ({reference:,.0f} to {current:,.0f})")
+
+    return regressions
+
+
+def write_results(results, location):
+    directory = os.path.dirname(location)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    with open(location, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def process_args_as_dict():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conf", type=str, help="configuration of the benchmarks", default="benchmarks/config.toml")
+    parser.add_argument("--suite", choices=["micro", "macro", "memory", "all"], help="benchmarks to run", default="all")
+    parser.add_argument("--sizes", type=int, nargs="+", help="population sizes of the macro- and memory benchmarks",
+                        default=[10000, 100000, 1000000])
+    parser.add_argument("--inputs", choices=["scaled", "synthetic"], help="inputs of the macro-benchmarks, i.e., the "
+                        "sample scaled up or generated", default="scaled")
+    parser.add_argument("--days", type=int, help="number of simulated days of the macro-benchmarks", default=30)
+    parser.add_argument("--output", type=str, help="location of the results", default="./output/benchmarks/results.json")
+    parser.add_argument("--baseline", type=str, help="location of the baseline", default="./output/benchmarks/baseline.json")
+    parser.add_argument("--threshold", type=float, help="tolerated relative drop compared to the baseline", default=0.1)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 import datetime as dt
+import numpy as np
 from datetime import datetime
+from disease import kernels
 from disease.logger import DiseaseLogger
+from libraries.profiler import Profiler
+from libraries.random_service import RandomService
 from population.individual import Individual
+from population.network import ContactNetwork
 from population.population import Population
+from population.store import StateCounter
 from population.summary import PopulationSummary
 from reporter import Reporter
 from disease.transmission import Transmission
@@ -15,60 +21,256 @@ class Disease:
     Class to implement the disease model by propagating the disease
     according to the rules specified in the tranmission model.
     """
-    def __init__(self, config, global_config, population: Population, reporter: Reporter):
+    def __init__(self, config, global_config, population: Population, reporter: Reporter, random: RandomService,
+                 profiler: Profiler):
         self.__population = population
         self.__reporter = reporter
+        self.__profiler = profiler
+        self.__random = random
         self.__infection_duration = config.get("infection_duration", 3)
+        self.__engine = config.get("engine", "python")
+        self.__validate_summary = config.get("validate_summary", False)
+        self.__community_sampling = config.get("community_sampling", "individual")
 
         # Create disease logger
         logger_config = config.get("logger")
         self.__disease_logger = DiseaseLogger(logger_config, global_config)
+        self.__num_rows_logged = 0
 
         # Initialize Transmission model
         transmission_config = config.get("transmission")
-        self.__transmission = Transmission(transmission_config, global_config)
+        self.__transmission = Transmission(transmission_config, global_config, random)
+
+        # Household contacts are given by the contact matrices, or by a contact network of the households
+        if transmission_config.get("household_contacts", "matrix") == "network":
+            network = ContactNetwork(transmission_config, population)
+            population.set_network(network)
+            self.__transmission.set_network(network)
+            self.__reporter.info(f"Contact network of {network.get_num_edges()} edges, of which "
+                                 f"{network.get_num_listed_edges()} edges of {network.get_num_listed_households()} "
+                                 f"households from the edge list.")
 
         # Initialize the disease automaton
-        self.__disease_fsm = DiseaseFSM()
+        self.__disease_fsm = DiseaseFSM(config, random)
+
+        # The kernels of the numba engine mirror the python engine, which is used when Numba is not installed
+        # (unless the kernels are to run interpreted, i.e., to verify them)
+        if self.__engine == "numba" and not kernels.NUMBA_AVAILABLE and config.get("numba_fallback", "python") != "interpreted":
+            self.__reporter.info("Numba is not installed, falling back to the python engine.")
+            self.__engine = "python"
 
         # Recovery queue
         # FUTURE: The disease deque and corresponding functions should be managed by the state machine.
         self.__disease_deque = RollingDeque()
 
-    # FUTURE: Parallelize this loop.
+        # Shard of a sharded run (see sharded.py), None if the simulation runs the whole population
+        self.__shard = None
+
     def spread_disease(self, curr_date: datetime):
         """
         Function to apply the disease model on the population as-is. The population
         and recovery queue is updated accordingly.
         """
-        self.__process_disease_deque(curr_date)
+        profiler = self.__profiler
+        profiler.start("disease_deque")
+        num_transitions = self.__process_disease_deque(curr_date)
+        profiler.stop("disease_deque", num_transitions)
 
         # Snapshot is taken _after_ disease queue is processed
-        summary = PopulationSummary(self.__population, self.__population.get_base_distribution())
+        profiler.start("summary")
+        counts = None
+        if self.__shard is not None:
+            # The summary is the only coupling between shards, the remainder of the day is per household
+            counts = self.__shard.all_reduce_counts(self.__population.get_store().counter.snapshot())
+
+        summary = PopulationSummary(self.__population, self.__population.get_base_distribution(), counts)
+        if self.__validate_summary:
+            summary.check_consistency()
+
         self.__reporter.set_population_summary(summary)
-        self.__disease_logger.log_summary(curr_date, summary)
+        self.__transmission.set_population_summary(summary)
+        profiler.stop("summary", 1)
 
-        for household in self.__population.household_gen():
+        # Rows are logged throughout the day, their number is attributed to the daily summary
+        profiler.start("logging")
+        num_rows = self.__disease_logger.get_num_rows()
+        self.__disease_logger.log_summary(curr_date, summary)
+        profiler.stop("logging", num_rows - self.__num_rows_logged + 1)
+        self.__num_rows_logged = num_rows + 1
 
-            # TODO: Fetch the household network
+        if self.__engine == "vectorized":
+            self.__spread_disease_vectorized(curr_date, summary)
+            return
 
+        # Household transmission only needs to be evaluated for households with infectious members, kept
+        # in insertion order such that runs are reproducible
+        profiler.start("household_metrics")
+        active_households = dict.fromkeys(self.__population.active_household_gen())
+        for household in active_households:
             # Create snapshot household metrics
-            household.compute_metrics(curr_date, self.__population.get_age_child_limit())
+            household.compute_metrics()
+
+        profiler.stop("household_metrics", len(active_households))
+        profiler.start("transmission")
+        num_evaluated = 0
+
+        if self.__engine == "numba":
+            num_evaluated = self.__spread_disease_compiled(curr_date, summary, active_households)
+            individuals = []
+        elif self.__community_sampling == "stratified":
+            # Individuals of households without infectious members are covered by stratified sampling
+            individuals = [member for household in active_households for member in household.member_gen()
+                           if member.get_disease_sate() == DiseaseStateEnum.STATE_SUSCEPTIBLE]
+        else:
+            individuals = self.__population.individual_for_disease_state_gen(DiseaseStateEnum.STATE_SUSCEPTIBLE)
+
+        for individual in individuals:
+            if individual.get_household() is not None:
+                num_evaluated += 1
+                self.__evaluate_transmission(individual, curr_date, summary, active_households)
+
+        profiler.stop("transmission", num_evaluated)
+        if self.__community_sampling == "stratified":
+            self.__spread_disease_community(curr_date)
+
+    def __evaluate_transmission(self, individual: Individual, curr_date: datetime, summary: PopulationSummary,
+                                active_households: dict):
+        """
+        Function to apply the transmission model on a single individual that belongs to a household.
+        """
+        household = individual.get_household()
+        transmission_occurs, hh_trans, pop_trans = self.__transmission.occurs(
+            individual, household if household in active_households else None, summary, curr_date)
+        if transmission_occurs:
+            if household not in active_households:
+                # Metrics of inactive households are not maintained, refresh them for the log
+                household.compute_metrics()
+
+            self.transmit(individual, curr_date, False, hh_trans, pop_trans)
+
+    def __spread_disease_compiled(self, curr_date: datetime, summary: PopulationSummary, active_households: dict) -> int:
+        """
+        Function to apply the transmission model by means of a compiled kernel (see disease/kernels.py), which sweeps
+        over the susceptible individuals in the same order and with the same random numbers as the python engine.
+        Hence, both engines yield the same results. Only individuals that get infected are handled in Python.
 
-            for individual in household.member_gen():
+        :return: (number) number of evaluated individuals
+        """
+        store = self.__population.get_store()
+        if self.__community_sampling == "stratified":
+            # Individuals of households without infectious members are covered by stratified sampling
+            targets = np.array([member.get_slot() for household in active_households for member in household.member_gen()
+                                if member.get_disease_sate() == DiseaseStateEnum.STATE_SUSCEPTIBLE], dtype=np.int64)
+        else:
+            targets = store.slots_for_disease_state(DiseaseStateEnum.STATE_SUSCEPTIBLE.value, in_household=True)
+
+        # Infectious members of the households with infectious members, by disease state, household age group and sex
+        row_of_household = np.full(int(store.household[:store.size()].max(initial=0)) + 1, -1, dtype=np.int64)
+        row_of_household[[household.get_index() for household in active_households]] = np.arange(len(active_households))
+        state_position = np.full(StateCounter.NUM_STATES, -1, dtype=np.int64)
+        state_position[[state.value for state in kernels.INFECTIOUS_STATES]] = np.arange(len(kernels.INFECTIOUS_STATES))
+
+        infectious = store.active_slots()
+        infectious = infectious[(store.household[infectious] >= 0) & (state_position[store.state[infectious]] >= 0)]
+        counts = np.zeros((len(active_households), len(kernels.INFECTIOUS_STATES),
+                           int(store.hh_age_group[infectious].max(initial=0)) + 1, 2), dtype=np.int64)
+        np.add.at(counts, (row_of_household[store.household[infectious]], state_position[store.state[infectious]],
+                           store.hh_age_group[infectious], store.sex[infectious].astype(np.int64)), 1)
+        has_children = np.array([household.has_children() for household in active_households], dtype=np.bool_)
+        household_rows = row_of_household[store.household[targets]]
+
+        parameters = self.__transmission.get_kernel_parameters()
+        progression = self.__disease_fsm.get_progression()
+        exposed_parameters = np.array([progression.get_duration_parameter(name) for name in [
+            "incubation_min", "incubation_lognormal_mean", "incubation_lognormal_sigma", "infectious_normal_mean",
+            "infectious_normal_sd"]], dtype=float)
+        pre_symptomatic_cdf = np.cumsum(progression.get_duration_parameter("pre_symptomatic_pmf"))
+
+        infected = np.zeros(len(targets), dtype=np.bool_)
+        hh_trans, pop_trans = np.ones(len(targets)), np.ones(len(targets))
+        durations = np.zeros((len(targets), 3), dtype=np.int64)
+        position = 0
+        while position < len(targets):
+            start = position
+            position, num_uniforms, num_normals = kernels.transmission_sweep(
+                start, targets, household_rows, counts, has_children, store.hh_age_group, store.sex,
+                store.nursing_home, store.age, store.pop_age_group, parameters["hh_contact"], parameters["num_hh_ag"],
+                parameters["delta"], parameters["delta_nursing_home"], parameters["escape_bases"],
+                parameters["pop_escape"], parameters["network_escape"], self.__population.get_age_child_limit(),
+                exposed_parameters, pre_symptomatic_cdf, self.__random.get_pending_uniforms(),
+                self.__random.get_pending_normals(), infected, hh_trans, pop_trans, durations)
+            self.__random.skip(num_uniforms, num_normals)
 
-                if individual.get_disease_sate() == DiseaseStateEnum.STATE_SUSCEPTIBLE:
+            for index in np.flatnonzero(infected[start:position]) + start:
+                individual = store.individuals[targets[index]]
+                if household_rows[index] < 0:
+                    # Metrics of inactive households are not maintained, refresh them for the log
+                    individual.get_household().compute_metrics()
 
-                    transmission_occurs, hh_trans, pop_trans = self.__transmission.occurs(individual, household, summary, curr_date)
-                    if transmission_occurs:
-                        self.transmit(individual, curr_date, False, hh_trans, pop_trans)
+                exposed_period, individual.pre_symptomatic_duration, individual.remaining_time_infected = durations[index].tolist()
+                self.transmit(individual, curr_date, False, float(hh_trans[index]) if household_rows[index] >= 0 else 1,
+                              float(pop_trans[index]), (DiseaseStateEnum.STATE_INFECTED, exposed_period))
 
-    def transmit(self, individual: Individual, date: datetime, influx=False, hh_trans=0, pop_trans=0):
+            # The kernel ran out of random numbers, the individual is evaluated by the python engine
+            if position < len(targets):
+                self.__evaluate_transmission(store.individuals[targets[position]], curr_date, summary, active_households)
+                position += 1
+
+        return len(targets)
+
+    def __spread_disease_vectorized(self, curr_date: datetime, summary: PopulationSummary):
         """
-        Function to call when disease is transmitted to an individual.
+        Function to apply the transmission model on all susceptible individuals in a single, batched
+        pass over the population store.
+        """
+        self.__profiler.start("transmission")
+        store = self.__population.get_store()
+        susceptible = store.slots_for_disease_state(DiseaseStateEnum.STATE_SUSCEPTIBLE.value, in_household=True)
+
+        if self.__community_sampling == "stratified":
+            # Individuals of households without infectious members are covered by stratified sampling
+            susceptible = susceptible[np.isin(store.household[susceptible], list(store.infectious_households))]
+
+        infected, hh_trans, pop_trans = self.__transmission.occurs_vectorized(
+            store, susceptible, summary, curr_date, self.__population.get_age_child_limit())
+
+        # Household metrics are only required for the households in which transmission occurs
+        infected = np.flatnonzero(infected)
+        for household in {store.individuals[susceptible[idx]].get_household() for idx in infected}:
+            household.compute_metrics()
+
+        for idx in infected:
+            self.transmit(store.individuals[susceptible[idx]], curr_date, False, float(hh_trans[idx]), float(pop_trans[idx]))
+
+        self.__profiler.stop("transmission", len(susceptible))
+        if self.__community_sampling == "stratified":
+            self.__spread_disease_community(curr_date)
+
+    def __spread_disease_community(self, curr_date: datetime):
+        """
+        Function to apply the transmission model on the individuals of households without infectious
+        members, by means of stratified sampling.
+        """
+        self.__profiler.start("community")
+        store = self.__population.get_store()
+        num_infected = 0
+        for slot, hh_trans, pop_trans in self.__transmission.occurs_community(store, curr_date, self.__population.get_age_child_limit()):
+            individual = store.individuals[slot]
+
+            # Metrics of inactive households are not maintained, refresh them for the log
+            individual.get_household().compute_metrics()
+            self.transmit(individual, curr_date, False, hh_trans, pop_trans)
+            num_infected += 1
+
+        self.__profiler.stop("community", num_infected)
+
+    def transmit(self, individual: Individual, date: datetime, influx=False, hh_trans=0, pop_trans=0, transition=None):
+        """
+        Function to call when disease is transmitted to an individual, the transition out of the start state is
+        given when it has been sampled already (i.e., by a kernel).
         """
         self.__disease_logger.log_transmission(individual, date, influx, hh_trans, pop_trans)
-        self.__add_to_disease_deque(individual, date, self.__disease_fsm.get_start_node().get_disease_state())
+        self.__add_to_disease_deque(individual, date, self.__disease_fsm.get_start_node().get_disease_state(), transition)
 
     def get_num_infected(self):
         """
@@ -78,9 +280,50 @@ class Disease:
         """
         return self.__disease_deque.get_num_elements()
 
-    def __add_to_disease_deque(self, individual: Individual, date: datetime, disease_state: DiseaseStateEnum):
+    def get_hh_escape_cache(self):
+        """
+        Function to retrieve the cache of household escape probabilities of the transmission model.
+
+        :return: (LRUCache) household escape probability cache
         """
-        Function to add to the disease queue.
+        return self.__transmission.get_hh_escape_cache()
+
+    def set_reporter(self, reporter: Reporter):
+        self.__reporter = reporter
+
+    def set_profiler(self, profiler: Profiler):
+        self.__profiler = profiler
+
+    def set_shard(self, shard):
+        """
+        Function to run the disease model on a shard of the population, the population summary is summed
+        over all shards.
+
+        :param shard: (Shard) shard of the population
+        """
+        self.__shard = shard
+
+    def set_logger(self, logger: DiseaseLogger):
+        """
+        Function to replace the disease logger, the current logger is closed.
+
+        :param logger: (DiseaseLogger) new disease logger
+        """
+        self.__disease_logger.close()
+        self.__disease_logger = logger
+        self.__num_rows_logged = 0
+
+    def teardown(self):
+        """
+        Function to close the disease logs.
+        """
+        self.__disease_logger.close()
+
+    def __add_to_disease_deque(self, individual: Individual, date: datetime, disease_state: DiseaseStateEnum,
+                               transition=None):
+        """
+        Function to add to the disease queue. The transition to the next state, i.e., the next state and days until
+        the next state, is sampled by the state machine unless it is given.
 
         FUTURE: The disease deque and corresponding functions should be managed by the state machine.
         """
@@ -102,7 +345,7 @@ class Disease:
         if not next_node.is_end_state():
 
             # Determine next state and days until next state
-            next_state, days_offset = next_node.get_next_state(individual, date)
+            next_state, days_offset = transition if transition is not None else next_node.get_next_state(individual, date)
 
             # Push onto disease deque
             self.__disease_deque.put_element(date + dt.timedelta(days=days_offset), (next_state, individual))
@@ -112,7 +355,62 @@ class Disease:
         Function to process the disease deque for the current date.
 
         FUTURE: The disease deque and corresponding functions should be managed by the state machine.
+
+        :return: (number) number of processed state transitions
         """
+        if self.__engine == "numba":
+            return self.__process_disease_deque_compiled(curr_date)
+
         # Process disease deque up to current date
+        num_transitions = 0
         for next_state, individual in self.__disease_deque.get_elements_for_date(curr_date):
             self.__add_to_disease_deque(individual, curr_date, next_state)
+            num_transitions += 1
+
+        return num_transitions
+
+    def __process_disease_deque_compiled(self, curr_date: datetime):
+        """
+        Function to process the disease deque for the current date, the transitions to the next states are sampled
+        by a compiled kernel (see disease/kernels.py) with the same random numbers as the state machine.
+
+        :return: (number) number of processed state transitions
+        """
+        elements = list(self.__disease_deque.get_elements_for_date(curr_date))
+        individuals = [individual for _, individual in elements]
+        states = np.array([state.value for state, _ in elements], dtype=np.int64)
+        ages = np.array([individual.get_age(curr_date) for individual in individuals], dtype=np.int64)
+        sexes = np.array([individual.get_sex() for individual in individuals], dtype=np.bool_)
+        nursing_homes = np.array([individual.get_nursing_home() for individual in individuals], dtype=np.bool_)
+        remaining_time_infected, pre_symptomatic_duration, hospitalized_duration = [
+            np.array([getattr(individual, name) or 0 for individual in individuals], dtype=np.int64)
+            for name in ["remaining_time_infected", "pre_symptomatic_duration", "hospitalized_duration"]]
+
+        progression = self.__disease_fsm.get_progression()
+        next_states, days = np.zeros(len(elements), dtype=np.int64), np.zeros(len(elements), dtype=np.int64)
+        position = 0
+        while position < len(elements):
+            start = position
+            position, num_uniforms, num_normals = kernels.progression_step(
+                start, states, ages, sexes, nursing_homes, remaining_time_infected, pre_symptomatic_duration,
+                hospitalized_duration, progression.get_symptomatic_table(), progression.get_mortality_table(),
+                progression.get_duration_parameter("demise_lognormal_mean"),
+                progression.get_duration_parameter("demise_lognormal_sigma"), self.__random.get_pending_uniforms(),
+                self.__random.get_pending_normals(), next_states, days)
+            self.__random.skip(num_uniforms, num_normals)
+
+            for index in range(start, position):
+                individual, transition = individuals[index], None
+                if next_states[index] > 0:
+                    transition = (DiseaseStateEnum(next_states[index]), int(days[index]))
+                    if transition[0] == DiseaseStateEnum.STATE_HOSPITALIZED:
+                        individual.hospitalized_duration = int(hospitalized_duration[index])
+
+                self.__add_to_disease_deque(individual, curr_date, elements[index][0], transition)
+
+            # The kernel ran out of random numbers, the transition is sampled by the state machine
+            if position < len(elements):
+                self.__add_to_disease_deque(individuals[position], curr_date, elements[position][0])
+                position += 1
+
+        return len(elements)
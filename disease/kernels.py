@@ -0,0 +1,236 @@
+import math
+import numpy as np
+
+from disease.disease_state import DiseaseStateEnum
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Whether the kernels are compiled by Numba, otherwise they run as regular (interpreted) functions
+NUMBA_AVAILABLE = numba is not None
+
+# Codes of the disease states, constants to the compiled kernels
+STATE_INFECTED = DiseaseStateEnum.STATE_INFECTED.value
+STATE_SYMPTOMATIC = DiseaseStateEnum.STATE_SYMPTOMATIC.value
+STATE_ASYMPTOMATIC = DiseaseStateEnum.STATE_ASYMPTOMATIC.value
+STATE_HOSPITALIZED = DiseaseStateEnum.STATE_HOSPITALIZED.value
+STATE_RECOVERED = DiseaseStateEnum.STATE_RECOVERED.value
+STATE_DIED = DiseaseStateEnum.STATE_DIED.value
+
+# Infectious disease states, in the order of the counts of a household (i.e., by code)
+INFECTIOUS_STATES = [DiseaseStateEnum.STATE_INFECTED, DiseaseStateEnum.STATE_SYMPTOMATIC, DiseaseStateEnum.STATE_ASYMPTOMATIC]
+
+
+def kernel(function):
+    """
+    Decorator to compile a kernel by means of Numba, when it is installed. Kernels only operate on arrays and
+    numbers, such that they run unchanged (albeit slowly) when they are not compiled.
+
+    :param function: (function) kernel to compile
+    :return: (function) compiled kernel, or the kernel itself
+    """
+    if numba is None:
+        return function
+
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@kernel
+def household_escape_probability(counts, has_children, hh_age_group, sex, nursing_home, hh_contact, num_hh_ag,
+                                 delta, delta_nursing_home, escape_bases):
+    """
+    Function to compute the probability of escaping from infection within a household, mirrors
+    'Transmission.__compute_hh_infection_escape_prob_for_composition' (including the order of the operations).
+
+    :param counts: (ndarray) infectious members of the household, by disease state (see INFECTIOUS_STATES),
+        household age group and sex
+    :param has_children: (bool) whether the household has children
+    :param hh_age_group: (number) household age group of the individual
+    :param sex: (bool) sex of the individual
+    :param nursing_home: (bool) whether the individual resides in a nursing home
+    :param hh_contact: (ndarray) flattened household contact matrices
+    :param num_hh_ag: (number) number of household age groups of the contact matrices
+    :param delta: (float) maximum number of contacts in non-nursing homes
+    :param delta_nursing_home: (float) maximum number of contacts in nursing homes
+    :param escape_bases: (ndarray) probability to escape a single contact, by disease state
+    :return: (float) probability of escaping household disease transmission
+    """
+    offset = ((1 if has_children else 0) * num_hh_ag + (hh_age_group - 1) % num_hh_ag) * num_hh_ag * 4 + (0 if sex else 1) * 2
+    contacts = np.zeros(3)
+    for state in range(3):
+        for age_group in range(counts.shape[1]):
+            for contact_sex in range(2):
+                num = counts[state, age_group, contact_sex]
+                if num > 0:
+                    contacts[state] += num * hh_contact[offset + ((age_group - 1) % num_hh_ag) * 4 + (0 if contact_sex else 1)]
+
+    inf_contacts, symp_contacts, asymp_contacts = contacts[0], contacts[1], contacts[2]
+    delta_contacts = delta_nursing_home if nursing_home else delta
+    while (symp_contacts + asymp_contacts + inf_contacts) > delta_contacts:
+        symp_contacts -= 1
+        if (symp_contacts + asymp_contacts + inf_contacts) > delta_contacts:
+            asymp_contacts -= 1
+            if (symp_contacts + asymp_contacts + inf_contacts) > delta_contacts:
+                inf_contacts -= 1
+
+    return escape_bases[0] ** inf_contacts * escape_bases[2] ** asymp_contacts * escape_bases[1] ** symp_contacts
+
+
+@kernel
+def sample_exposed(incubation_normal, pre_symptomatic_uniform, infectious_normal, incubation_min, incubation_mean,
+                   incubation_sigma, pre_symptomatic_cdf, infectious_mean, infectious_sd):
+    """
+    Function to sample the progression of an exposed individual from the given draws, mirrors
+    'ExposedDiseaseStateFSMNode.get_next_state'.
+
+    :return: (tuple) exposed period, pre-symptomatic duration and remaining time infected, in days
+    """
+    incubation_duration = max(incubation_min, math.exp(incubation_mean + incubation_sigma * incubation_normal))
+    pre_symptomatic_duration = min(incubation_duration, 1 + np.searchsorted(
+        pre_symptomatic_cdf, pre_symptomatic_uniform * pre_symptomatic_cdf[-1], side="right"))
+
+    # Rounding is half to even, as Python's round
+    exposed_period = max(1, int(np.rint(incubation_duration - pre_symptomatic_duration)))
+    remaining_time_infected = int(np.rint(max(0.0, infectious_mean + infectious_sd * infectious_normal - pre_symptomatic_duration)))
+    return exposed_period, int(math.ceil(pre_symptomatic_duration)), remaining_time_infected
+
+
+@kernel
+def transmission_sweep(start, targets, household_rows, counts, has_children, hh_age_group, sex, nursing_home, age,
+                       pop_age_group, hh_contact, num_hh_ag, delta, delta_nursing_home, escape_bases, pop_escape,
+                       network_escape, age_child_limit, exposed_parameters, pre_symptomatic_cdf, uniforms, normals,
+                       infected, hh_trans, pop_trans, durations):
+    """
+    Function to apply the transmission model to the given (susceptible) individuals, in order, and to sample the
+    progression of the individuals that get infected. Random numbers are taken from the given uniforms and normals,
+    in the order in which the per-individual engine draws them. The sweep stops at the first individual for which
+    the random numbers do not suffice, the caller evaluates that individual by means of the per-individual engine
+    (which draws new blocks of random numbers) and continues the sweep from the next individual.
+
+    :param start: (number) position of the first individual to evaluate
+    :param targets: (ndarray) slots of the individuals to evaluate
+    :param household_rows: (ndarray) per individual, the row of its household in the counts, -1 if the household
+        has no infectious members
+    :param counts: (ndarray) infectious members per household row, by disease state, household age group and sex
+    :param has_children: (ndarray) per household row, whether the household has children
+    :param network_escape: (ndarray) per slot, household escape probability by the contact network, empty when
+        household contacts are given by the contact matrices
+    :param exposed_parameters: (ndarray) incubation minimum, mean and sigma, infectious mean and sd
+    :param uniforms: (ndarray) pending uniforms, in the order in which they are drawn
+    :param normals: (ndarray) pending standard normals, in the order in which they are drawn
+    :param infected: (ndarray) output, per individual, whether transmission occurs
+    :param hh_trans: (ndarray) output, per individual, probability of escaping household transmission
+    :param pop_trans: (ndarray) output, per individual, probability of escaping population transmission
+    :param durations: (ndarray) output, per infected individual, exposed period, pre-symptomatic duration and
+        remaining time infected
+    :return: (tuple) position at which the sweep stopped, number of uniforms and normals that were used
+    """
+    num_uniforms, num_normals = 0, 0
+    for position in range(start, len(targets)):
+        slot = targets[position]
+        if num_uniforms >= len(uniforms) or age[slot] < 0:
+            return position, num_uniforms, num_normals
+
+        row = household_rows[position]
+        escape_household = 1.0
+        if row >= 0 and len(network_escape) > 0:
+            escape_household = network_escape[slot]
+        elif row >= 0:
+            escape_household = household_escape_probability(
+                counts[row], has_children[row], hh_age_group[slot], sex[slot], nursing_home[slot], hh_contact,
+                num_hh_ag, delta, delta_nursing_home, escape_bases)
+
+        escape_population = pop_escape[pop_age_group[slot] - 1]
+        susceptibility_adjustment = 0.5 if age[slot] < age_child_limit else 1.0
+        p_inf = susceptibility_adjustment * (1 - escape_household * escape_population)
+
+        if uniforms[num_uniforms] < p_inf:
+            # Progression of the exposed individual takes a uniform and two normals
+            if num_uniforms + 2 > len(uniforms) or num_normals + 2 > len(normals):
+                return position, num_uniforms, num_normals
+
+            durations[position, 0], durations[position, 1], durations[position, 2] = sample_exposed(
+                normals[num_normals], uniforms[num_uniforms + 1], normals[num_normals + 1], exposed_parameters[0],
+                exposed_parameters[1], exposed_parameters[2], pre_symptomatic_cdf, exposed_parameters[3],
+                exposed_parameters[4])
+            infected[position] = True
+            num_uniforms += 2
+            num_normals += 2
+        else:
+            num_uniforms += 1
+
+        hh_trans[position] = escape_household
+        pop_trans[position] = escape_population
+
+    return len(targets), num_uniforms, num_normals
+
+
+@kernel
+def progression_step(start, states, ages, sexes, nursing_homes, remaining_time_infected, pre_symptomatic_duration,
+                     hospitalized_duration, symptomatic_table, mortality_table, demise_mean, demise_sigma,
+                     uniforms, normals, next_states, days):
+    """
+    Function to sample the next disease state of individuals that enter the given disease states, in order, mirrors
+    the 'get_next_state' functions of the nodes of the disease state machine. Random numbers are used as in
+    'transmission_sweep', the step stops at the first individual for which they do not suffice (or which enters a
+    disease state that is not covered), the caller progresses that individual by means of the state machine.
+
+    :param start: (number) position of the first individual to progress
+    :param states: (ndarray) codes of the disease states that the individuals enter
+    :param hospitalized_duration: (ndarray) per individual, hospitalized duration, updated for individuals that
+        become hospitalized
+    :param uniforms: (ndarray) pending uniforms, in the order in which they are drawn
+    :param normals: (ndarray) pending standard normals, in the order in which they are drawn
+    :param next_states: (ndarray) output, per individual, code of the next disease state, 0 for end states
+    :param days: (ndarray) output, per individual, days until the next disease state
+    :return: (tuple) position at which the step stopped, number of uniforms and normals that were used
+    """
+    num_uniforms, num_normals = 0, 0
+    max_age = symptomatic_table.shape[0] - 1
+    for position in range(start, len(states)):
+        state = states[position]
+        age = min(ages[position], max_age)
+        sex, nursing_home = 1 if sexes[position] else 0, 1 if nursing_homes[position] else 0
+
+        if state == STATE_INFECTED:
+            if remaining_time_infected[position] == 0:
+                next_states[position], days[position] = STATE_RECOVERED, pre_symptomatic_duration[position]
+                continue
+
+            if num_uniforms >= len(uniforms):
+                return position, num_uniforms, num_normals
+
+            becomes_symptomatic = uniforms[num_uniforms] < symptomatic_table[age, sex, nursing_home]
+            num_uniforms += 1
+            next_states[position] = STATE_SYMPTOMATIC if becomes_symptomatic else STATE_ASYMPTOMATIC
+            days[position] = pre_symptomatic_duration[position]
+        elif state == STATE_SYMPTOMATIC or state == STATE_ASYMPTOMATIC:
+            if num_uniforms >= len(uniforms):
+                return position, num_uniforms, num_normals
+
+            infectious_duration = remaining_time_infected[position]
+            if uniforms[num_uniforms] < mortality_table[age, sex, nursing_home]:
+                if num_normals >= len(normals):
+                    return position, num_uniforms, num_normals
+
+                days_until_demise = max(1, int(np.rint(math.exp(demise_mean + demise_sigma * normals[num_normals]))))
+                num_normals += 1
+                if days_until_demise > infectious_duration:
+                    hospitalized_duration[position] = max(1, days_until_demise - infectious_duration)
+                    next_states[position], days[position] = STATE_HOSPITALIZED, infectious_duration
+                else:
+                    next_states[position], days[position] = STATE_DIED, days_until_demise
+            else:
+                next_states[position], days[position] = STATE_RECOVERED, infectious_duration
+
+            num_uniforms += 1
+        elif state == STATE_HOSPITALIZED:
+            next_states[position], days[position] = STATE_DIED, hospitalized_duration[position]
+        elif state == STATE_RECOVERED or state == STATE_DIED:
+            next_states[position] = 0
+        else:
+            return position, num_uniforms, num_normals
+
+    return len(states), num_uniforms, num_normals
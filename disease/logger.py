@@ -2,7 +2,11 @@ from population.individual import Individual
 from datetime import datetime
 import csv
 import os
+import queue
+import threading
 
+from libraries.checkpoint import get_output_position, reopen_output
+from libraries.result_store import ResultTable
 from population.summary import PopulationSummary
 from disease.disease_state import DiseaseStateEnum
 
@@ -25,21 +29,124 @@ def serialize_age_distribution(inf_age_distribution):
     return dist
 
 
+class BufferedLog:
+    """
+    Log of which the rows are buffered as tuples, full blocks of rows are handed to a writer (see DiseaseLogger)
+    that writes them in bulk.
+    """
+    def __init__(self):
+        self._rows = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def append(self, row: tuple) -> int:
+        """
+        Function to buffer a row of the log.
+
+        :param row: (tuple) values of the row, in the order of the columns
+        :return: (number) number of buffered rows
+        """
+        self._rows.append(row)
+        return len(self._rows)
+
+    def take_block(self) -> list:
+        """
+        Function to take the buffered rows, i.e., the buffer is emptied.
+
+        :return: (list) buffered rows
+        """
+        block, self._rows = self._rows, []
+        return block
+
+    def write_block(self, block: list):
+        """
+        Function to write a block of rows.
+
+        :param block: (list) rows to write
+        """
+        ...
+
+    def close(self):
+        ...
+
+
+class CsvLog(BufferedLog):
+    """
+    Csv-formatted log, blocks are serialized by means of a csv writer.
+    """
+    def __init__(self, file_name: str, columns: list):
+        super().__init__()
+        directory = os.path.dirname(file_name)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.__columns = columns
+        self.__out_file = open(file_name, "w")
+        self.__writer = csv.writer(self.__out_file)
+        self.__writer.writerow(columns)
+
+    def __getstate__(self):
+        # Open files can not be pickled, the position up to which the log has been written is recorded instead
+        return self.__out_file.name, get_output_position(self.__out_file), self.__columns, self._rows
+
+    def __setstate__(self, state):
+        file_name, position, self.__columns, self._rows = state
+        self.__out_file = reopen_output(file_name, position)
+        self.__writer = csv.writer(self.__out_file)
+
+    def write_block(self, block: list):
+        self.__writer.writerows(block)
+
+    def close(self):
+        self.__out_file.close()
+
+
+class SqliteLog(BufferedLog):
+    """
+    Log that is stored in a table of a result database (see libraries/result_store.py), blocks are inserted in a
+    single transaction.
+    """
+    def __init__(self, table: ResultTable):
+        super().__init__()
+        self.__table = table
+
+    def write_block(self, block: list):
+        self.__table.insert(block)
+
+    def close(self):
+        self.__table.close()
+
+
 class DiseaseLogger:
+    """
+    Logger of the transmissions, disease state changes and daily summaries of the simulation. Rows are buffered
+    per log and written in blocks of 'buffer_size' rows by a background thread, the logs are complete once the
+    logger is closed (see close). The logs are either written to csv files or, when a 'database' is configured,
+    to the tables of a result database that is shared by the runs of an ensemble.
+    """
     def __init__(self, config, global_config):
         # Parsing config
         self.__enabled = config.get("enabled", False)
-        self.__inf_output_file = None
-        self.__sim_out_file = None
-        self.__disease_log_out_file = None
         self.__tans_log_file_name = config.get("tans_log_file_name", None)
         self.__sim_log_file_name = config.get("sim_log_file_name", None)
         self.__disease_log_file_name = config.get("disease_log_file_name", None)
+        self.__buffer_size = config.get("buffer_size", 10000)
+        self.__database = config.get("database", None)
+        self.__run_id = config.get("run_id", "default")
+        self.__seed = global_config.get("seed")
         self.__date_format = global_config.get("date_format", "%Y-%m-%d")
         self.__inf_log = None
         self.__sim_log = None
         self.__disease_log = None
 
+        # Number of rows logged, i.e., over all logs
+        self.__num_rows = 0
+
+        # Dates are formatted once per day
+        self.__date = None
+        self.__date_formatted = None
+
         # Cols to write
         inf_cols = [
             "date_infected",
@@ -70,75 +177,149 @@ class DiseaseLogger:
         ]
 
         # Create files
-        if self.__enabled:
-            self.__inf_output_file, self.__inf_log = self._initialize_file_sink(self.__tans_log_file_name, inf_cols)
-            self.__sim_output_file, self.__sim_log = self._initialize_file_sink(self.__sim_log_file_name, sim_cols)
-            self.__disease_log_out_file, self.__disease_log = self._initialize_file_sink(self.__disease_log_file_name, disease_cols)
+        if self.__enabled and self.__database:
+            self.__inf_log = self.__create_table("transmission_log", inf_cols, "date_infected")
+            self.__sim_log = self.__create_table("simulation_log", sim_cols, "iteration")
+            self.__disease_log = self.__create_table("disease_log", disease_cols, "date_change")
+        elif self.__enabled:
+            self.__inf_log = CsvLog(self.__tans_log_file_name, inf_cols) if self.__tans_log_file_name else None
+            self.__sim_log = CsvLog(self.__sim_log_file_name, sim_cols) if self.__sim_log_file_name else None
+            self.__disease_log = CsvLog(self.__disease_log_file_name, disease_cols) if self.__disease_log_file_name else None
+
+        self.__reset_writer()
 
     def log_transmission(self, individual: Individual, date: datetime, influx, hh_trans_escp, pop_trans_escp):
-        if self.__enabled:
-            date_formatted = date.strftime(self.__date_format)
+        if self.__inf_log is not None:
             household = individual.get_household()
 
-            self.__inf_log.writerow({
-                "date_infected": date_formatted,
-                "influx": int(influx),
-                "hh_trans_escp": hh_trans_escp,
-                "pop_trans_escp": pop_trans_escp,
-                "id": individual.get_id(),
-                "HH_ID": household.get_id(),
-                "sex": individual.get_sex(),
-                "age": individual.get_age(date),
-                # "inf_age_distribution": serialize_age_distribution(household.get_infected_age_distribution()),
-                "num_infected_hh": household.get_total_for_disease_state(DiseaseStateEnum.STATE_INFECTED),
-                "num_symptomatic_hh": household.get_total_for_disease_state(DiseaseStateEnum.STATE_SYMPTOMATIC),
-                "num_asymptomatic_hh": household.get_total_for_disease_state(DiseaseStateEnum.STATE_ASYMPTOMATIC),
-                "hh_size": household.get_size(),
-                "NH": individual.get_nursing_home()
-
-            })
+            self.__append(self.__inf_log, (
+                self.__format_date(date),
+                int(influx),
+                hh_trans_escp,
+                pop_trans_escp,
+                individual.get_id(),
+                household.get_id(),
+                individual.get_sex(),
+                individual.get_age(date),
+                # serialize_age_distribution(household.get_infected_age_distribution()),
+                household.get_total_for_disease_state(DiseaseStateEnum.STATE_INFECTED),
+                household.get_total_for_disease_state(DiseaseStateEnum.STATE_ASYMPTOMATIC),
+                household.get_total_for_disease_state(DiseaseStateEnum.STATE_SYMPTOMATIC),
+                household.get_size(),
+                individual.get_nursing_home()
+            ))
 
     def log_disease_state_change(self, individual: Individual, date: datetime, disease_state):
-        if self.__enabled:
-            date_formatted = date.strftime(self.__date_format)
-            self.__disease_log.writerow({
-                "individual_id": individual.get_id(),
-                "date_change": date_formatted,
-                "disease_state": disease_state
-            })
+        if self.__disease_log is not None:
+            self.__append(self.__disease_log, (individual.get_id(), self.__format_date(date), disease_state))
 
     def log_summary(self, date: datetime, summary: PopulationSummary):
-        if self.__enabled:
-            el = {"iteration": date.strftime(self.__date_format)}
+        if self.__sim_log is not None:
+            self.__append(self.__sim_log, (self.__format_date(date),) + tuple(
+                summary.get_total_for_disease_state(disease_state) for disease_state in DiseaseStateEnum))
+
+    def close(self):
+        """
+        Function to close the log files, entries that are still buffered are written first. Closing the logger
+        more than once has no effect.
+        """
+        self.__drain()
+        if self.__writer is not None:
+            self.__queue.put(None)
+            self.__writer.join()
+
+        for log in self.__logs():
+            log.close()
+
+        self.__inf_log = self.__sim_log = self.__disease_log = None
+        self.__reset_writer()
+
+    def __getstate__(self):
+        """
+        Function to capture the state of the logger for a checkpoint. The buffered entries are written first,
+        such that the logs record the position up to which they have been written.
+        """
+        self.__drain()
+        state = self.__dict__.copy()
+        for attribute in ["queue", "writer", "writer_error"]:
+            del state[f"_DiseaseLogger__{attribute}"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__reset_writer()
+
+    def __create_table(self, name, columns, date_column) -> SqliteLog:
+        return SqliteLog(ResultTable(self.__database, name, columns, self.__run_id, self.__seed, date_column))
+
+    def __logs(self):
+        return [log for log in [self.__inf_log, self.__sim_log, self.__disease_log] if log is not None]
+
+    def __format_date(self, date: datetime) -> str:
+        if date != self.__date:
+            self.__date = date
+            self.__date_formatted = date.strftime(self.__date_format)
+
+        return self.__date_formatted
+
+    def get_num_rows(self) -> int:
+        """
+        Function to retrieve the number of rows that have been logged, over all logs.
+
+        :return: (number) number of rows
+        """
+        return self.__num_rows
+
+    def __append(self, log: BufferedLog, row: tuple):
+        self.__num_rows += 1
+        if log.append(row) >= self.__buffer_size:
+            self.__submit(log)
+
+    def __submit(self, log: BufferedLog):
+        """
+        Function to hand the buffered rows of a log to the writer thread, which is started on first use (i.e.,
+        not before a simulation forks its workers).
 
-            # Format entry for each disease state
-            for disease_state in DiseaseStateEnum:
-                el[f"num_{disease_state.name.lower()}"] = summary.get_total_for_disease_state(disease_state)
+        :param log: (BufferedLog) log to write
+        """
+        if self.__writer_error is not None:
+            raise self.__writer_error
 
-            print(el) # TODO Remove
-            self.__sim_log.writerow(el)
+        if self.__writer is None:
+            self.__writer = threading.Thread(target=self.__write, name="disease-logger", daemon=True)
+            self.__writer.start()
 
+        self.__queue.put((log, log.take_block()))
 
-    @staticmethod
-    def _initialize_file_sink(file_name: str, columns: list):
-        if file_name:
-            if not os.path.exists(os.path.dirname(file_name)):
-                try:
-                    os.makedirs(os.path.dirname(file_name))
-                except:
-                    pass
-            out_file = open(file_name, "w")
-            log = csv.DictWriter(out_file, fieldnames=columns)
-            log.writeheader()
+    def __drain(self):
+        """
+        Function to write all buffered rows and wait until the writer thread has written them.
+        """
+        for log in self.__logs():
+            if len(log) > 0:
+                self.__submit(log)
 
-            return out_file, log
+        self.__queue.join()
+        if self.__writer_error is not None:
+            raise self.__writer_error
 
-    def __del__(self):
-        if self.__enabled and self.__tans_log_file_name:
-            self.__inf_output_file.close()
+    def __reset_writer(self):
+        # Blocks are bounded, such that the main loop waits for the writer rather than exhausting memory
+        self.__queue = queue.Queue(maxsize=16)
+        self.__writer = None
+        self.__writer_error = None
 
-        if self.__enabled and self.__sim_log_file_name:
-            self.__sim_output_file.close()
+    def __write(self):
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    return
 
-        if self.__enabled and self.__sim_log_file_name:
-            self.__disease_log_out_file.close()
\ No newline at end of file
+                log, block = item
+                log.write_block(block)
+            except Exception as e:
+                self.__writer_error = e
+            finally:
+                self.__queue.task_done()
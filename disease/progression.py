@@ -0,0 +1,112 @@
+import csv
+import numpy as np
+
+
+class ProgressionTable:
+    """
+    Class that holds the parameters of the disease progression, i.e., the probabilities to become symptomatic
+    and to die, and the parameters of the duration distributions. Probabilities are read from csv-formatted
+    tables and compiled into dense lookup arrays, indexed by (age, sex, nursing home).
+
+    Probability tables consist of the columns 'age_from', 'age_to', 'sex', 'NH' and 'probability'. Age bands are
+    inclusive, an 'NA' upper bound leaves the band open-ended. Sex ('F' or 'M') and NH (0 or 1) are either given
+    or 'NA', indicating that the row applies to both values.
+    """
+    MAX_AGE = 120
+
+    def __init__(self, config):
+        self.__symptomatic = self.__compile_probability_table(config.get("symptomatic_table", "./input/disease_symptomatic.csv"))
+        self.__mortality = self.__compile_probability_table(config.get("mortality_table", "./input/disease_mortality.csv"))
+        self.__durations = self.__parse_durations(config.get("durations_table", "./input/disease_durations.csv"))
+
+    def get_symptomatic_probability(self, age: int, sex: bool, nursing_home: bool) -> float:
+        """
+        Function to retrieve the probability that an individual becomes symptomatic.
+
+        :param age: (number) age of the individual
+        :param sex: (bool) sex of the individual
+        :param nursing_home: (bool) whether the individual resides in a nursing home
+        :return: (float) probability to become symptomatic
+        """
+        return self.__symptomatic[min(age, self.MAX_AGE), int(sex), int(nursing_home)]
+
+    def get_mortality_probability(self, age: int, sex: bool, nursing_home: bool) -> float:
+        """
+        Function to retrieve the probability that an infected individual dies.
+
+        :param age: (number) age of the individual
+        :param sex: (bool) sex of the individual
+        :param nursing_home: (bool) whether the individual resides in a nursing home
+        :return: (float) probability to die
+        """
+        return self.__mortality[min(age, self.MAX_AGE), int(sex), int(nursing_home)]
+
+    def get_symptomatic_table(self):
+        """
+        Function to retrieve the probabilities to become symptomatic, e.g., for a compiled kernel.
+
+        :return: (ndarray) probabilities, indexed by (age, sex, nursing home)
+        """
+        return self.__symptomatic
+
+    def get_mortality_table(self):
+        """
+        Function to retrieve the probabilities to die, e.g., for a compiled kernel.
+
+        :return: (ndarray) probabilities, indexed by (age, sex, nursing home)
+        """
+        return self.__mortality
+
+    def get_duration_parameter(self, parameter: str):
+        """
+        Function to retrieve a parameter of the duration distributions, e.g., 'incubation_lognormal_mean'.
+
+        :param parameter: (str) name of the parameter
+        :return: (float or ndarray) value of the parameter
+        """
+        return self.__durations[parameter]
+
+    @staticmethod
+    def __compile_probability_table(table_location):
+        """
+        Function to read a csv-formatted probability table and expand it into a dense array.
+
+        :param table_location: (str) location of the table
+        :return: (ndarray) probabilities, indexed by (age, sex, nursing home)
+        """
+        table = np.full((ProgressionTable.MAX_AGE + 1, 2, 2), np.nan)
+
+        with open(table_location) as csv_file:
+            for row in csv.DictReader(csv_file):
+                age_to = ProgressionTable.MAX_AGE if row["age_to"] == "NA" else int(row["age_to"])
+                ages = slice(int(row["age_from"]), age_to + 1)
+                sexes = [0, 1] if row["sex"] == "NA" else [1 if row["sex"] != "M" else 0]
+                nursing_homes = [0, 1] if row["NH"] == "NA" else [int(row["NH"])]
+
+                for sex in sexes:
+                    for nursing_home in nursing_homes:
+                        table[ages, sex, nursing_home] = float(row["probability"])
+
+        if np.isnan(table).any():
+            age, sex, nursing_home = np.argwhere(np.isnan(table))[0]
+            raise ValueError(f"Table '{table_location}' does not cover age {age}, sex {'F' if sex else 'M'} and NH {nursing_home}.")
+
+        return table
+
+    @staticmethod
+    def __parse_durations(table_location):
+        """
+        Function to read the csv-formatted duration parameters. Values are either a single number, or a
+        list of numbers separated by ':'.
+
+        :param table_location: (str) location of the table
+        :return: (dict) duration parameters
+        """
+        durations = dict()
+
+        with open(table_location) as csv_file:
+            for row in csv.DictReader(csv_file):
+                value = row["value"]
+                durations[row["parameter"]] = np.array(value.split(":"), dtype=float) if ":" in value else float(value)
+
+        return durations
@@ -1,6 +1,8 @@
 from abc import ABC
 from datetime import datetime
 from disease.disease_state import DiseaseStateEnum
+from disease.progression import ProgressionTable
+from libraries.random_service import RandomService
 from population.individual import Individual
 import numpy as np
 import math
@@ -10,8 +12,10 @@ class DiseaseStateFSMNode(ABC):
     """
     Class to represent a node in the FSM.
     """
-    def __init__(self, state: DiseaseStateEnum):
+    def __init__(self, state: DiseaseStateEnum, progression: ProgressionTable, random: RandomService):
         self.__disease_State = state
+        self._progression = progression
+        self._random = random
 
     def get_disease_state(self) -> DiseaseStateEnum:
         """
@@ -42,13 +46,21 @@ class ExposedDiseaseStateFSMNode(DiseaseStateFSMNode):
     """
     FSM Node to representing the exposed disease state.
     """
+    def __init__(self, state: DiseaseStateEnum, progression: ProgressionTable, random: RandomService):
+        super().__init__(state, progression, random)
+
+        # Cumulative distribution of the pre-symptomatic duration, in days starting from one
+        self.__pre_symptomatic_cdf = np.cumsum(progression.get_duration_parameter("pre_symptomatic_pmf"))
+
     def get_next_state(self, individual: Individual, current_date: datetime) -> (DiseaseStateFSMNode, int):
 
         # Compute duration of the incubation period
-        incubation_duration = max(2, np.random.lognormal(mean=1.43, sigma=0.66, size=None)) # Can we seed numpy randoms?
+        incubation_duration = max(self._progression.get_duration_parameter("incubation_min"),
+                                  self._random.lognormal(mean=self._progression.get_duration_parameter("incubation_lognormal_mean"),
+                                                         sigma=self._progression.get_duration_parameter("incubation_lognormal_sigma")))
 
         # Compute duration of the pre-symptomatic period
-        pre_symptomatic_duration = min(incubation_duration, np.random.choice(np.arange(1, 7), p=[0.45, 0.31, 0.16, 0.06, 0.015, 0.005]))
+        pre_symptomatic_duration = min(incubation_duration, 1 + int(np.searchsorted(self.__pre_symptomatic_cdf, self._random.uniform() * self.__pre_symptomatic_cdf[-1], side="right")))
         # pre_symptomatic_duration = min(incubation_duration, np.random.gamma(shape=20.52, scale=1.59, size=None))
 
         # Commute exposed duration
@@ -58,7 +70,8 @@ class ExposedDiseaseStateFSMNode(DiseaseStateFSMNode):
         individual.pre_symptomatic_duration = math.ceil(pre_symptomatic_duration) # FUTURE: Variables specific to the disease model should be stored elsewhere
 
         # Compute duration of (a)symptomatic period
-        remaining_time_infected = round(max(0, np.random.normal(loc=6, scale=1, size=None) - pre_symptomatic_duration))
+        remaining_time_infected = round(max(0, self._random.normal(loc=self._progression.get_duration_parameter("infectious_normal_mean"),
+                                                                  scale=self._progression.get_duration_parameter("infectious_normal_sd")) - pre_symptomatic_duration))
         individual.remaining_time_infected = remaining_time_infected
 
         return DiseaseStateEnum.STATE_INFECTED, exposed_period
@@ -77,26 +90,9 @@ class InfectedDiseaseStateFSMNode(DiseaseStateFSMNode):
         if individual.remaining_time_infected == 0:
             return DiseaseStateEnum.STATE_RECOVERED, individual.pre_symptomatic_duration
 
-        # By means of an example; we can perform any kind of computation to decide upon this.
-        # SM 13/1/2021: The probability to be symptomatic follows this age distribution:
-        # age-groups=[0-19, 20-29, 30-39, 40-49, 50-59, 60+]
-        # probability= [0.07, 0.17, 0.42, 0.54, 0.83, 0.94]
-        # SM 26/1/2021: For now I have just used an 'If' function but I guess you'll have a more efficient approach
-
-        #becomes_symptomatic = random.choice([True, False])
-
-        if individual.get_age(current_date) < 20:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.07, (1-0.07)])
-        elif 20 <= individual.get_age(current_date) <= 29:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.17, (1-0.17)])
-        elif 30 <= individual.get_age(current_date) <= 39:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.42, (1-0.42)])
-        elif 40 <= individual.get_age(current_date) <= 49:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.54, (1-0.54)])
-        elif 50 <= individual.get_age(current_date) <= 59:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.83, (1-0.83)])
-        else:
-            becomes_symptomatic = np.random.choice([True, False], p=[0.94, (1-0.94)])
+        # SM 13/1/2021: The probability to be symptomatic follows an age distribution, see the symptomatic table.
+        becomes_symptomatic = self._random.uniform() < self._progression.get_symptomatic_probability(
+            individual.get_age(current_date), individual.get_sex(), individual.get_nursing_home())
 
         if becomes_symptomatic:
             return DiseaseStateEnum.STATE_SYMPTOMATIC, individual.pre_symptomatic_duration
@@ -107,132 +103,46 @@ class InfectedDiseaseStateFSMNode(DiseaseStateFSMNode):
         return False
 
 
-class AsymptomaticDiseaseStateFSMNode(DiseaseStateFSMNode):
+class InfectiousDiseaseStateFSMNode(DiseaseStateFSMNode):
     """
-    FSM Node to representing the asymptomatic disease state.
+    FSM Node to representing the infectious disease states that end in either recovery or demise.
     """
     def get_next_state(self, individual: Individual, current_date: datetime) -> (DiseaseStateFSMNode, int):
 
         # Determine number of days, be careful with negative state durations.
-        # FUTURE: Extract logic below into .csv provided matrices - LVI
-        asymptomatic_duration = individual.remaining_time_infected #round(max(0, np.random.normal(loc=6, scale=1, size=None) - individual.pre_symptomatic_duration))
-
-        if individual.get_age(current_date) < 25 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0, 1])
-        if individual.get_age(current_date) < 25 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.000011, (1-0.000011)])
-        if 25 <= individual.get_age(current_date) <= 44 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.00021, (1-0.00021)])
-        if 25 <= individual.get_age(current_date) <= 44 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.00014, (1-0.00014)])
-        if 45 <= individual.get_age(current_date) <= 64 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0029, (1-0.0029)])
-        if 45 <= individual.get_age(current_date) <= 64 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.0014, (1-0.0014)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.017, (1-0.017)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0074, (1-0.0074)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.653, (1-0.653)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.563, (1-0.563)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0367, (1-0.0367)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0173, (1-0.0173)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.467, (1-0.467)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.228, (1-0.228)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0434, (1-0.0434)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0145, (1-0.0145)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.5995, (1-0.5995)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.325, (1-0.325)])
+        infectious_duration = individual.remaining_time_infected
+
+        individual_dies = self._random.uniform() < self._progression.get_mortality_probability(
+            individual.get_age(current_date), individual.get_sex(), individual.get_nursing_home())
 
         if individual_dies:
-            days_until_demise = max(1, round(np.random.lognormal(mean=2.4531093, sigma=0.8371099, size=None)))
+            days_until_demise = max(1, round(self._random.lognormal(mean=self._progression.get_duration_parameter("demise_lognormal_mean"),
+                                                                    sigma=self._progression.get_duration_parameter("demise_lognormal_sigma"))))
 
-            if days_until_demise > asymptomatic_duration:
+            if days_until_demise > infectious_duration:
 
                 # FUTURE: Move hospitalized duration elsewhere.
-                individual.hospitalized_duration = max(1, round(days_until_demise - asymptomatic_duration))
-                return DiseaseStateEnum.STATE_HOSPITALIZED, asymptomatic_duration
+                individual.hospitalized_duration = max(1, round(days_until_demise - infectious_duration))
+                return DiseaseStateEnum.STATE_HOSPITALIZED, infectious_duration
 
             return DiseaseStateEnum.STATE_DIED, days_until_demise
 
-        return DiseaseStateEnum.STATE_RECOVERED, asymptomatic_duration
+        return DiseaseStateEnum.STATE_RECOVERED, infectious_duration
 
     def is_end_state(self) -> bool:
         return False
 
 
-class SymptomaticDiseaseStateFSMNode(DiseaseStateFSMNode):
+class AsymptomaticDiseaseStateFSMNode(InfectiousDiseaseStateFSMNode):
     """
-    FSM Node to representing the symptomatic disease state.
+    FSM Node to representing the asymptomatic disease state.
     """
-    def get_next_state(self, individual: Individual, current_date: datetime) -> (DiseaseStateFSMNode, int):
-
-        # Determine number of days, be careful with negative state durations.
-        symptomatic_duration = individual.remaining_time_infected #round(max(0, np.random.normal(loc=6, scale=1, size=None) - individual.pre_symptomatic_duration))
-
-        # FUTURE: Extract logic below into .csv provided matrices
-        if individual.get_age(current_date) < 25 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0, 1])
-        if individual.get_age(current_date) < 25 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.000011, (1-0.000011)])
-        if 25 <= individual.get_age(current_date) <= 44 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.00021, (1-0.00021)])
-        if 25 <= individual.get_age(current_date) <= 44 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.00014, (1-0.00014)])
-        if 45 <= individual.get_age(current_date) <= 64 and individual.get_sex() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0029, (1-0.0029)])
-        if 45 <= individual.get_age(current_date) <= 64 and individual.get_sex():
-            individual_dies = np.random.choice([True, False], p=[0.0014, (1-0.0014)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.017, (1-0.017)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0074, (1-0.0074)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.653, (1-0.653)])
-        if 65 <= individual.get_age(current_date) <= 74 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.563, (1-0.563)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0367, (1-0.0367)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0173, (1-0.0173)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.467, (1-0.467)])
-        if 75 <= individual.get_age(current_date) <= 84 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.228, (1-0.228)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() is False and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0434, (1-0.0434)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() and individual.get_nursing_home() is False:
-            individual_dies = np.random.choice([True, False], p=[0.0145, (1-0.0145)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() is False and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.5995, (1-0.5995)])
-        if individual.get_age(current_date) >= 85 and individual.get_sex() and individual.get_nursing_home():
-            individual_dies = np.random.choice([True, False], p=[0.325, (1-0.325)])
 
-        if individual_dies:
-            days_until_demise = max(1, round(np.random.lognormal(mean=2.4531093, sigma=0.8371099, size=None)))
-
-            if days_until_demise > symptomatic_duration:
 
-                # FUTURE: Move hospitalized duration elsewhere.
-                individual.hospitalized_duration = max(1, round(days_until_demise - symptomatic_duration))
-                return DiseaseStateEnum.STATE_HOSPITALIZED, symptomatic_duration
-
-            return DiseaseStateEnum.STATE_DIED, days_until_demise
-
-        return DiseaseStateEnum.STATE_RECOVERED, symptomatic_duration
-
-    def is_end_state(self) -> bool:
-        return False
+class SymptomaticDiseaseStateFSMNode(InfectiousDiseaseStateFSMNode):
+    """
+    FSM Node to representing the symptomatic disease state.
+    """
 
 
 class HospitalizedDiseaseStateFSMNode(DiseaseStateFSMNode):
@@ -271,11 +181,12 @@ class DiseaseFSM:
     """
     Class to group the disease states.
     """
-    def __init__(self):
+    def __init__(self, config, random: RandomService):
         self._nodes = {}
+        self._progression = ProgressionTable(config)
+        self._random = random
         self._create_nodes()
 
-        # TODO Seed the generator numpy.random.seed - LVI
         # TODO Disease deque should be managed at _this_ level - LVI
 
     def _create_nodes(self):
@@ -284,13 +195,19 @@ class DiseaseFSM:
         """
 
         # FUTURE: The following nodes can be generated according to a configuration.
-        self._nodes[DiseaseStateEnum.STATE_EXPOSED] = ExposedDiseaseStateFSMNode(DiseaseStateEnum.STATE_EXPOSED)
-        self._nodes[DiseaseStateEnum.STATE_INFECTED] = InfectedDiseaseStateFSMNode(DiseaseStateEnum.STATE_INFECTED)
-        self._nodes[DiseaseStateEnum.STATE_ASYMPTOMATIC] = AsymptomaticDiseaseStateFSMNode(DiseaseStateEnum.STATE_ASYMPTOMATIC)
-        self._nodes[DiseaseStateEnum.STATE_SYMPTOMATIC] = SymptomaticDiseaseStateFSMNode(DiseaseStateEnum.STATE_SYMPTOMATIC)
-        self._nodes[DiseaseStateEnum.STATE_HOSPITALIZED] = HospitalizedDiseaseStateFSMNode(DiseaseStateEnum.STATE_HOSPITALIZED)
-        self._nodes[DiseaseStateEnum.STATE_RECOVERED] = RecoveredDiseaseStateFSMNode(DiseaseStateEnum.STATE_RECOVERED)
-        self._nodes[DiseaseStateEnum.STATE_DIED] = DiedDiseaseStateFSMNode(DiseaseStateEnum.STATE_DIED)
+        self._nodes[DiseaseStateEnum.STATE_EXPOSED] = ExposedDiseaseStateFSMNode(DiseaseStateEnum.STATE_EXPOSED, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_INFECTED] = InfectedDiseaseStateFSMNode(DiseaseStateEnum.STATE_INFECTED, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_ASYMPTOMATIC] = AsymptomaticDiseaseStateFSMNode(DiseaseStateEnum.STATE_ASYMPTOMATIC, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_SYMPTOMATIC] = SymptomaticDiseaseStateFSMNode(DiseaseStateEnum.STATE_SYMPTOMATIC, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_HOSPITALIZED] = HospitalizedDiseaseStateFSMNode(DiseaseStateEnum.STATE_HOSPITALIZED, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_RECOVERED] = RecoveredDiseaseStateFSMNode(DiseaseStateEnum.STATE_RECOVERED, self._progression, self._random)
+        self._nodes[DiseaseStateEnum.STATE_DIED] = DiedDiseaseStateFSMNode(DiseaseStateEnum.STATE_DIED, self._progression, self._random)
+
+    def get_progression(self) -> ProgressionTable:
+        """
+        Function to retrieve the parameters of the disease progression.
+        """
+        return self._progression
 
     def get_start_node(self) -> DiseaseStateFSMNode:
         """
@@ -1,11 +1,16 @@
 import csv
-import random
 import math
+import numpy as np
 
+from collections import defaultdict
 from datetime import datetime
+from libraries.lru_cache import LRUCache
+from libraries.random_service import RandomService
 from population.household import HouseHold
 from population.individual import Individual
+from population.network import ContactNetwork
 from population.summary import PopulationSummary
+from disease import kernels
 from disease.disease_state import DiseaseStateEnum
 
 
@@ -18,8 +23,8 @@ class Transmission:
     """
     Class that represents the transmission model.
     """
-    def __init__(self, config, global_config):
-        random.seed(global_config["seed"])
+    def __init__(self, config, global_config, random: RandomService):
+        self.__random = random
         self.__num_pop_ag = global_config.get("num_age_groups_pop")
         self.__num_hh_ag = global_config.get("num_age_groups_hh")
 
@@ -44,9 +49,29 @@ class Transmission:
         self.__delta = config.get("delta")
         self.__delta_nursing_home = config.get("delta_nursing_home")
 
-        self.__pop_contact = self.__parse_simple_contact_matrix(config.get("pop_matrix", None))
-        self.__hh_contact = self.__parse_nested_contact_matrix(config.get("hh_matrix", None))
-        self.__hh_contact_children = self.__parse_nested_contact_matrix(config.get("hh_matrix_children", None))
+        # Contact matrices are flattened into arrays at load time, household matrices are indexed by
+        # (has children, age group, age group of contact, sex, sex of contact)
+        self.__pop_contact = np.array(self.__parse_simple_contact_matrix(config.get("pop_matrix", None)))
+        self.__hh_contact = np.array(self.__parse_nested_contact_matrix(config.get("hh_matrix", None)))
+        self.__hh_contact_children = np.array(self.__parse_nested_contact_matrix(config.get("hh_matrix_children", None)))
+        self.__hh_contact_matrices = np.stack([self.__hh_contact, self.__hh_contact_children])
+        self.__hh_contact_flat = self.__hh_contact_matrices.ravel()
+
+        # Household escape probabilities only depend on the composition of the household, hence they are memoized
+        self.__hh_escape_cache = LRUCache(config.get("hh_escape_cache_size", 100000))
+
+        self.__rng = random.get_generator()
+
+        # Per-day probability of escaping infection by the population, indexed by population age group - 1
+        self.__pop_escape_table = np.ones(self.__pop_contact.shape[0])
+
+        # Contact network of the households (see set_network), None if household contacts are given by the contact
+        # matrices. Each edge to an infectious neighbour is a single contact, indexed by disease state code.
+        self.__network = None
+        self.__network_escape = np.ones(0)
+        self.__network_log_escape = np.zeros(max(state.value for state in DiseaseStateEnum) + 1)
+        for state, beta in self.__beta_household.items():
+            self.__network_log_escape[state.value] = np.log1p(-beta)
 
         #print("\nHousehold with children: \n")
         self.__print_nested_matrix(self.__hh_contact_children, self.__num_hh_ag)
@@ -54,18 +79,45 @@ class Transmission:
         #print("\nHousehold without children: \n")
         self.__print_nested_matrix(self.__hh_contact, self.__num_hh_ag)
 
+    def set_population_summary(self, summary: PopulationSummary):
+        """
+        Function to supply the snapshot of the population for the current day. The probability of escaping
+        infection by the population only depends on the age group of an individual, hence it is computed
+        once per day for each of the age groups.
+
+        :param summary: (PopulationSummary) summary of the population
+        """
+        self.__pop_escape_table = self.__compute_pop_infection_escape_table(summary)
+        if self.__network is not None:
+            self.__network_escape = self.__network.get_escape_probabilities(self.__network_log_escape)
+
+    def set_network(self, network: ContactNetwork):
+        """
+        Function to supply the contact network of the households. Household escape probabilities are then computed
+        over the infectious neighbours of an individual, rather than by means of the contact matrices.
+
+        :param network: (ContactNetwork) contact network
+        """
+        self.__network = network
+
     def occurs(self, individual: Individual, household: HouseHold, summary: PopulationSummary, date: datetime):
         """
         Function that determines whether infection occurs for the specific individual.
 
         :param individual: (individual) individual to consider
-        :param household: (household) household to which the individual belongs
+        :param household: (household) household to which the individual belongs, None if it has no infectious members
         :param summary: (PopulationSummary) summary of the population
         :return: (boolean) whether disease transmission occurs for the given individual
         """
-        p = random.uniform(0, 1)
-        hh_trans = self.__compute_hh_infection_escape_prob(individual, household)
-        pop_trans = self.__compute_pop_infection_escape_prob(individual, summary)
+        p = self.__random.uniform()
+        if household is None:
+            hh_trans = 1
+        elif self.__network is not None:
+            hh_trans = float(self.__network_escape[individual.get_slot()])
+        else:
+            hh_trans = self.__compute_hh_infection_escape_prob(individual, household)
+
+        pop_trans = float(self.__pop_escape_table[individual.get_population_age_group()-1])
 
         # TODO Make this following more flexible by allowing it to be injected via the config
         susceptibility_adjustment = 0.5 if individual.is_child(date, summary._population.get_age_child_limit()) else 1
@@ -73,35 +125,259 @@ class Transmission:
         p_inf = susceptibility_adjustment * (1 - hh_trans * pop_trans)
         return p < p_inf, hh_trans, pop_trans
 
+    def occurs_vectorized(self, store, slots, summary: PopulationSummary, date: datetime, age_child_limit):
+        """
+        Function that determines whether infection occurs for a batch of individuals, vectorized
+        counterpart of 'occurs'.
+
+        :param store: (PopulationStore) store that backs the population
+        :param slots: (ndarray) slots of the (susceptible) individuals to consider
+        :param summary: (PopulationSummary) summary of the population
+        :param date: (datetime) current date according to the simulation
+        :param age_child_limit: (number) age till which an individual is considered to be a child
+        :return: (tuple) mask of individuals that get infected, household and population escape probabilities
+        """
+        hh_trans = self.__compute_hh_infection_escape_prob_vectorized(store, slots, date, age_child_limit)
+        pop_trans = self.__pop_escape_table[store.pop_age_group[slots] - 1]
+
+        # TODO Make this following more flexible by allowing it to be injected via the config
+        susceptibility_adjustment = np.where(store.age[slots] < age_child_limit, 0.5, 1)
+
+        p_inf = susceptibility_adjustment * (1 - hh_trans * pop_trans)
+        p = self.__rng.uniform(0, 1, size=len(slots))
+        return p < p_inf, hh_trans, pop_trans
+
+    def occurs_community(self, store, date: datetime, age_child_limit):
+        """
+        Function that determines which individuals in households without infectious members get infected. For
+        those individuals, the probability of infection only depends on their stratum. Hence, rather than drawing
+        for each individual, the number of infections is drawn from a binomial per stratum, after which the infected
+        individuals are chosen uniformly from the stratum. The cost thus scales with the number of infections.
+
+        Note that a stratum also contains susceptible individuals of households with infectious members, draws that
+        land on such individuals are discarded (these are covered by 'occurs'). The susceptibility adjustment of
+        children is applied by thinning the draws.
+
+        :param store: (PopulationStore) store that backs the population
+        :param date: (datetime) current date according to the simulation
+        :param age_child_limit: (number) age till which an individual is considered to be a child
+        :return: (list) of (slot, household escape probability, population escape probability) for infected individuals
+        """
+        infected = []
+
+        for (age_group, _), index in store.susceptible_strata.items():
+            pop_trans = float(self.__pop_escape_table[age_group-1])
+            num_infected = self.__rng.binomial(len(index), 1 - pop_trans)
+
+            for slot in index.sample(num_infected, self.__rng):
+                household = store.household[slot]
+                if household < 0 or int(household) in store.infectious_households:
+                    continue
+
+                # TODO Make this following more flexible by allowing it to be injected via the config
+                susceptibility_adjustment = 0.5 if store.age[slot] < age_child_limit else 1
+                if susceptibility_adjustment < 1 and self.__rng.uniform(0, 1) >= susceptibility_adjustment:
+                    continue
+
+                infected.append((slot, 1, pop_trans))
+
+        return infected
+
+    def __compute_hh_infection_escape_prob_vectorized(self, store, slots, date: datetime, age_child_limit):
+        """
+        Function to compute the probability of escaping from infection within the household, for
+        a batch of individuals. Only households that contain infectious members are evaluated.
+
+        :param store: (PopulationStore) store that backs the population
+        :param slots: (ndarray) slots of the individuals to compute household contacts for
+        :return: (ndarray) probability of escaping household disease transmission
+        """
+        escape_prob = np.ones(len(slots))
+        if not store.infectious_households:
+            return escape_prob
+
+        if self.__network is not None:
+            return self.__network_escape[slots]
+
+        states = [DiseaseStateEnum.STATE_INFECTED, DiseaseStateEnum.STATE_ASYMPTOMATIC, DiseaseStateEnum.STATE_SYMPTOMATIC]
+        num_hh_ag = self.__hh_contact_matrices.shape[1]
+
+        # Locate the infectious individuals and the households they belong to
+        active = store.active_slots()
+        active = active[store.household[active] >= 0]
+        state_index = np.full(max(state.value for state in DiseaseStateEnum) + 1, -1)
+        for idx, state in enumerate(states):
+            state_index[state.value] = idx
+
+        infectious = active[state_index[store.state[active]] >= 0]
+        if len(infectious) == 0:
+            return escape_prob
+
+        households, inf_household = np.unique(store.household[infectious], return_inverse=True)
+
+        # Number of infectious members per household, by household age group, sex and disease state
+        counts = np.zeros((len(households), num_hh_ag, 2, len(states)))
+        np.add.at(counts, (
+            inf_household,
+            (store.hh_age_group[infectious] - 1) % num_hh_ag,
+            1 - store.sex[infectious],
+            state_index[store.state[infectious]],
+        ), 1)
+
+        # Households with children use a separate contact matrix
+        members = active[np.isin(store.household[active], households)]
+        children = members[store.age[members] < age_child_limit]
+        has_children = np.zeros(len(households), dtype=np.int64)
+        has_children[np.searchsorted(households, store.household[children])] = 1
+
+        # Restrict to the individuals residing in an infectious household
+        position = np.minimum(np.searchsorted(households, store.household[slots]), len(households) - 1)
+        selected = np.flatnonzero(households[position] == store.household[slots])
+        targets = slots[selected]
+        rows = position[selected]
+
+        contact_matrix = self.__hh_contact_matrices[
+            has_children[rows],
+            (store.hh_age_group[targets] - 1) % num_hh_ag,
+            :,
+            1 - store.sex[targets],
+            :
+        ]
+        contacts = np.einsum("nax,naxs->ns", contact_matrix, counts[rows])
+
+        delta_contacts = np.where(store.nursing_home[targets], self.__delta_nursing_home, self.__delta)
+        contacts = self.__cap_contacts_vectorized(contacts, delta_contacts)
+
+        escape_prob[selected] = np.prod([(1 - self.__beta_household[state]) ** contacts[:, idx] for idx, state in enumerate(states)], axis=0)
+        return escape_prob
+
+    def __compute_pop_infection_escape_table(self, summary: PopulationSummary):
+        """
+        Function to compute the probability of escaping from infection by population external to the household,
+        for each of the population age groups. The computation is carried out in log space, such that it reduces
+        to a single matrix-vector product over the (disease state, age group) counts of the population.
+
+        :param summary: (PopulationSummary) summary of the population
+        :return: (ndarray) probability of escaping external disease transmission, indexed by age group - 1
+        """
+        num_age_groups = self.__pop_contact.shape[0]
+        age_groups = range(1, num_age_groups + 1)
+        adjustment = np.array([summary.get_adjustment(age_group) for age_group in age_groups])
+
+        log_escape_matrix = []
+        num_infectious = []
+        for disease_state in [DiseaseStateEnum.STATE_INFECTED, DiseaseStateEnum.STATE_ASYMPTOMATIC, DiseaseStateEnum.STATE_SYMPTOMATIC]:
+            log_escape_matrix.append(np.log1p(-self.__pop_contact * self.__beta_pop[disease_state] * adjustment))
+            num_infectious.extend(summary.get_num_for_disease_state_per_ag(disease_state, age_group) for age_group in age_groups)
+
+        return np.exp(np.hstack(log_escape_matrix) @ np.array(num_infectious, dtype=float))
+
+    @staticmethod
+    def __cap_contacts_vectorized(contacts, delta_contacts):
+        """
+        Function to cap the number of contacts (infected, asymptomatic, symptomatic) to the given maximum. Mirrors
+        the loop in '__compute_hh_infection_escape_prob_for_composition', which removes a symptomatic, asymptomatic and infected
+        contact in turn until the total drops below the maximum.
+
+        :param contacts: (ndarray) contacts per individual, columns ordered infected, asymptomatic, symptomatic
+        :param delta_contacts: (ndarray) maximum number of contacts per individual
+        :return: (ndarray) capped contacts
+        """
+        total = contacts.sum(axis=1)
+        num_iterations = np.maximum(0, np.ceil((total - delta_contacts) / 3))
+
+        # Total at the start of the final iteration of the loop
+        last_total = total - 3 * np.maximum(num_iterations - 1, 0)
+        reduction = np.stack([
+            num_iterations - 1 + (last_total - 2 > delta_contacts),
+            num_iterations - 1 + (last_total - 1 > delta_contacts),
+            num_iterations,
+        ], axis=1)
+        reduction[num_iterations == 0] = 0
+
+        return contacts - reduction
+
+    def get_kernel_parameters(self) -> dict:
+        """
+        Function to retrieve the parameters of the transmission model for the compiled kernels (see
+        disease/kernels.py), i.e., the flattened household contact matrices, the maximum number of contacts,
+        the probability to escape a single household contact by disease state, the population escape table and
+        the household escape probabilities of the contact network (empty without a network).
+
+        :return: (dict) parameters, by name of the kernel argument
+        """
+        return {
+            "hh_contact": self.__hh_contact_flat,
+            "num_hh_ag": self.__hh_contact_matrices.shape[1],
+            "delta": float(self.__delta),
+            "delta_nursing_home": float(self.__delta_nursing_home),
+            "escape_bases": np.array([1 - self.__beta_household[state] for state in kernels.INFECTIOUS_STATES]),
+            "pop_escape": self.__pop_escape_table,
+            "network_escape": self.__network_escape if self.__network is not None else np.ones(0),
+        }
+
+    def get_hh_escape_cache(self) -> LRUCache:
+        """
+        Function to retrieve the cache of household escape probabilities, e.g., to report its hit rate.
+
+        :return: (LRUCache) household escape probability cache
+        """
+        return self.__hh_escape_cache
+
     def __compute_hh_infection_escape_prob(self, individual: Individual, household: HouseHold):
         """
-        Function to compute the probability of escaping from infection within the household.
+        Function to compute the probability of escaping from infection within the household. The probability
+        is memoized, as many households (and all members of a nursing home) share the same composition.
 
         :param individual: (individual) individual to compute household contacts for
         :param household: (household) household of the individual
         :return: (float) probability of escaping household disease transmission
         """
-        inf_contacts = 0
-        asymp_contacts = 0
-        symp_contacts = 0
         #contact_matrix = self.__hh_contact_children if (household.has_children() and (individual.get_nursing_home() is False)) else self.__hh_contact
         # Use the function below, otherwise are children in collective/nursing homes without any household contacts
-        contact_matrix = self.__hh_contact_children if (household.has_children()) else self.__hh_contact
+        key = (
+            household.get_infectious_composition(),
+            household.has_children(),
+            individual.get_nursing_home(),
+            individual.get_household_age_group(),
+            individual.get_sex(),
+        )
+
+        escape_prob = self.__hh_escape_cache.get(key)
+        if escape_prob is None:
+            escape_prob = self.__compute_hh_infection_escape_prob_for_composition(*key)
+            self.__hh_escape_cache.put(key, escape_prob)
+
+        return escape_prob
+
+    def __compute_hh_infection_escape_prob_for_composition(self, composition, has_children, nursing_home, hh_age_group, sex):
+        """
+        Function to compute the probability of escaping from infection within a household of the given composition.
+
+        :param composition: (tuple) infectious members of the household, see HouseHold.get_infectious_composition
+        :param has_children: (bool) whether the household has children
+        :param nursing_home: (bool) whether the individual resides in a nursing home
+        :param hh_age_group: (number) household age group of the individual
+        :param sex: (bool) sex of the individual
+        :return: (float) probability of escaping household disease transmission
+        """
+        _, num_hh_ag, _, _, _ = self.__hh_contact_matrices.shape
+        contacts = defaultdict(float)
 
-        if individual.get_nursing_home():
+        if nursing_home:
             delta_contacts = self.__delta_nursing_home
         else:
             delta_contacts = self.__delta
 
-        # TODO This may need some improvement code-wise.
-        for (age_group, sex, num) in household.get_num_for_disease_state_gen(DiseaseStateEnum.STATE_INFECTED):
-            inf_contacts += num * contact_matrix[individual.get_household_age_group()-1][age_group-1][individual.get_sex()-1][sex-1]
+        # Offset of the (has children, age group, -, sex, -) block in the flattened contact matrices
+        offset = (int(has_children) * num_hh_ag + (hh_age_group - 1) % num_hh_ag) * num_hh_ag * 4 + (0 if sex else 1) * 2
 
-        for (age_group, sex, num) in household.get_num_for_disease_state_gen(DiseaseStateEnum.STATE_ASYMPTOMATIC):
-            asymp_contacts += num * contact_matrix[individual.get_household_age_group()-1][age_group-1][individual.get_sex()-1][sex-1]
+        for (state_code, age_group, contact_sex, num) in composition:
+            contacts[state_code] += num * self.__hh_contact_flat[offset + ((age_group - 1) % num_hh_ag) * 4 + (0 if contact_sex else 1)]
 
-        for (age_group, sex, num) in household.get_num_for_disease_state_gen(DiseaseStateEnum.STATE_SYMPTOMATIC):
-            symp_contacts += num * contact_matrix[individual.get_household_age_group()-1][age_group-1][individual.get_sex()-1][sex-1]
+        inf_contacts = contacts[DiseaseStateEnum.STATE_INFECTED.value]
+        asymp_contacts = contacts[DiseaseStateEnum.STATE_ASYMPTOMATIC.value]
+        symp_contacts = contacts[DiseaseStateEnum.STATE_SYMPTOMATIC.value]
 
         while ((symp_contacts+asymp_contacts+inf_contacts)>delta_contacts):
             symp_contacts -= 1
@@ -110,31 +386,7 @@ class Transmission:
                 if (symp_contacts + asymp_contacts + inf_contacts) > delta_contacts:
                     inf_contacts -= 1
 
-        return (1 - self.__beta_household[DiseaseStateEnum.STATE_INFECTED]) ** inf_contacts * (1 - self.__beta_household[DiseaseStateEnum.STATE_ASYMPTOMATIC]) ** asymp_contacts * (1 - self.__beta_household[DiseaseStateEnum.STATE_SYMPTOMATIC]) ** symp_contacts
-
-    def __compute_pop_infection_escape_prob(self, individual: Individual, summary: PopulationSummary):
-        """
-        Function to escape the probability of escaping from infection by population external to the household.
-
-        :param individual: (individual) to compute external contacts for
-        :return: (float) probability of escaping external disease transmission
-        """
-        escape_prob = 1
-
-        # TODO This may need some improvement code-wise.
-        for (age_group, num) in summary.num_for_disease_state_gen(DiseaseStateEnum.STATE_INFECTED):
-            beta_pop = self.__pop_contact[individual.get_population_age_group()-1][age_group-1] * self.__beta_pop[DiseaseStateEnum.STATE_INFECTED]
-            escape_prob *= (1 - beta_pop * summary.get_adjustment(age_group)) ** num
-
-        for (age_group, num) in summary.num_for_disease_state_gen(DiseaseStateEnum.STATE_ASYMPTOMATIC):
-            beta_pop = self.__pop_contact[individual.get_population_age_group()-1][age_group-1] * self.__beta_pop[DiseaseStateEnum.STATE_ASYMPTOMATIC]
-            escape_prob *= (1 - beta_pop * summary.get_adjustment(age_group)) ** num
-
-        for (age_group, num) in summary.num_for_disease_state_gen(DiseaseStateEnum.STATE_SYMPTOMATIC):
-            beta_pop = self.__pop_contact[individual.get_population_age_group()-1][age_group-1] * self.__beta_pop[DiseaseStateEnum.STATE_SYMPTOMATIC]
-            escape_prob *= (1 - beta_pop * summary.get_adjustment(age_group)) ** num
-
-        return escape_prob
+        return float((1 - self.__beta_household[DiseaseStateEnum.STATE_INFECTED]) ** inf_contacts * (1 - self.__beta_household[DiseaseStateEnum.STATE_ASYMPTOMATIC]) ** asymp_contacts * (1 - self.__beta_household[DiseaseStateEnum.STATE_SYMPTOMATIC]) ** symp_contacts)
 
     @staticmethod
     def __parse_simple_contact_matrix(matrix_location):
@@ -0,0 +1,164 @@
+import argparse
+import copy
+import gc
+import multiprocessing
+import os
+import sys
+import time
+
+from libraries.args_handler import get_config
+from simulation import Simulation
+
+# Output locations that are made seed-specific, as paths into the configuration
+OUTPUT_PATHS = [
+    ("simulation", "reporter", "sinks", "file", "output_file_name"),
+    ("simulation", "disease", "logger", "tans_log_file_name"),
+    ("simulation", "disease", "logger", "sim_log_file_name"),
+    ("simulation", "disease", "logger", "disease_log_file_name"),
+    ("simulation", "checkpoint_file"),
+    ("simulation", "profiler", "trace_file"),
+    ("simulation", "profiler", "cprofile_file"),
+]
+
+# Simulation that is loaded by the parent process, the forked workers inherit it copy-on-write
+_simulation = None
+
+
+def main():
+    """
+    Entry point to run an ensemble of seeds for a single scenario. The inputs are loaded once, after which
+    a worker is forked for each of the seeds. Outputs of a seed are written to a 'seed-<seed>' directory next
+    to the configured output locations.
+    """
+    global _simulation
+
+    args = process_args_as_dict()
+    config = get_config(args.get("conf"))
+    seeds = args.get("seeds")
+
+    # The loading simulation only reports to the console, workers create their own outputs
+    _simulation = Simulation(*split_config(apply_overrides(config, {
+        ("simulation", "reporter", "sink"): "console",
+        ("simulation", "disease", "logger", "enabled"): False,
+    })))
+
+    # Output of the loading simulation is written before forking, such that workers do not inherit it
+    _simulation.reporter.flush()
+    sys.stdout.flush()
+
+    # Avoid that the garbage collector of the workers touches (and hence copies) the inherited objects
+    gc.freeze()
+
+    tasks = [split_config(apply_overrides(config, seed_overrides(config, seed))) for seed in seeds]
+    context = multiprocessing.get_context("fork")
+
+    # Workers run a single seed each, such that every seed starts from the loaded simulation
+    with context.Pool(min(args.get("workers"), len(seeds)), maxtasksperchild=1) as pool:
+        for seed, elapsed in pool.imap_unordered(_run_seed, tasks):
+            print(f"[ENSEMBLE] Seed {seed} finished in {elapsed:.1f}s.")
+
+
+def _run_seed(task):
+    simulation_config, global_config = task
+    start = time.time()
+    _simulation.prepare_run(simulation_config, global_config)
+    _simulation.run()
+    sys.stdout.flush()
+    return global_config["seed"], time.time() - start
+
+
+def seed_overrides(config, seed) -> dict:
+    """
+    Function to compose the configuration overrides of a single seed, i.e., the seed and its output locations.
+
+    :param config: (dict) configuration of the scenario
+    :param seed: (number) seed of the run
+    :return: (dict) overrides, configuration path to value
+    """
+    overrides = {("global", "seed"): seed}
+    for path in OUTPUT_PATHS:
+        file_name = config
+        for key in path:
+            file_name = file_name.get(key, {}) if isinstance(file_name, dict) else None
+
+        if file_name:
+            overrides[path] = seed_output_path(file_name, seed)
+
+    return overrides
+
+
+def seed_output_path(file_name, seed) -> str:
+    """
+    Function to derive the output location of a seed, e.g., './output/log.csv' becomes
+    './output/seed-4/log_seed-4.csv'.
+
+    :param file_name: (str) configured output location
+    :param seed: (number) seed of the run
+    :return: (str) output location of the seed
+    """
+    return tagged_output_path(file_name, f"seed-{seed}")
+
+
+def tagged_output_path(file_name, tag) -> str:
+    """
+    Function to derive the output location of a part of a run, e.g., of a seed or shard. The output is written to
+    a directory named after the tag, next to the configured output location.
+
+    :param file_name: (str) configured output location
+    :param tag: (str) tag of the part, e.g., 'seed-4'
+    :return: (str) output location of the part
+    """
+    directory, base_name = os.path.split(file_name)
+    stem, extension = os.path.splitext(base_name)
+    return os.path.join(directory, tag, f"{stem}_{tag}{extension}")
+
+
+def apply_overrides(config, overrides) -> dict:
+    """
+    Function to apply overrides to a copy of the configuration.
+
+    :param config: (dict) configuration
+    :param overrides: (dict) overrides, configuration path to value
+    :return: (dict) configuration with the overrides applied
+    """
+    config = copy.deepcopy(config)
+    for path, value in overrides.items():
+        target = config
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+
+        target[path[-1]] = value
+
+    return config
+
+
+def split_config(config):
+    return config.get("simulation"), config.get("global")
+
+
+def process_args_as_dict():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--conf", "--config",
+        help="Location of the config file of the scenario",
+        required=True)
+
+    parser.add_argument(
+        "--seeds",
+        help="Seeds to run",
+        type=int,
+        nargs="+",
+        required=True)
+
+    parser.add_argument(
+        "--workers",
+        help="Number of worker processes, defaults to the number of cores",
+        type=int,
+        default=os.cpu_count())
+
+    return vars(parser.parse_args())  # Convert args to dict
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import numpy as np
+
+from datetime import datetime
+from events.table import NA, BinaryTable
+
+# Event types, the position of a type is its code
+EVENT_TYPES = ["birth", "immigration", "death", "emigration", "hh_transition", "age_group_transition"]
+
+# Columns that are required per event type, i.e., that can not be missing ('NA')
+REQUIRED_COLUMNS = {
+    "birth": ["HH_ID", "birth_date", "age_group_pop", "age_group_hh", "NH"],
+    "immigration": ["HH_ID", "birth_date", "age_group_pop", "age_group_hh", "NH"],
+    "death": [],
+    "emigration": [],
+    "hh_transition": [],
+    "age_group_transition": ["age_group_pop", "age_group_hh"],
+}
+
+# Columns of the compiled log, i.e., column name and type
+COLUMNS = [
+    ("ID", "int"),
+    ("HH_ID", "int"),
+    ("HH_ID_target", "int"),
+    ("sex", "str"),
+    ("birth_date", "date"),
+    ("age_group_pop", "int"),
+    ("age_group_hh", "int"),
+    ("hh_position", "str"),
+    ("hh_position_target", "str"),
+    ("NH", "int"),
+]
+
+
+class CompiledEventLog:
+    """
+    Event log compiled into typed columns, ordered by day (stable, i.e., events of the same day retain their
+    order). A day index holds the range of the events of each day. Invalid events, e.g., of an unknown type or
+    with missing values, are discarded at compile time.
+    """
+    def __init__(self, table: BinaryTable, first_row=0):
+        self.__errors = []
+        self.__first_row = first_row
+        type_codes = self.__compile_event_types(table)
+        days = table.get_column("event_date")
+
+        # Validate events
+        valid = type_codes != NA
+        self.__discard(~valid, "unknown event type")
+        self.__discard(valid & (days == NA), "missing event date")
+        self.__discard(valid & (table.get_column("ID") == NA), "missing ID")
+        valid &= (days != NA) & (table.get_column("ID") != NA)
+
+        for type_code, event_type in enumerate(EVENT_TYPES):
+            for name in REQUIRED_COLUMNS[event_type]:
+                missing = valid & (type_codes == type_code) & (table.get_column(name) == NA)
+                self.__discard(missing, f"missing {name} in {event_type} event")
+                valid &= ~missing
+
+        # Order events by day
+        rows = np.flatnonzero(valid)
+        rows = rows[np.argsort(days[rows], kind="stable")]
+        self.__days = days[rows].astype(np.int32)
+        self.__types = type_codes[rows].astype(np.int8)
+        self.__columns = {name: table.get_column(name)[rows] for name, _ in COLUMNS}
+        self.__categories = {name: table.get_column(f"{name}__categories").tolist()
+                             for name, column_type in COLUMNS if column_type == "str"}
+
+        # Day index, events of day 'first_day + i' are in the range [day_starts[i], day_starts[i + 1])
+        self.__first_day = int(self.__days[0]) if len(rows) > 0 else 0
+        num_days = int(self.__days[-1]) - self.__first_day + 1 if len(rows) > 0 else 0
+        self.__day_starts = np.searchsorted(self.__days, np.arange(self.__first_day, self.__first_day + num_days + 1))
+
+    def __len__(self):
+        return len(self.__days)
+
+    def get_errors(self) -> list:
+        """
+        Function to retrieve the errors encountered while compiling the log, i.e., one message per type of error.
+
+        :return: (list) error messages
+        """
+        return self.__errors
+
+    def get_first_day(self) -> int:
+        """
+        Function to retrieve the first day of the log.
+
+        :return: (number) first day, as ordinal
+        """
+        return self.__first_day
+
+    def get_last_day(self) -> int:
+        """
+        Function to retrieve the last day of the log.
+
+        :return: (number) last day, as ordinal
+        """
+        return self.__first_day + len(self.__day_starts) - 2
+
+    def get_day(self, day: int):
+        """
+        Function to retrieve the range of the events of the given day.
+
+        :param day: (number) day, as ordinal
+        :return: (tuple) start and end (exclusive) of the events
+        """
+        if day < self.__first_day or day > self.get_last_day():
+            return 0, 0
+
+        return int(self.__day_starts[day - self.__first_day]), int(self.__day_starts[day - self.__first_day + 1])
+
+    def get_events(self, start: int, end: int, event_types: list) -> dict:
+        """
+        Function to decode the events of the given types within a range of events.
+
+        :param start: (number) start of the range
+        :param end: (number) end of the range (exclusive)
+        :param event_types: (list) event types to retrieve
+        :return: (dict) column name to list of values, missing values are None, empty if there are no such events
+        """
+        type_codes = [EVENT_TYPES.index(event_type) for event_type in event_types]
+        rows = np.flatnonzero(np.isin(self.__types[start:end], type_codes)) + start
+        if len(rows) == 0:
+            return dict()
+
+        events = {"event_type": [EVENT_TYPES[code] for code in self.__types[rows].tolist()]}
+        for name, column_type in COLUMNS:
+            values = self.__columns[name][rows].tolist()
+            if column_type == "int":
+                events[name] = [None if value == NA else value for value in values]
+            elif column_type == "date":
+                events[name] = [None if value == NA else datetime.fromordinal(value) for value in values]
+            else:
+                categories = self.__categories[name]
+                events[name] = [None if value == NA else categories[value] for value in values]
+
+        return events
+
+    def __compile_event_types(self, table: BinaryTable):
+        categories = table.get_column("event_type__categories").tolist()
+        category_codes = np.array([EVENT_TYPES.index(category) if category in EVENT_TYPES else NA
+                                   for category in categories] + [NA], dtype=np.int64)
+
+        # Missing event types (NA) map onto the last element
+        return category_codes[table.get_column("event_type")]
+
+    def __discard(self, mask, reason):
+        rows = np.flatnonzero(mask)
+        if len(rows) > 0:
+            # Rows are reported 1-based, excluding the header
+            examples = ", ".join(str(self.__first_row + row + 1) for row in rows[:5])
+            self.__errors.append(f"Discarded {len(rows)} events of the event log due to {reason}, e.g., row(s) {examples}.")
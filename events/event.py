@@ -4,75 +4,101 @@ from population.population import Population
 
 class EventHandler:
     """
-    Abstract class responsible for spawning events handlers.
+    Abstract class responsible for applying a batch of events, i.e., the events of a single day
+    that are handled by the same handler. The events are applied in their original order.
     """
-    def __init__(self, population: Population, event, date_format):
-        self._population = population
-        self._event = event
-        self._date_format = date_format
-
-    @staticmethod
-    def construct(population, event, date_format):
-        type = event["event_type"]
+    EVENT_TYPES = []
 
-        if type == 'birth' or type == 'immigration':
-            return AddToPopEventHandler(population, event, date_format)
-
-        elif type == 'death' or type == 'emigration':
-            return RemoveFromPopEventHandler(population, event, date_format)
+    def __init__(self, population: Population, events: dict):
+        self._population = population
+        self._events = events
 
-        elif type == 'hh_transition':
-            return HHTransitionEventHandler(population, event, date_format)
+    def process(self) -> list:
+        """
+        Function to apply the batch of events to the population.
 
-        elif type == 'age_group_transition':
-            return AGTransitionEventHandler(population, event, date_format)
+        :return: (list) errors, i.e., (position in the batch, error message) tuples
+        """
+        errors = []
+        for position in range(len(self._events["ID"])):
+            error = self._process_event(position)
+            if error is not None:
+                errors.append((position, error))
 
-        raise ValueError("Invalid events type!", type)
+        return errors
 
-    def process(self):
+    def _process_event(self, position: int):
         ...
 
+    def _get_individual(self, position: int) -> Individual:
+        return self._population.get_or_none(self._events["ID"][position])
+
 
 class AddToPopEventHandler(EventHandler):
     """
-    Handler responsible for adding an individual to the population.
+    Handler responsible for adding individuals to the population.
     """
-    def process(self):
-        individual = Individual.create(self._event, self._date_format)
-        self._population.add(individual, int(self._event["HH_ID"]))
+    EVENT_TYPES = ["birth", "immigration"]
+    ALREADY_IN_POPULATION = "Individual already in population"
+
+    def _process_event(self, position: int):
+        if self._get_individual(position) is not None:
+            return self.ALREADY_IN_POPULATION
+
+        individual = Individual.create({name: values[position] for name, values in self._events.items()})
+        self._population.add(individual, self._events["HH_ID"][position])
 
 
 class RemoveFromPopEventHandler(EventHandler):
     """
-    Handler responsible for removing an individual to the population.
+    Handler responsible for removing individuals from the population.
     """
-    def process(self):
-        individual = self._population.get(int(self._event["ID"]))
+    EVENT_TYPES = ["death", "emigration"]
+
+    def _process_event(self, position: int):
+        individual = self._get_individual(position)
+        if individual is None:
+            return "Individual not in population"
+
         self._population.delete(individual)
 
 
 class AGTransitionEventHandler(EventHandler):
     """
-    Handler responsible for modifying the age group if an individual.
+    Handler responsible for modifying the age group of individuals.
     """
-    def process(self):
-        individual = self._population.get(int(self._event["ID"]))
-        individual.set_population_age_group(int(self._event["age_group_pop"]))
-        individual.set_household_age_group(int(self._event["age_group_hh"]))
+    EVENT_TYPES = ["age_group_transition"]
+
+    def _process_event(self, position: int):
+        individual = self._get_individual(position)
+        if individual is None:
+            return "Individual not in population"
+
+        individual.set_population_age_group(self._events["age_group_pop"][position])
+        individual.set_household_age_group(self._events["age_group_hh"][position])
 
 
 class HHTransitionEventHandler(EventHandler):
     """
-    Handler responsible for modifying the household of an individual.
+    Handler responsible for modifying the household of individuals.
     """
-    def process(self):
-        individual = self._population.get(int(self._event["ID"]))
+    EVENT_TYPES = ["hh_transition"]
 
-        if not self._event["HH_ID_target"] == 'NA':
+    def _process_event(self, position: int):
+        individual = self._get_individual(position)
+        if individual is None:
+            return "Individual not in population"
+
+        if self._events["HH_ID_target"][position] is not None:
             # Individual changed household
             self._population.remove_from_household(individual)
-            self._population.add_to_household(individual, int(self._event["HH_ID_target"]))
-            individual.set_nursing_home(True if self._event["NH"] == 1 else False)
+            self._population.add_to_household(individual, self._events["HH_ID_target"][position])
+            individual.set_nursing_home(True if self._events["NH"][position] == 1 else False)
 
         # Individual changed solely household position
-        individual.set_hh_position(self._event["hh_position_target"])
\ No newline at end of file
+        individual.set_hh_position(self._events["hh_position_target"][position])
+
+
+# Handlers in the order in which they are applied to the events of a day, i.e., individuals enter the
+# population before they transition, and leave it afterwards
+HANDLERS = [AddToPopEventHandler, HHTransitionEventHandler, AGTransitionEventHandler, RemoveFromPopEventHandler]
@@ -1,7 +1,9 @@
-import csv
-
+from collections import Counter
 from datetime import datetime
-from events.event import EventHandler
+from events.compiled_log import CompiledEventLog
+from events.event import HANDLERS, AddToPopEventHandler
+from events.prefetch import PrefetchingEventLog
+from events.table import EVENT_LOG_COLUMNS, POPULATION_COLUMNS, BinaryTable, BinaryTableReader, CsvTableReader, load_binary
 from population.individual import Individual
 from population.population import Population
 from reporter import Reporter
@@ -15,11 +17,17 @@ class EventLogPlayer:
         self.__reporter = reporter
         self.__population = population
 
-        # Initialize the reader
-        pop_csv = open(config.get("event_log"), mode='r')
-        self.__event_reader = csv.DictReader(pop_csv)
-        self.__next_event = next(self.__event_reader)
+        # Compile the event log, invalid events are reported once. Alternatively, the log is streamed by a
+        # background thread that prefetches a bounded number of days.
         self.__date_format = global_config.get("date_format", "%Y-%m-%d")
+        self.__prefetch_days = config.get("prefetch_days", 0)
+        if self.__prefetch_days > 0:
+            self.__event_log = PrefetchingEventLog(config.get("event_log"), self.__date_format, self.__prefetch_days)
+        else:
+            self.__event_log = CompiledEventLog(self.__load_table(config.get("event_log"), EVENT_LOG_COLUMNS))
+            self.__next_day = self.__event_log.get_first_day()
+            self.__report_errors(self.__event_log)
+
         self.__num_age_groups_pop = global_config.get("num_age_groups_pop", 0)
 
         # Compute base age distribution
@@ -28,50 +36,128 @@ class EventLogPlayer:
         # Load initial population
         self._load_initial(config.get("initial_population"))
 
-    def fast_forward(self, max_date: datetime):
+    def fast_forward(self, max_date: datetime) -> int:
         """
-        Function to fast forward the population up to the specified date. For each of the events
-        in the event log, there exists a corresponding EventHandler.
+        Function to fast forward the population up to the specified date. The events of a day are applied
+        in grouped passes, i.e., one per EventHandler (see events/event.py).
 
         :param max_date: (datetime) date to evolve the population to
+        :return: (number) number of events that were applied
         """
-        while self.__next_event and self.__parse_date(self.__next_event["event_date"]) <= max_date:
-            try:
-                EventHandler.construct(self.__population, self.__next_event, self.__date_format).process()
-                self.__reporter.add_event(self.__next_event["event_type"])
-            except Exception as e:
-                self.__reporter.add_error(str(e) + f"(individual id: {self.__next_event['ID']})")
-                self.__reporter.add_error(self.__next_event["event_type"])
+        num_events = 0
+        if self.__prefetch_days > 0:
+            for event_log in self.__event_log.get_batches(max_date.toordinal()):
+                self.__report_errors(event_log)
+                for day in range(event_log.get_first_day(), event_log.get_last_day() + 1):
+                    num_events += self.__apply_day(event_log, day)
 
-            # Fetch next event
-            self.__next_event = next(self.__event_reader)
+            self.__reporter.set_prefetch_stats(self.__event_log.get_average_depth(), self.__event_log.get_stall_time())
+            return num_events
 
-    def _load_initial(self, population_csv):
+        max_day = min(max_date.toordinal(), self.__event_log.get_last_day())
+        while self.__next_day <= max_day:
+            num_events += self.__apply_day(self.__event_log, self.__next_day)
+            self.__next_day += 1
+
+        return num_events
+
+    def set_reporter(self, reporter: Reporter):
+        self.__reporter = reporter
+
+    def teardown(self):
         """
-        Function to load an initial, csv-formatted population.
+        Function to stop the background thread that prefetches the event log, if any.
+        """
+        if self.__prefetch_days > 0:
+            self.__event_log.close()
 
-        :param population_csv: (string) path to the csv file
+    def __apply_day(self, event_log: CompiledEventLog, day: int) -> int:
         """
-        num = 0
-        with open(population_csv, mode='r') as pop_csv:
-            csv_reader = csv.DictReader(pop_csv)
-            for row in csv_reader:
-                if csv_reader.line_num == 0:
+        Function to apply the events of a single day.
+
+        :param event_log: (CompiledEventLog) compiled events containing the day
+        :param day: (number) day, as ordinal
+        :return: (number) number of events of the day, including the ones that failed
+        """
+        start, end = event_log.get_day(day)
+        if start == end:
+            return 0
+
+        for handler in HANDLERS:
+            events = event_log.get_events(start, end, handler.EVENT_TYPES)
+            if not events:
+                continue
+
+            errors = handler(self.__population, events).process()
+            for position, error in errors:
+                # Adds of individuals that are already in the population are rejected, and reported on their own
+                if error == AddToPopEventHandler.ALREADY_IN_POPULATION:
+                    self.__reporter.add_rejected(events["event_type"][position])
                     continue
 
-                individual = Individual.create(row, self.__date_format)
-                num += 1
-                self.__population.add(individual, row["HH_ID"])
+                self.__reporter.add_error(f"{error} (individual id: {events['ID'][position]})")
+                self.__reporter.add_error(events["event_type"][position])
 
-        self.__reporter.info(f"Pre-loaded population with {num} individuals.")
+            failed = {position for position, _ in errors}
+            for event_type, num in Counter(event_type for position, event_type in enumerate(events["event_type"])
+                                           if position not in failed).items():
+                self.__reporter.add_event(event_type, num)
+
+        return end - start
+
+    def __report_errors(self, event_log: CompiledEventLog):
+        for error in event_log.get_errors():
+            self.__reporter.error(error)
+
+    def __load_table(self, location, columns) -> BinaryTable:
+        """
+        Function to load a csv-formatted table as a whole, its binary form is used when it is fresh (see preprocess.py).
+
+        :param location: (str) location of the csv file, or a table that has been loaded already (e.g., a shard)
+        :param columns: (list) columns of the table, i.e., column name and type
+        :return: (BinaryTable) table
+        """
+        if isinstance(location, BinaryTable):
+            return location
+
+        table = load_binary(location, columns, self.__date_format)
+        if table is not None:
+            self.__reporter.info(f"Using preprocessed form of '{location}'.")
+            return table
+
+        return BinaryTable.from_csv(location, columns, self.__date_format)
 
-    def __parse_date(self, date_str):
+    def __open_table(self, location, columns):
         """
-        Function to parse the given date string, according to the specified date format.
+        Function to open a csv-formatted table, its binary form is used when it is fresh (see preprocess.py).
 
-        :param date_str: (string) date string to parse
+        :param location: (str) location of the csv file, or a table that has been loaded already (e.g., a shard)
+        :param columns: (list) columns of the table, i.e., column name and type
+        :return: (iterator) parsed rows of the table
         """
-        return datetime.strptime(date_str, self.__date_format)
+        if isinstance(location, BinaryTable):
+            return BinaryTableReader(location)
+
+        table = load_binary(location, columns, self.__date_format)
+        if table is not None:
+            self.__reporter.info(f"Using preprocessed form of '{location}'.")
+            return BinaryTableReader(table)
+
+        return CsvTableReader(location, columns, self.__date_format)
+
+    def _load_initial(self, population_csv):
+        """
+        Function to load an initial, csv-formatted population.
+
+        :param population_csv: (string) path to the csv file
+        """
+        num = 0
+        for row in self.__open_table(population_csv, POPULATION_COLUMNS):
+            individual = Individual.create(row)
+            num += 1
+            self.__population.add(individual, row["HH_ID"])
+
+        self.__reporter.info(f"Pre-loaded population with {num} individuals.")
 
 
     def __compute_base_age_distribution(self, base_csv):
@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+
+from events.compiled_log import CompiledEventLog
+from events.table import EVENT_LOG_COLUMNS, BinaryTable, CsvTableReader
+
+
+class PrefetchingEventLog:
+    """
+    Event log that is streamed from a (possibly compressed) csv file by a background thread. The thread parses and
+    compiles upcoming days into a bounded queue, such that reading and decompressing the log overlaps with the
+    simulation of the current day. The log is expected to be ordered by date, events that precede the day being
+    read are applied together with that day.
+    """
+    def __init__(self, location, date_format, prefetch_days):
+        self.__location = location
+        self.__date_format = date_format
+        self.__prefetch_days = prefetch_days
+
+        # Position of the first event that has not been applied yet, i.e., byte offset and row number
+        self.__offset = None
+        self.__row = 0
+        self.__exhausted = False
+
+        # Metrics, i.e., number of days retrieved, sum of the prefetch depths and time spent waiting
+        self.__num_retrieved = 0
+        self.__total_depth = 0
+        self.__stall_time = 0
+
+        self.__reset()
+
+    def __getstate__(self):
+        # Threads can not be pickled, the log is reopened at the first event that has not been applied instead
+        state = self.__dict__.copy()
+        for attribute in ["queue", "thread", "stop", "pending"]:
+            del state[f"_PrefetchingEventLog__{attribute}"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__reset()
+
+    def get_batches(self, max_day: int):
+        """
+        Generator that retrieves the compiled events of the upcoming days, up to and including the given day. The
+        background thread is started on first use, i.e., not before a simulation forks its workers.
+
+        :param max_day: (number) last day to retrieve, as ordinal
+        :return: (generator) compiled events of a single day
+        """
+        if self.__exhausted:
+            return
+
+        if self.__thread is None:
+            self.__start()
+
+        while True:
+            if self.__pending is None:
+                self.__pending = self.__retrieve()
+
+            if self.__pending is None:
+                self.__exhausted = True
+                return
+
+            if self.__pending[0].get_last_day() > max_day:
+                return
+
+            event_log, self.__offset, self.__row = self.__pending
+            self.__pending = None
+            yield event_log
+
+    def get_average_depth(self) -> float:
+        """
+        Function to retrieve the average number of days that were prefetched when retrieving a day.
+
+        :return: (number) average prefetch depth, in days
+        """
+        return self.__total_depth / self.__num_retrieved if self.__num_retrieved > 0 else 0
+
+    def get_stall_time(self) -> float:
+        """
+        Function to retrieve the time spent waiting for the background thread, i.e., when no day was prefetched.
+
+        :return: (number) stall time, in seconds
+        """
+        return self.__stall_time
+
+    def close(self):
+        """
+        Function to stop the background thread.
+        """
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__reset()
+
+    def __reset(self):
+        self.__queue = queue.Queue(maxsize=self.__prefetch_days)
+        self.__thread = None
+        self.__stop = threading.Event()
+        self.__pending = None
+
+    def __start(self):
+        self.__thread = threading.Thread(target=self.__prefetch, name="event-log-prefetch", daemon=True)
+        self.__thread.start()
+
+    def __retrieve(self):
+        """
+        Function to retrieve the next day from the queue, errors of the background thread are raised here.
+
+        :return: (tuple) compiled events, offset and row number following the day, None at the end of the log
+        """
+        self.__num_retrieved += 1
+        self.__total_depth += self.__queue.qsize()
+
+        start = time.time()
+        item = self.__queue.get()
+        self.__stall_time += time.time() - start
+
+        if isinstance(item, Exception):
+            raise item
+
+        return item
+
+    def __prefetch(self):
+        try:
+            reader = CsvTableReader(self.__location, EVENT_LOG_COLUMNS, self.__date_format, self.__offset)
+            row_num = self.__row
+            rows, day, offset = [], None, reader.get_offset()
+            for row in reader:
+                # Events of a later day complete the current day
+                if row["event_date"] is not None and day is not None and row["event_date"] > day:
+                    if not self.__put(self.__compile(rows, row_num), offset, row_num + len(rows)):
+                        return
+
+                    row_num += len(rows)
+                    rows, day = [], None
+
+                rows.append(row)
+                day = row["event_date"] if day is None else day
+                offset = reader.get_offset()
+
+            if rows and not self.__put(self.__compile(rows, row_num), offset, row_num + len(rows)):
+                return
+
+            self.__put(None)
+        except Exception as e:
+            self.__put(e)
+
+    def __compile(self, rows, first_row) -> CompiledEventLog:
+        return CompiledEventLog(BinaryTable.from_rows(rows, EVENT_LOG_COLUMNS), first_row)
+
+    def __put(self, event_log, offset=None, row_num=None) -> bool:
+        # Wait for room in the queue, unless the thread is stopped
+        item = (event_log, offset, row_num) if isinstance(event_log, CompiledEventLog) else event_log
+        while not self.__stop.is_set():
+            try:
+                self.__queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
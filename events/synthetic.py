@@ -0,0 +1,390 @@
+import csv
+import gzip
+import lzma
+import numpy as np
+
+from datetime import datetime
+from events.table import EVENT_LOG_COLUMNS, POPULATION_COLUMNS
+
+# Ages at which individuals enter the next age group, i.e., children, adolescents, adults and elderly
+AGE_GROUP_LIMITS = [13, 19, 61]
+
+# Sizes of the (private) households and their probabilities, after the sample population
+HOUSEHOLD_SIZES = np.arange(1, 9)
+HOUSEHOLD_SIZE_PROBS = np.array([0.352, 0.312, 0.153, 0.121, 0.045, 0.013, 0.003, 0.001])
+MEAN_HOUSEHOLD_SIZE = float(HOUSEHOLD_SIZES @ (HOUSEHOLD_SIZE_PROBS / HOUSEHOLD_SIZE_PROBS.sum()))
+
+# Probability that a household with multiple members is a single parent with children, rather than a couple
+SINGLE_PARENT_PROB = 0.12
+
+# Probability that a household is a nursing home (of 8 to 20 elderly residents), about 0.25% of the population
+NURSING_HOME_PROB = 0.0004
+
+# Probability that an adult without children is elderly, i.e., of 61 and older
+ELDERLY_PROB = 0.5
+
+# Yearly rates of the events per individual, after the sample event log
+BIRTH_RATE = 0.0113
+IMMIGRATION_RATE = 0.0146
+EMIGRATION_RATE = 0.0095
+HH_TRANSITION_RATE = 0.052
+
+# Yearly mortality per age group
+DEATH_RATES = [0.0005, 0.0003, 0.002, 0.045]
+
+# Probabilities that a household transition is a move into a nursing home (elderly only) or in with a partner,
+# individuals that do neither move into a household of their own
+NURSING_HOME_TRANSITION_PROB = 0.05
+UNION_TRANSITION_PROB = 0.5
+
+# Day (since the epoch) that is never reached, i.e., of individuals without a next age group transition
+NEVER = np.iinfo(np.int32).max
+
+# Dates are written in the default date format, i.e., '%Y-%m-%d'
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class SyntheticInputGenerator:
+    """
+    Generator of a synthetic initial population and event log, in the schema of the sample inputs (see
+    events/table.py), for populations of any size. Households, age groups and nursing homes are distributed
+    after the sample population, events are drawn at the yearly rates of the sample event log. The state of the
+    population is kept as typed arrays indexed by the identifier of the individuals, rows are written in chunks,
+    such that populations of millions of individuals are generated in bounded memory.
+    """
+    def __init__(self, size, start_date: datetime, seed=None, chunk_size=100000):
+        self.__size = size
+        self.__start = np.datetime64(start_date.date(), "D")
+        self.__rng = np.random.default_rng(seed)
+        self.__chunk_size = chunk_size
+
+        # State of the individuals, indexed by their identifier (identifiers start at one)
+        capacity = size + 1
+        self.__alive = np.zeros(capacity, dtype=bool)
+        self.__household = np.zeros(capacity, dtype=np.int32)
+        self.__female = np.zeros(capacity, dtype=bool)
+        self.__birth = np.zeros(capacity, dtype=np.int32)
+        self.__nursing_home = np.zeros(capacity, dtype=bool)
+        self.__age_group = np.zeros(capacity, dtype=np.int8)
+        self.__next_transition = np.full(capacity, NEVER, dtype=np.int32)
+
+        self.__next_id = 1
+        self.__next_hh_id = 1
+        self.__nursing_homes = []
+        self.__num_per_age_group = np.zeros(len(AGE_GROUP_LIMITS) + 2, dtype=np.int64)
+
+    def get_age_distribution(self) -> list:
+        """
+        Function to retrieve the number of living individuals per age group, e.g., to serve as base population.
+
+        :return: (list) number of individuals per age group
+        """
+        return self.__num_per_age_group[1:].tolist()
+
+    def write_population(self, location):
+        """
+        Function to generate the initial population, in chunks of households.
+
+        :param location: (str) location of the population csv, compressed when ending in '.gz' or '.xz'
+        """
+        with open_output_file(location) as out_file:
+            writer = csv.writer(out_file)
+            writer.writerow([name for name, _ in POPULATION_COLUMNS])
+
+            num_written = 0
+            while num_written < self.__size:
+                chunk = self.__create_households(min(self.__chunk_size, self.__size - num_written), self.__start,
+                                                 allow_nursing_homes=True)
+                writer.writerows(zip(chunk["ID"], chunk["HH_ID"], chunk["sex"], chunk["birth_date"],
+                                     chunk["age_group"], chunk["age_group"], chunk["hh_position"], chunk["NH"]))
+                num_written += len(chunk["ID"])
+
+    def write_event_log(self, location, num_days):
+        """
+        Function to generate the events of the given number of days following the start date, the events are
+        written day by day, i.e., ordered by date. The population is to be generated first.
+
+        :param location: (str) location of the event log csv, compressed when ending in '.gz' or '.xz'
+        :param num_days: (number) number of days to generate events for
+        """
+        with open_output_file(location) as out_file:
+            writer = csv.writer(out_file)
+            writer.writerow([name for name, _ in EVENT_LOG_COLUMNS])
+
+            for offset in range(num_days):
+                day = self.__start + np.timedelta64(offset, "D")
+                for rows in [self.__births(day), self.__immigrations(day), self.__hh_transitions(day),
+                             self.__age_group_transitions(day), self.__deaths(day), self.__emigrations(day)]:
+                    writer.writerows(rows)
+
+    def __create_households(self, amount, date, allow_nursing_homes):
+        """
+        Function to create households of the given total number of individuals, the last household is cut to size.
+
+        :param amount: (number) number of individuals
+        :param date: (datetime64) date on which the ages hold
+        :param allow_nursing_homes: (bool) whether households can be nursing homes
+        :return: (dict) columns of the created individuals
+        """
+        rng = self.__rng
+
+        # Each household has at least one member, hence 'amount' households always suffice
+        nursing_home = rng.random(amount) < NURSING_HOME_PROB if allow_nursing_homes else np.zeros(amount, dtype=bool)
+        sizes = np.where(nursing_home, rng.integers(8, 21, amount), rng.choice(HOUSEHOLD_SIZES, amount, p=HOUSEHOLD_SIZE_PROBS))
+        cumulative = np.cumsum(sizes)
+        num_households = int(np.searchsorted(cumulative, amount)) + 1
+        sizes, nursing_home = sizes[:num_households], nursing_home[:num_households]
+        sizes[-1] -= cumulative[num_households - 1] - amount
+        starts = np.cumsum(sizes) - sizes
+
+        # Composition of the households
+        single_parent = ~nursing_home & (sizes >= 2) & (rng.random(num_households) < SINGLE_PARENT_PROB)
+        num_adults = np.where(nursing_home, sizes, np.where((sizes == 1) | single_parent, 1, 2))
+        has_children = sizes > num_adults
+        first_age = np.where(has_children, rng.integers(25, 65, num_households), _draw_adult_ages(rng, num_households))
+        first_age = np.where(nursing_home, 0, first_age)
+        first_female = np.where(single_parent, rng.random(num_households) < 0.85, rng.random(num_households) < 0.5)
+
+        # Members, i.e., their household and rank within the household (adults rank first)
+        household = np.repeat(np.arange(num_households), sizes)
+        rank = np.arange(amount) - np.repeat(starts, sizes)
+        adult = rank < num_adults[household]
+        resident = nursing_home[household]
+
+        partner_age = np.clip(first_age[household] + np.rint(rng.normal(0, 3, amount)).astype(int), 19, 100)
+        child_age = np.floor(rng.random(amount) * (np.minimum(30, first_age[household] - 20) + 1)).astype(int)
+        resident_age = np.floor(rng.triangular(70, 88, 101, amount)).astype(int)
+        age = np.select([resident, rank == 0, adult], [resident_age, first_age[household], partner_age], child_age)
+
+        female = np.select([resident, rank == 0, adult], [rng.random(amount) < 0.7, first_female[household],
+                           ~first_female[household]], rng.random(amount) < 0.5)
+
+        family = np.where(single_parent, "single_parent", np.where(has_children, "union_w_child", "union"))
+        position = np.select([resident, adult & (sizes[household] == 1), adult], ["collective", "single", family[household]], "child")
+
+        # Identifiers, households of the chunk follow the ones created before
+        ids = np.arange(self.__next_id, self.__next_id + amount)
+        hh_ids = np.arange(self.__next_hh_id, self.__next_hh_id + num_households)[household]
+        self.__nursing_homes.extend(np.arange(self.__next_hh_id, self.__next_hh_id + num_households)[nursing_home].tolist())
+        self.__next_id += amount
+        self.__next_hh_id += num_households
+
+        # Birth dates such that individuals are of the drawn age at the given date
+        dates = np.full(amount, date)
+        earliest = _add_years(dates, -(age + 1)) + np.timedelta64(1, "D")
+        latest = _add_years(dates, -age)
+        birth = earliest + np.floor(rng.random(amount) * ((latest - earliest).astype(int) + 1)).astype("m8[D]")
+        age_group = 1 + np.searchsorted(AGE_GROUP_LIMITS, age, side="right")
+
+        self.__register(ids, hh_ids, female, birth, resident, age_group)
+        return {
+            "ID": ids,
+            "HH_ID": hh_ids,
+            "sex": np.where(female, "F", "M"),
+            "birth_date": np.datetime_as_string(birth),
+            "age_group": age_group,
+            "hh_position": position,
+            "NH": resident.astype(int),
+        }
+
+    def __register(self, ids, hh_ids, female, birth, nursing_home, age_group):
+        """
+        Function to add individuals to the state of the population.
+        """
+        if ids[-1] >= len(self.__alive):
+            self.__grow(max(ids[-1] + 1, 2 * len(self.__alive)))
+
+        self.__alive[ids] = True
+        self.__household[ids] = hh_ids
+        self.__female[ids] = female
+        self.__birth[ids] = birth.astype(np.int64)
+        self.__nursing_home[ids] = nursing_home
+        self.__age_group[ids] = age_group
+        self.__next_transition[ids] = _next_transition(birth, age_group)
+        np.add.at(self.__num_per_age_group, age_group, 1)
+
+    def __unregister(self, ids):
+        """
+        Function to remove individuals from the state of the population.
+        """
+        self.__alive[ids] = False
+        self.__next_transition[ids] = NEVER
+        np.subtract.at(self.__num_per_age_group, self.__age_group[ids], 1)
+
+    def __grow(self, capacity):
+        for name in ["alive", "household", "female", "birth", "nursing_home", "age_group", "next_transition"]:
+            attribute = f"_SyntheticInputGenerator__{name}"
+            column = getattr(self, attribute)
+            grown = np.full(capacity, NEVER if name == "next_transition" else 0, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, attribute, grown)
+
+    def __sample(self, amount, accept=None):
+        """
+        Function to draw distinct living individuals, by rejection.
+
+        :param amount: (number) number of individuals to draw
+        :param accept: (function) function that masks the acceptable individuals of an array of identifiers
+        :return: (ndarray) identifiers of the drawn individuals, fewer when acceptable individuals are rare
+        """
+        chosen = np.empty(0, dtype=np.int64)
+        for _ in range(100):
+            if len(chosen) >= amount:
+                break
+
+            candidates = self.__rng.integers(1, self.__next_id, 2 * (amount - len(chosen)) + 16)
+            candidates = candidates[self.__alive[candidates]]
+            if accept is not None:
+                candidates = candidates[accept(candidates)]
+
+            # Retain the order in which individuals were drawn, such that truncating does not favour low identifiers
+            candidates = np.concatenate([chosen, candidates])
+            _, first = np.unique(candidates, return_index=True)
+            chosen = candidates[np.sort(first)]
+
+        return chosen[:amount]
+
+    def __num_events(self, yearly_rate, population) -> int:
+        return int(self.__rng.poisson(yearly_rate * population / 365))
+
+    def __num_alive(self) -> int:
+        return int(self.__num_per_age_group.sum())
+
+    def __births(self, day):
+        # Mothers are women of 20 to 44 that do not reside in a nursing home
+        oldest, youngest = _bounds_for_age(day, 20, 44)
+        mothers = self.__sample(self.__num_events(BIRTH_RATE, self.__num_alive()), lambda ids: self.__female[ids]
+                                & ~self.__nursing_home[ids] & (self.__birth[ids] >= oldest) & (self.__birth[ids] <= youngest))
+        if len(mothers) == 0:
+            return []
+
+        ids = np.arange(self.__next_id, self.__next_id + len(mothers))
+        self.__next_id += len(mothers)
+        female = self.__rng.random(len(mothers)) < 0.5
+        birth = np.full(len(mothers), day)
+        self.__register(ids, self.__household[mothers], female, birth, np.zeros(len(mothers), dtype=bool), np.ones(len(mothers), dtype=int))
+
+        return [_event_row(individual, "birth", day, hh_id=hh_id, sex="F" if is_female else "M", birth_date=str(day),
+                           age_group=1, hh_position="child", nursing_home=0)
+                for individual, hh_id, is_female in zip(ids.tolist(), self.__household[mothers].tolist(), female.tolist())]
+
+    def __immigrations(self, day):
+        # Immigrants arrive as households
+        num_households = self.__num_events(IMMIGRATION_RATE / MEAN_HOUSEHOLD_SIZE, self.__num_alive())
+        if num_households == 0:
+            return []
+
+        sizes = self.__rng.choice(HOUSEHOLD_SIZES, num_households, p=HOUSEHOLD_SIZE_PROBS)
+        households = self.__create_households(int(sizes.sum()), day, allow_nursing_homes=False)
+        return [_event_row(individual, "immigration", day, hh_id=hh_id, sex=sex, birth_date=birth_date,
+                           age_group=age_group, hh_position=hh_position, nursing_home=nursing_home)
+                for individual, hh_id, sex, birth_date, age_group, hh_position, nursing_home
+                in zip(*[households[name].tolist() for name in ["ID", "HH_ID", "sex", "birth_date", "age_group", "hh_position", "NH"]])]
+
+    def __hh_transitions(self, day):
+        # Adults that do not reside in a nursing home move, i.e., into a nursing home, in with a partner or on their own
+        oldest, youngest = _bounds_for_age(day, 19, 150)
+        adult = lambda ids: ~self.__nursing_home[ids] & (self.__birth[ids] <= youngest)
+        movers = self.__sample(self.__num_events(HH_TRANSITION_RATE, self.__num_alive()), adult)
+        partners = self.__sample(len(movers), adult)
+
+        rows = []
+        for mover, partner, draw in zip(movers.tolist(), partners.tolist(), self.__rng.random(len(movers)).tolist()):
+            household = int(self.__household[mover])
+            if self.__age_group[mover] == len(AGE_GROUP_LIMITS) + 1 and self.__nursing_homes and draw < NURSING_HOME_TRANSITION_PROB:
+                target = self.__nursing_homes[int(self.__rng.integers(len(self.__nursing_homes)))]
+                rows.append(_event_row(mover, "hh_transition", day, hh_id=household, hh_id_target=target,
+                                       hh_position_target="collective", nursing_home=1))
+                self.__nursing_home[mover] = True
+            elif draw < UNION_TRANSITION_PROB and partner != mover and self.__household[partner] != household:
+                target = int(self.__household[partner])
+                rows.append(_event_row(mover, "hh_transition", day, hh_id=household, hh_id_target=target,
+                                       hh_position_target="union", nursing_home=0))
+                rows.append(_event_row(partner, "hh_transition", day, hh_id=target, hh_position_target="union", nursing_home=0))
+            else:
+                target = self.__next_hh_id
+                self.__next_hh_id += 1
+                rows.append(_event_row(mover, "hh_transition", day, hh_id=household, hh_id_target=target,
+                                       hh_position_target="single", nursing_home=0))
+
+            self.__household[mover] = target
+
+        return rows
+
+    def __age_group_transitions(self, day):
+        ids = np.flatnonzero(self.__next_transition[:self.__next_id] == day.astype(np.int64))
+        if len(ids) == 0:
+            return []
+
+        np.subtract.at(self.__num_per_age_group, self.__age_group[ids], 1)
+        self.__age_group[ids] += 1
+        np.add.at(self.__num_per_age_group, self.__age_group[ids], 1)
+        self.__next_transition[ids] = _next_transition(self.__birth[ids].astype("M8[D]"), self.__age_group[ids])
+
+        return [_event_row(individual, "age_group_transition", day, hh_id=self.__household[individual], age_group=age_group)
+                for individual, age_group in zip(ids.tolist(), self.__age_group[ids].tolist())]
+
+    def __deaths(self, day):
+        rows = []
+        for age_group, rate in enumerate(DEATH_RATES, start=1):
+            ids = self.__sample(self.__num_events(rate, self.__num_per_age_group[age_group]),
+                                lambda ids: self.__age_group[ids] == age_group)
+            self.__unregister(ids)
+            rows.extend(_event_row(individual, "death", day, hh_id=self.__household[individual]) for individual in ids.tolist())
+
+        return rows
+
+    def __emigrations(self, day):
+        ids = self.__sample(self.__num_events(EMIGRATION_RATE, self.__num_alive()))
+        self.__unregister(ids)
+        return [_event_row(individual, "emigration", day, hh_id=self.__household[individual]) for individual in ids.tolist()]
+
+
+def open_output_file(location):
+    """
+    Function to open a csv file for writing in text mode, the counterpart of events.table.open_table_file.
+
+    :param location: (str) location of the csv file
+    :return: (file) opened file
+    """
+    if location.endswith(".gz"):
+        return gzip.open(location, mode="wt", newline="")
+
+    if location.endswith(".xz"):
+        return lzma.open(location, mode="wt", newline="")
+
+    return open(location, mode="w", newline="")
+
+
+def _event_row(individual, event_type, day, hh_id="NA", hh_id_target="NA", sex="NA", birth_date="NA", age_group="NA",
+               hh_position="NA", hh_position_target="NA", nursing_home=0):
+    # Values in the order of EVENT_LOG_COLUMNS
+    return (individual, int(hh_id) if hh_id != "NA" else hh_id, hh_id_target, event_type, str(day), sex, birth_date,
+            age_group, age_group, hh_position, hh_position_target, nursing_home)
+
+
+def _draw_adult_ages(rng, amount):
+    # Adults (without children at home) of 19 to 60, or elderly of 61 to 100 that become rarer with age
+    adults = rng.integers(19, 61, amount)
+    elderly = np.floor(rng.triangular(61, 61, 101, amount)).astype(int)
+    return np.where(rng.random(amount) < ELDERLY_PROB, elderly, adults)
+
+
+def _add_years(dates, years):
+    # Anniversaries of February 29th fall on March 1st in common years
+    months = dates.astype("M8[M]")
+    return (months + 12 * np.asarray(years)).astype("M8[D]") + (dates - months.astype("M8[D]"))
+
+
+def _bounds_for_age(day, youngest_age, oldest_age):
+    # Range of birth days (since the epoch) of individuals aged within the given (inclusive) range on the given day
+    oldest = _add_years(np.array([day]), -(oldest_age + 1))[0] + np.timedelta64(1, "D")
+    youngest = _add_years(np.array([day]), -youngest_age)[0]
+    return oldest.astype(np.int64), youngest.astype(np.int64)
+
+
+def _next_transition(birth, age_group):
+    # Day on which individuals enter their next age group, individuals of the last age group do not transition
+    limits = np.array(AGE_GROUP_LIMITS + [0])[np.asarray(age_group) - 1]
+    transition = _add_years(birth, limits).astype(np.int64)
+    return np.where(np.asarray(age_group) > len(AGE_GROUP_LIMITS), NEVER, transition)
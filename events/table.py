@@ -0,0 +1,355 @@
+import csv
+import glob
+import gzip
+import hashlib
+import lzma
+import os
+import numpy as np
+
+from datetime import datetime
+
+# Version of the binary format, bump whenever the encoding of the columns changes
+FORMAT_VERSION = 1
+
+# Value that encodes a missing ('NA') number or date
+NA = -1
+
+# Columns of the initial population that are used by the simulation, i.e., column name and type
+POPULATION_COLUMNS = [
+    ("ID", "int"),
+    ("HH_ID", "int"),
+    ("sex", "str"),
+    ("birth_date", "date"),
+    ("age_group_pop", "int"),
+    ("age_group_hh", "int"),
+    ("hh_position", "str"),
+    ("NH", "int"),
+]
+
+# Columns of the event log that are used by the simulation, i.e., column name and type
+EVENT_LOG_COLUMNS = [
+    ("ID", "int"),
+    ("HH_ID", "int"),
+    ("HH_ID_target", "int"),
+    ("event_type", "str"),
+    ("event_date", "date"),
+    ("sex", "str"),
+    ("birth_date", "date"),
+    ("age_group_pop", "int"),
+    ("age_group_hh", "int"),
+    ("hh_position", "str"),
+    ("hh_position_target", "str"),
+    ("NH", "int"),
+]
+
+
+class CsvTableReader:
+    """
+    Reader that streams the rows of a csv-formatted table, values are parsed according to their column type.
+    Missing values ('NA') are parsed as None. The reader keeps track of its byte offset in the table, such
+    that it can be reopened at the same row. Compressed tables (see open_table_file) are decompressed on the fly,
+    offsets then refer to the decompressed table.
+
+    Note: quoted values may span multiple lines, offsets are only taken at the end of a row.
+    """
+    def __init__(self, location, columns, date_format, offset=None):
+        self.__location = location
+        self.__columns = columns
+        self.__date_format = date_format
+        self.__file = None
+        self.__reader = None
+        self.__offset = 0
+        self.reopen()
+        self.__header = self.__read_row()
+        self.__offset = self.__file.tell()
+
+        if offset is not None:
+            self.__offset = offset
+            self.reopen()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        values = self.__read_row()
+        if values is None:
+            self.__file.close()
+            raise StopIteration
+
+        self.__offset = self.__file.tell()
+        row = dict(zip(self.__header, values))
+        return {name: _parse_value(row[name], column_type, self.__date_format) for name, column_type in self.__columns}
+
+    def get_offset(self) -> int:
+        """
+        Function to retrieve the byte offset of the next row in the table.
+
+        :return: (number) byte offset
+        """
+        return self.__offset
+
+    def reopen(self):
+        """
+        Function to reopen the table at the current row. Forked processes share the file offset
+        with their parent, hence each of them requires its own file handle.
+        """
+        self.__file = open_table_file(self.__location)
+        self.__file.seek(self.__offset)
+
+        # A single reader parses the lines of the table, such that rows may span lines. The reader only reads
+        # the lines of the row it parses, hence the offset of the file is at the end of that row.
+        self.__reader = csv.reader(line.decode() for line in iter(self.__file.readline, b""))
+
+    def __getstate__(self):
+        # Open files can not be pickled, the table is reopened at the current offset instead
+        state = self.__dict__.copy()
+        del state["_CsvTableReader__file"]
+        del state["_CsvTableReader__reader"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.reopen()
+
+    def __read_row(self):
+        # Skip empty lines, as the csv.DictReader does
+        for values in self.__reader:
+            if values:
+                return values
+
+        return None
+
+
+class BinaryTableReader:
+    """
+    Reader that iterates the rows of a preprocessed (binary) table, rows are identical to the ones
+    of the CsvTableReader.
+    """
+    def __init__(self, table):
+        self.__table = table
+        self.__position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        if self.__position >= len(self.__table):
+            raise StopIteration
+
+        self.__position += 1
+        return self.__table.row(self.__position - 1)
+
+    def reopen(self):
+        # The table resides in memory, hence there is no file handle to reopen
+        pass
+
+
+class BinaryTable:
+    """
+    Table of which the columns are stored as typed arrays. Numbers and dates (as ordinals) are stored
+    as integers, strings are dictionary-encoded.
+    """
+    def __init__(self, columns, arrays):
+        self.__columns = columns
+        self.__arrays = arrays
+        self.__decoders = None
+
+    def __len__(self):
+        return len(self.__arrays[self.__columns[0][0]])
+
+    def __getstate__(self):
+        # Decoders are derived from the arrays, hence only the latter are pickled
+        return self.__columns, self.__arrays
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __create_decoders(self):
+        # Decoders of the columns, i.e., column name, values and function to decode a value. Tables that are only
+        # accessed by column (e.g., the event log) never create them.
+        columns, arrays = self.__columns, self.__arrays
+        self.__decoders = []
+        for name, column_type in columns:
+            if column_type == "int":
+                self.__decoders.append((name, arrays[name].tolist(), _decode_int))
+            elif column_type == "date":
+                self.__decoders.append((name, arrays[name].tolist(), _decode_date))
+            else:
+                categories = arrays[f"{name}__categories"].tolist()
+                self.__decoders.append((name, arrays[name].tolist(), lambda code, categories=categories: categories[code] if code != NA else None))
+
+    def get_column(self, name):
+        """
+        Function to retrieve the raw values of a column, strings are returned as their codes.
+
+        :param name: (str) name of the column
+        :return: (ndarray) values of the column
+        """
+        return self.__arrays[name]
+
+    def take(self, indices):
+        """
+        Function to select rows of the table, e.g., the rows of a shard (see sharded.py).
+
+        :param indices: (ndarray) indices of the rows to select, in order
+        :return: (BinaryTable) table of the selected rows
+        """
+        arrays = dict(self.__arrays)
+        for name, _ in self.__columns:
+            arrays[name] = self.__arrays[name][indices]
+
+        return BinaryTable(self.__columns, arrays)
+
+    def save(self, location):
+        """
+        Function to write the table to an (uncompressed) npz file.
+
+        :param location: (str) location to write to
+        """
+        with open(location, "wb") as binary_file:
+            np.savez(binary_file, **self.__arrays)
+
+    def row(self, index: int) -> dict:
+        """
+        Function to decode a single row of the table.
+
+        :param index: (number) index of the row
+        :return: (dict) decoded row
+        """
+        if self.__decoders is None:
+            self.__create_decoders()
+
+        return {name: decode(values[index]) for name, values, decode in self.__decoders}
+
+    @staticmethod
+    def from_csv(location, columns, date_format):
+        """
+        Function to parse a csv-formatted table into a binary table.
+
+        :param location: (str) location of the csv file
+        :param columns: (list) columns to parse, i.e., column name and type
+        :param date_format: (str) date format to use when parsing dates
+        :return: (BinaryTable) parsed table
+        """
+        return BinaryTable.from_rows(CsvTableReader(location, columns, date_format), columns)
+
+    @staticmethod
+    def from_rows(rows, columns):
+        """
+        Function to encode parsed rows, e.g., of a CsvTableReader, into a binary table.
+
+        :param rows: (iterable) parsed rows
+        :param columns: (list) columns of the rows, i.e., column name and type
+        :return: (BinaryTable) encoded table
+        """
+        values = {name: [] for name, _ in columns}
+        for row in rows:
+            for name, _ in columns:
+                values[name].append(row[name])
+
+        arrays = dict()
+        for name, column_type in columns:
+            if column_type == "int":
+                arrays[name] = np.array([NA if value is None else value for value in values[name]], dtype=np.int64)
+            elif column_type == "date":
+                arrays[name] = np.array([NA if value is None else value.toordinal() for value in values[name]], dtype=np.int32)
+            else:
+                categories = sorted({value for value in values[name] if value is not None})
+                codes = {category: code for code, category in enumerate(categories)}
+                arrays[name] = np.array([NA if value is None else codes[value] for value in values[name]], dtype=np.int32)
+                arrays[f"{name}__categories"] = np.array(categories, dtype=np.str_)
+
+        return BinaryTable(columns, arrays)
+
+
+def preprocess(location, columns, date_format) -> str:
+    """
+    Function to convert a csv-formatted table into its binary form. Binary forms of previous
+    versions of the table are removed.
+
+    :param location: (str) location of the csv file
+    :param columns: (list) columns to convert, i.e., column name and type
+    :param date_format: (str) date format to use when parsing dates
+    :return: (str) location of the binary form
+    """
+    binary_location = get_binary_location(location, columns, date_format)
+    table = BinaryTable.from_csv(location, columns, date_format)
+
+    for stale_location in glob.glob(f"{location}.*.npz"):
+        os.remove(stale_location)
+
+    table.save(binary_location)
+
+    return binary_location
+
+
+def load_binary(location, columns, date_format):
+    """
+    Function to load the binary form of a csv-formatted table, provided that it is fresh.
+
+    :param location: (str) location of the csv file
+    :param columns: (list) columns of the table, i.e., column name and type
+    :param date_format: (str) date format used when parsing dates
+    :return: (BinaryTable) binary table, None if there is no fresh binary form
+    """
+    binary_location = get_binary_location(location, columns, date_format)
+    if not os.path.isfile(binary_location):
+        return None
+
+    with np.load(binary_location) as arrays:
+        return BinaryTable(columns, {name: arrays[name] for name in arrays.files})
+
+
+def get_binary_location(location, columns, date_format) -> str:
+    """
+    Function to determine the location of the binary form of a table. The location is keyed by a hash of
+    the size and modification time of the csv file, the columns and the date format, such that stale binary
+    forms are not used. The csv file itself is not read, as it may be large.
+
+    :param location: (str) location of the csv file
+    :param columns: (list) columns of the table, i.e., column name and type
+    :param date_format: (str) date format used when parsing dates
+    :return: (str) location of the binary form
+    """
+    status = os.stat(location)
+    key = hashlib.blake2b(digest_size=16)
+    key.update(repr((FORMAT_VERSION, columns, date_format, status.st_size, status.st_mtime_ns)).encode())
+    return f"{location}.{key.hexdigest()}.npz"
+
+
+def open_table_file(location):
+    """
+    Function to open a csv-formatted table for reading in binary mode. Tables that are compressed with gzip ('.gz')
+    or xz ('.xz') are decompressed on the fly.
+
+    :param location: (str) location of the csv file
+    :return: (file) opened table
+    """
+    if location.endswith(".gz"):
+        return gzip.open(location, mode='rb')
+
+    if location.endswith(".xz"):
+        return lzma.open(location, mode='rb')
+
+    return open(location, mode='rb')
+
+
+def _parse_value(value, column_type, date_format):
+    if value == "NA" or value == "":
+        return None
+
+    if column_type == "int":
+        return int(value)
+
+    if column_type == "date":
+        return datetime.strptime(value, date_format)
+
+    return value
+
+
+def _decode_int(value):
+    return None if value == NA else value
+
+
+def _decode_date(value):
+    return None if value == NA else datetime.fromordinal(value)
@@ -0,0 +1,43 @@
+import argparse
+import time
+
+from datetime import datetime
+from events.synthetic import DATE_FORMAT, SyntheticInputGenerator
+
+
+def main():
+    """
+    Entry point to generate a synthetic initial population and event log of a given size. The generated files
+    follow the schema of the sample inputs and can be referenced in the '[simulation.log_player]' configuration.
+    """
+    args = process_args_as_dict()
+    generator = SyntheticInputGenerator(args.get("size"), datetime.strptime(args.get("start_date"), DATE_FORMAT),
+                                        args.get("seed"), args.get("chunk_size"))
+
+    start = time.perf_counter()
+    generator.write_population(args.get("population"))
+    print(f"Generated population of {args.get('size')} individuals in '{args.get('population')}' "
+          f"({time.perf_counter() - start:.1f}s), individuals per age group: {generator.get_age_distribution()}.")
+
+    start = time.perf_counter()
+    generator.write_event_log(args.get("event_log"), args.get("days"))
+    print(f"Generated event log of {args.get('days')} days in '{args.get('event_log')}' "
+          f"({time.perf_counter() - start:.1f}s), individuals per age group: {generator.get_age_distribution()}.")
+
+
+def process_args_as_dict():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, help="number of individuals in the initial population", required=True)
+    parser.add_argument("--days", type=int, help="number of days to generate events for", default=365)
+    parser.add_argument("--start-date", type=str, help="first day of the event log (%%Y-%%m-%%d)", default="2011-01-01")
+    parser.add_argument("--seed", type=int, help="seed value of the generator", default=0)
+    parser.add_argument("--chunk-size", type=int, help="number of individuals generated at once", default=100000)
+    parser.add_argument("--population", type=str, help="location of the population csv (.gz or .xz to compress)",
+                        default="./input/pop_synthetic.csv")
+    parser.add_argument("--event-log", type=str, help="location of the event log csv (.gz or .xz to compress)",
+                        default="./input/event_log_synthetic.csv")
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,12 @@ class ConfigHandler:
         self.simulation_config = None
         self.global_config = None
         self.config = None
+        self.resume = False
 
     def load_from_args(self):
         args = self.process_args_as_dict()
         config = get_config(args.get("conf"))
+        self.resume = args.get("resume")
         self.config = DeepDict(config)
         self._parse_config()
 
@@ -31,6 +33,9 @@ class ConfigHandler:
     def get_global_config(self):
         return self.global_config
 
+    def get_resume(self):
+        return self.resume
+
     @staticmethod
     def process_args_as_dict():
         parser = argparse.ArgumentParser()
@@ -40,6 +45,11 @@ class ConfigHandler:
             help="Location of the config file or just the name, with or without the extension",
             required=True)
 
+        parser.add_argument(
+            "--resume",
+            help="Continue the simulation from the checkpoint file in the configuration",
+            action="store_true")
+
         return vars(parser.parse_args())  # Convert args to dict
 
 
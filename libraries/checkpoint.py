@@ -0,0 +1,58 @@
+import os
+import pickle
+
+
+def save(obj, location):
+    """
+    Function to pickle the given object to a checkpoint file. The file is replaced atomically, such that
+    an interrupted write leaves the previous checkpoint intact.
+
+    :param obj: object to checkpoint
+    :param location: (str) location of the checkpoint file
+    """
+    directory = os.path.dirname(location)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    with open(location + ".tmp", "wb") as checkpoint_file:
+        pickle.dump(obj, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(location + ".tmp", location)
+
+
+def load(location):
+    """
+    Function to load the object of a checkpoint file.
+
+    :param location: (str) location of the checkpoint file
+    :return: checkpointed object
+    """
+    if not os.path.isfile(location):
+        raise ValueError(f"Checkpoint '{location}' does not exist.")
+
+    with open(location, "rb") as checkpoint_file:
+        return pickle.load(checkpoint_file)
+
+
+def get_output_position(out_file) -> int:
+    """
+    Function to determine the position up to which an output file has been written, buffered output is flushed.
+
+    :param out_file: (file) output file, opened for writing
+    :return: (number) position in bytes
+    """
+    out_file.flush()
+    return os.path.getsize(out_file.name)
+
+
+def reopen_output(file_name, position):
+    """
+    Function to reopen an output file for appending at the given position, output written beyond the position
+    (e.g., after the checkpoint was taken) is discarded.
+
+    :param file_name: (str) location of the output file
+    :param position: (number) position in bytes
+    :return: (file) output file, opened for appending
+    """
+    os.truncate(file_name, position)
+    return open(file_name, "a")
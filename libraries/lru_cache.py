@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry once full. The number
+    of cache hits and misses is tracked.
+    """
+    def __init__(self, max_size):
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key, default=None):
+        """
+        Function to look up the given key, the entry is marked as most recently used.
+
+        :param key: key to look up
+        :param default: value to return in case the key is absent
+        :return: cached value, or the default
+        """
+        if key in self.__entries:
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+
+        self.__misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+        Function to add an entry to the cache, evicting the least recently used entry if required.
+
+        :param key: key of the entry
+        :param value: value of the entry
+        """
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+
+        if len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def get_hits(self) -> int:
+        return self.__hits
+
+    def get_misses(self) -> int:
+        return self.__misses
+
+    def __len__(self):
+        return len(self.__entries)
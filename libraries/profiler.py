@@ -0,0 +1,150 @@
+import cProfile
+import json
+import os
+import time
+import numpy as np
+
+from collections import defaultdict
+from datetime import datetime
+
+
+class Profiler:
+    """
+    Profiler that times the phases of each simulated day, e.g., processing the disease queue and evaluating the
+    transmission model, and counts the operations that each of the phases performs. The phases can be exported as
+    a trace-event file (to be opened in chrome://tracing or Perfetto), the simulation loop as a cProfile dump. A
+    disabled profiler returns immediately, phases are timed per day rather than per individual.
+    """
+    def __init__(self, config):
+        self.__enabled = config.get("enabled", False)
+        self.__trace_file = config.get("trace_file", None)
+        self.__cprofile_file = config.get("cprofile_file", None)
+
+        # Spans of the phases, i.e., phase, start and duration (in microseconds), number of operations and day
+        self.__spans = []
+        self.__started = dict()
+        self.__day = None
+        self.__origin = time.perf_counter()
+        self.__cprofile = None
+
+    def __getstate__(self):
+        # Profiles can not be pickled, profiling of the simulation loop restarts when the simulation is restored
+        state = self.__dict__.copy()
+        state["_Profiler__cprofile"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Spans of the restored simulation continue after the ones recorded before the checkpoint
+        self.__dict__.update(state)
+        end = max((start + duration for _, start, duration, _, _ in self.__spans), default=0)
+        self.__origin = time.perf_counter() - end / 1e6
+
+    def is_enabled(self) -> bool:
+        return self.__enabled
+
+    def set_day(self, day: datetime):
+        """
+        Function to set the simulated day to which the subsequent phases belong.
+
+        :param day: (datetime) simulated day
+        """
+        self.__day = day
+
+    def start(self, phase: str):
+        """
+        Function to mark the start of a phase.
+
+        :param phase: (str) name of the phase
+        """
+        if self.__enabled:
+            self.__started[phase] = time.perf_counter()
+
+    def stop(self, phase: str, num_ops=0):
+        """
+        Function to mark the end of a phase.
+
+        :param phase: (str) name of the phase
+        :param num_ops: (number) number of operations performed in the phase, e.g., transmission evaluations
+        """
+        if self.__enabled:
+            end = time.perf_counter()
+            start = self.__started.pop(phase)
+            self.__spans.append((phase, (start - self.__origin) * 1e6, (end - start) * 1e6, num_ops, self.__day))
+
+    def start_loop(self):
+        """
+        Function to mark the start of the simulation loop, the loop is profiled when a cProfile dump is configured.
+        """
+        if self.__enabled and self.__cprofile_file:
+            self.__cprofile = cProfile.Profile()
+            self.__cprofile.enable()
+
+    def stop_loop(self):
+        """
+        Function to mark the end of the simulation loop, the trace and cProfile dump are exported.
+        """
+        if not self.__enabled:
+            return
+
+        if self.__cprofile is not None:
+            self.__cprofile.disable()
+            _create_directory(self.__cprofile_file)
+            self.__cprofile.dump_stats(self.__cprofile_file)
+            self.__cprofile = None
+
+        if self.__trace_file:
+            self.export_trace(self.__trace_file)
+
+    def get_summary(self) -> list:
+        """
+        Function to summarize the phases, i.e., their total time, share of the total time, percentiles of their
+        duration and total number of operations.
+
+        :return: (list) lines of the summary, empty when the profiler is disabled
+        """
+        if not self.__enabled or not self.__spans:
+            return []
+
+        durations, num_ops = defaultdict(list), defaultdict(int)
+        for phase, _, duration, ops, _ in self.__spans:
+            durations[phase].append(duration / 1e3)
+            num_ops[phase] += ops
+
+        # Shares are relative to the simulated days, if those are profiled, and to the sum of the phases otherwise
+        total = sum(durations["day"]) if "day" in durations else sum(sum(values) for values in durations.values())
+        lines = ["Profile: phase                total (s)   share    p50 (ms)   p90 (ms)   p99 (ms)   operations"]
+        for phase, values in durations.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            lines.append(f"\t{phase:<24} {sum(values) / 1e3:>9.3f} {sum(values) / max(total, 1e-9):>7.1%} "
+                         f"{p50:>11.3f} {p90:>10.3f} {p99:>10.3f} {num_ops[phase]:>12}")
+
+        return lines
+
+    def export_trace(self, location):
+        """
+        Function to export the phases in the trace-event format.
+
+        :param location: (str) location of the trace file
+        """
+        events = []
+        for phase, start, duration, ops, day in self.__spans:
+            events.append({
+                "name": phase,
+                "cat": "simulation",
+                "ph": "X",
+                "ts": round(start, 3),
+                "dur": round(duration, 3),
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"operations": ops, "day": day.strftime("%Y-%m-%d") if day is not None else None},
+            })
+
+        _create_directory(location)
+        with open(location, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+
+def _create_directory(location):
+    directory = os.path.dirname(location)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+
+
+class RandomService:
+    """
+    Single source of randomness of the simulation, built on a seeded numpy Generator. Scalar draws are
+    served from pre-generated blocks of uniforms and standard normals, which are refilled in bulk once
+    exhausted. Components that draw in batches can use the underlying generator directly.
+
+    Note: not thread safe.
+    """
+    def __init__(self, seed, block_size=65536):
+        self.__generator = np.random.default_rng(seed)
+        self.__block_size = block_size
+        self.__uniforms = []
+        self.__normals = []
+
+    def reseed(self, seed):
+        """
+        Function to restart the random stream from the given seed. The underlying generator is reseeded in place,
+        such that components that hold on to it draw from the new stream as well.
+
+        :param seed: (number) new seed
+        """
+        self.__generator.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+        self.__uniforms = []
+        self.__normals = []
+
+    def get_generator(self) -> np.random.Generator:
+        """
+        Function to retrieve the underlying generator, intended for vectorized draws.
+
+        :return: (numpy.random.Generator) random generator
+        """
+        return self.__generator
+
+    def uniform(self) -> float:
+        """
+        Function to draw a uniform number in [0, 1).
+
+        :return: (float) random number
+        """
+        if not self.__uniforms:
+            self.__uniforms = self.__generator.random(self.__block_size).tolist()
+
+        return self.__uniforms.pop()
+
+    def normal(self, loc=0.0, scale=1.0) -> float:
+        """
+        Function to draw a number from a normal distribution.
+
+        :param loc: (float) mean of the distribution
+        :param scale: (float) standard deviation of the distribution
+        :return: (float) random number
+        """
+        if not self.__normals:
+            self.__normals = self.__generator.standard_normal(self.__block_size).tolist()
+
+        return loc + scale * self.__normals.pop()
+
+    def lognormal(self, mean=0.0, sigma=1.0) -> float:
+        """
+        Function to draw a number from a lognormal distribution.
+
+        :param mean: (float) mean of the underlying normal distribution
+        :param sigma: (float) standard deviation of the underlying normal distribution
+        :return: (float) random number
+        """
+        return math.exp(self.normal(mean, sigma))
+
+    def get_pending_uniforms(self):
+        """
+        Function to retrieve the uniforms that have been generated but not drawn yet, in the order in which they
+        would be drawn, e.g., for a compiled kernel (see disease/kernels.py). No new block is generated.
+
+        :return: (ndarray) pending uniforms
+        """
+        return np.array(self.__uniforms[::-1], dtype=float)
+
+    def get_pending_normals(self):
+        """
+        Function to retrieve the standard normals that have been generated but not drawn yet, in the order in
+        which they would be drawn. No new block is generated.
+
+        :return: (ndarray) pending standard normals
+        """
+        return np.array(self.__normals[::-1], dtype=float)
+
+    def skip(self, num_uniforms: int, num_normals: int):
+        """
+        Function to discard pending random numbers, i.e., those that have been used by a kernel.
+
+        :param num_uniforms: (number) number of uniforms to discard
+        :param num_normals: (number) number of standard normals to discard
+        """
+        del self.__uniforms[len(self.__uniforms) - num_uniforms:]
+        del self.__normals[len(self.__normals) - num_normals:]
+
+    def sample(self, population: list, amount: int) -> list:
+        """
+        Function to draw a number of distinct elements, uniformly at random.
+
+        :param population: (list) elements to draw from
+        :param amount: (number) number of elements to draw
+        :return: (list) drawn elements
+        """
+        if amount > len(population):
+            raise ValueError(f"Sample of {amount} elements larger than population of {len(population)} elements.")
+
+        return [population[index] for index in self.__generator.choice(len(population), size=amount, replace=False)]
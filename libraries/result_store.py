@@ -0,0 +1,89 @@
+import os
+import sqlite3
+
+from disease.disease_state import DiseaseStateEnum
+
+# Disease states are stored as they are written to the csv-formatted logs
+sqlite3.register_adapter(DiseaseStateEnum, str)
+
+
+def connect(database) -> sqlite3.Connection:
+    """
+    Function to connect to a result database in WAL mode, such that the runs of an ensemble can write to it
+    concurrently. Transactions are managed explicitly (see ResultTable.insert).
+
+    :param database: (str) location of the database
+    :return: (Connection) connection to the database
+    """
+    directory = os.path.dirname(database)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    # Writers of other runs hold the database while committing, wait for them rather than failing
+    connection = sqlite3.connect(database, timeout=600, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ResultTable:
+    """
+    Table of a result database that holds a log of all runs, each row is tagged with the run id and seed of the
+    run that wrote it. Rows of the run that remain from an earlier attempt are removed when the table is opened,
+    similar to overwriting a csv-formatted log.
+    """
+    def __init__(self, database, name, columns, run_id, seed, index_column=None):
+        self.__database = database
+        self.__name = name
+        self.__columns = columns
+        self.__run_id = run_id
+        self.__seed = seed
+        self.__index_column = index_column
+        self.__connection = connect(database)
+
+        column_definitions = ", ".join(f'"{column}"' for column in columns)
+        self.__connection.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (entry_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                  f'run_id TEXT, seed INTEGER, {column_definitions})')
+        self.__connection.execute(f'DELETE FROM "{name}" WHERE run_id = ? AND seed = ?', (run_id, seed))
+
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        self.__insert = f'INSERT INTO "{name}" (run_id, seed, {column_definitions}) VALUES ({placeholders})'
+
+    def __getstate__(self):
+        # Connections can not be pickled, the last row that has been written is recorded instead
+        state = self.__dict__.copy()
+        del state["_ResultTable__connection"]
+        state["last_id"] = self.__connection.execute(f'SELECT MAX(entry_id) FROM "{self.__name}"').fetchone()[0] or 0
+        return state
+
+    def __setstate__(self, state):
+        # Rows that were written after the checkpoint was taken are discarded
+        last_id = state.pop("last_id")
+        self.__dict__.update(state)
+        self.__connection = connect(self.__database)
+        self.__connection.execute(f'DELETE FROM "{self.__name}" WHERE run_id = ? AND seed = ? AND entry_id > ?',
+                                  (self.__run_id, self.__seed, last_id))
+
+    def insert(self, rows: list):
+        """
+        Function to insert a block of rows in a single transaction.
+
+        :param rows: (list) rows to insert, i.e., tuples of values in the order of the columns
+        """
+        tag = (self.__run_id, self.__seed)
+        self.__connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.__connection.executemany(self.__insert, (tag + row for row in rows))
+            self.__connection.execute("COMMIT")
+        except Exception:
+            self.__connection.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        """
+        Function to close the table. The index on the run and date is created at this point, i.e., after loading,
+        such that it does not slow down the inserts of the run.
+        """
+        index_columns = "run_id, seed" + (f', "{self.__index_column}"' if self.__index_column else "")
+        self.__connection.execute(f'CREATE INDEX IF NOT EXISTS "{self.__name}_run" ON "{self.__name}" ({index_columns})')
+        self.__connection.close()
@@ -0,0 +1,259 @@
+import heapq
+import numpy as np
+
+from multiprocessing import shared_memory
+from events.table import NA, BinaryTable
+from population.store import PopulationStore, StateCounter
+
+# Event types that add an individual to the population, i.e., that take a slot of the population store
+ADD_EVENT_TYPES = ["birth", "immigration"]
+
+
+def partition(population: BinaryTable, event_log: BinaryTable, num_shards: int):
+    """
+    Function to partition the initial population and the event log into shards. Individuals that share a
+    household, at the start or at any point in the event log, belong to the same shard, such that individuals
+    never move between shards. These groups of households are assigned to shards greedily, largest first onto
+    the shard with the fewest individuals so far, where the size of a group is its number of members and
+    arrivals (births and immigrations). Hence, nursing homes and other large households do not skew the shards.
+
+    :param population: (BinaryTable) initial population
+    :param event_log: (BinaryTable) event log
+    :param num_shards: (number) number of shards
+    :return: (tuple) rows of the initial population and of the event log per shard, and number of slots per shard
+    """
+    population_ids, event_ids = population.get_column("ID"), event_log.get_column("ID")
+    ids = np.unique(np.concatenate([population_ids, event_ids]))
+    ids = ids[ids != NA]
+
+    # Individuals are linked to the next individual of each household they are a member of
+    members = np.concatenate([population_ids, event_ids, event_ids])
+    households = np.concatenate([population.get_column("HH_ID"), event_log.get_column("HH_ID"),
+                                 event_log.get_column("HH_ID_target")])
+    linked = (members != NA) & (households != NA)
+    order = np.lexsort((members[linked], households[linked]))
+    nodes, households = np.searchsorted(ids, members[linked][order]), households[linked][order]
+    same_household = households[1:] == households[:-1]
+    _, components = np.unique(_connected_components(len(ids), nodes[:-1][same_household], nodes[1:][same_household]),
+                              return_inverse=True)
+    num_components = int(components.max()) + 1 if len(components) > 0 else 0
+
+    # Size of a component, i.e., the number of slots it takes in the population store
+    event_types = event_log.get_column("event_type__categories").tolist()
+    add_codes = [code for code, event_type in enumerate(event_types) if event_type in ADD_EVENT_TYPES]
+    arrivals = event_ids[np.isin(event_log.get_column("event_type"), add_codes)]
+    sizes = np.bincount(components[_lookup(ids, np.concatenate([population_ids, arrivals]))],
+                        minlength=num_components)
+
+    # Longest processing time first, ties are broken by the index of the component and shard
+    shard_of_component = np.zeros(num_components, dtype=np.int64)
+    loads = [(0, shard) for shard in range(num_shards)]
+    for component in np.argsort(-sizes, kind="stable"):
+        load, shard = heapq.heappop(loads)
+        shard_of_component[component] = shard
+        heapq.heappush(loads, (load + int(sizes[component]), shard))
+
+    # Rows are routed by their individual, rows of unknown individuals are routed to the first shard
+    population_shards = _route(ids, components, shard_of_component, population_ids)
+    event_shards = _route(ids, components, shard_of_component, event_ids)
+    population_rows = [np.flatnonzero(population_shards == shard) for shard in range(num_shards)]
+    event_rows = [np.flatnonzero(event_shards == shard) for shard in range(num_shards)]
+    return population_rows, event_rows, np.bincount(shard_of_component, weights=sizes, minlength=num_shards)
+
+
+def _connected_components(num_nodes, sources, targets):
+    """
+    Function to label the connected components of a graph, by repeatedly hooking the root of the larger label
+    onto the smaller label of each edge and shortcutting the resulting trees.
+
+    :param num_nodes: (number) number of nodes
+    :param sources: (ndarray) source nodes of the edges
+    :param targets: (ndarray) target nodes of the edges
+    :return: (ndarray) per node, the smallest node of its component
+    """
+    labels = np.arange(num_nodes)
+    while True:
+        source_labels, target_labels = labels[sources], labels[targets]
+        differ = source_labels != target_labels
+        if not differ.any():
+            return labels
+
+        np.minimum.at(labels, np.maximum(source_labels[differ], target_labels[differ]),
+                      np.minimum(source_labels[differ], target_labels[differ]))
+        while True:
+            parents = labels[labels]
+            if np.array_equal(parents, labels):
+                break
+
+            labels = parents
+
+
+def _lookup(ids, values):
+    positions = np.minimum(np.searchsorted(ids, values), max(len(ids) - 1, 0))
+    return positions[ids[positions] == values] if len(ids) > 0 else positions[:0]
+
+
+def _route(ids, components, shard_of_component, values):
+    shards = np.zeros(len(values), dtype=np.int64)
+    if len(ids) == 0:
+        return shards
+
+    positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    known = ids[positions] == values
+    shards[known] = shard_of_component[components[positions[known]]]
+    return shards
+
+
+class ShardExchange:
+    """
+    Exchange of small arrays of numbers between the workers of a sharded run, through shared memory. Each worker
+    writes its values into its row of a block, after which all workers read the whole block. Exchanges alternate
+    between two blocks, such that a single barrier per exchange suffices: a block is only written again once all
+    workers passed the barrier of the exchange in between, i.e., once they have read it.
+
+    Note: every worker has to take part in every exchange, in the same order.
+    """
+    def __init__(self, num_shards, width, context):
+        """
+        :param num_shards: (number) number of shards
+        :param width: (number) maximum number of values per exchange
+        :param context: (multiprocessing.context) context of the worker processes
+        """
+        self.__num_shards = num_shards
+        self.__width = max(1, width)
+        self.__memory = shared_memory.SharedMemory(create=True, size=2 * num_shards * self.__width * 8)
+        self.__barrier = context.Barrier(num_shards)
+        self.__num_exchanges = 0
+
+    def all_gather(self, shard_index, values):
+        """
+        Function to exchange the values of all shards.
+
+        :param shard_index: (number) index of the calling shard
+        :param values: (list) values of the calling shard, integers
+        :return: (ndarray) values of all shards, indexed by shard
+        """
+        values = np.asarray(values, dtype=np.int64).ravel()
+        if len(values) > self.__width:
+            raise ValueError(f"Unable to exchange {len(values)} values, at most {self.__width} values fit.")
+
+        blocks = np.ndarray((2, self.__num_shards, self.__width), dtype=np.int64, buffer=self.__memory.buf)
+        block = blocks[self.__num_exchanges % 2]
+        self.__num_exchanges += 1
+
+        block[shard_index, :len(values)] = values
+        self.__barrier.wait()
+        return block[:, :len(values)].copy()
+
+    def abort(self):
+        """
+        Function to release the workers that wait for an exchange, e.g., after one of them failed.
+        """
+        self.__barrier.abort()
+
+    def release(self):
+        """
+        Function to free the shared memory of the exchange, once all workers finished.
+        """
+        self.__memory.close()
+        self.__memory.unlink()
+
+
+class Shard:
+    """
+    Shard of a sharded run, as seen by the worker that simulates it. The population store of the shard lives in
+    shared memory (such that the coordinator can inspect it) and has a fixed capacity, i.e., the size of the
+    initial population plus the number of arrivals of the shard.
+    """
+    def __init__(self, index, capacity, num_age_groups, exchange: ShardExchange, seed):
+        """
+        :param index: (number) index of the shard
+        :param capacity: (number) number of slots of the population store of the shard
+        :param num_age_groups: (number) number of population age groups, including age group 0
+        :param exchange: (ShardExchange) exchange between the shards
+        :param seed: (number) seed of the run, shared by all shards
+        """
+        self.__index = index
+        self.__capacity = max(1, capacity)
+        self.__num_age_groups = num_age_groups
+        self.__exchange = exchange
+        self.__memory = shared_memory.SharedMemory(create=True,
+                                                   size=PopulationStore.get_buffer_size(self.__capacity))
+
+        # Draws that have to agree between the shards, the generator advances identically in every worker
+        self.__shared_random = np.random.default_rng(seed)
+
+    def get_index(self) -> int:
+        return self.__index
+
+    def get_seed(self, seed) -> int:
+        """
+        Function to derive the seed of the random stream of the shard. The first shard draws from the stream of
+        the run, such that a run of a single shard yields the same outputs as an unsharded run.
+
+        :param seed: (number) seed of the run
+        :return: (number) seed of the shard
+        """
+        if self.__index == 0:
+            return seed
+
+        return int(np.random.SeedSequence([seed, self.__index]).generate_state(1)[0])
+
+    def create_store(self) -> PopulationStore:
+        """
+        Function to create the population store of the shard, in its shared memory.
+
+        :return: (PopulationStore) population store
+        """
+        return PopulationStore(self.__capacity, self.__memory.buf)
+
+    def map_store(self) -> dict:
+        """
+        Function to map the columns of the population store of the shard, e.g., by the coordinator.
+
+        :return: (dict) column name to array
+        """
+        return PopulationStore.map_columns(self.__memory.buf, self.__capacity)
+
+    def all_reduce(self, values):
+        """
+        Function to sum values over all shards.
+
+        :param values: (list) values of the shard, integers
+        :return: (ndarray) sum of the values over all shards
+        """
+        return self.__exchange.all_gather(self.__index, values).sum(axis=0)
+
+    def all_reduce_counts(self, counts):
+        """
+        Function to sum the number of individuals per (disease state, age group) over all shards.
+
+        :param counts: (ndarray) counts of the shard, indexed by disease state code and age group
+        :return: (ndarray) counts of the population
+        """
+        if counts.shape[1] > self.__num_age_groups:
+            raise ValueError(f"Unable to exchange counts of {counts.shape[1]} age groups, at most "
+                             f"{self.__num_age_groups} age groups are exchanged.")
+
+        counts = np.pad(counts, ((0, 0), (0, self.__num_age_groups - counts.shape[1])))
+        return self.all_reduce(counts).reshape(StateCounter.NUM_STATES, self.__num_age_groups)
+
+    def split(self, amount, num_available) -> int:
+        """
+        Function to divide a number of draws over the shards, as if they were drawn without replacement from
+        the individuals that are available in all shards.
+
+        :param amount: (number) number of draws over all shards
+        :param num_available: (number) number of individuals that are available in the shard
+        :return: (number) number of draws of the shard
+        """
+        available = self.__exchange.all_gather(self.__index, [num_available])[:, 0]
+        draws = self.__shared_random.multivariate_hypergeometric(available, min(amount, int(available.sum())))
+        return int(draws[self.__index])
+
+    def release(self):
+        """
+        Function to free the shared memory of the shard, once its worker finished.
+        """
+        self.__memory.close()
+        self.__memory.unlink()
@@ -5,7 +5,11 @@ from simulation import Simulation
 def main():
     config = ConfigHandler()
     config.load_from_args()
-    simulation = Simulation(config.get_simulation_config(), config.get_global_config())
+    if config.get_resume():
+        simulation = Simulation.restore(config.get_simulation_config(), config.get_global_config())
+    else:
+        simulation = Simulation(config.get_simulation_config(), config.get_global_config())
+
     simulation.run()
 
 
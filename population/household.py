@@ -1,20 +1,27 @@
-from collections import defaultdict
+from array import array
 from population.individual import Individual
+from population.store import PopulationStore, StateCounter
 from disease.disease_state import DiseaseStateEnum
 
 
 class HouseHold:
     """
-    Class that represents a household.
+    Class that represents a household. The metrics of the household, i.e., the number of members per disease
+    state, household age group and sex, are kept as a flat array of counters that is allocated once they are
+    computed (see compute_metrics).
     """
-    def __init__(self, hh_id: int):
+    __slots__ = ("__is_nursing_home", "__hh_id", "__index", "__num_children", "__infectious_composition",
+                 "__num_age_groups", "__counts", "__members")
+
+    def __init__(self, hh_id: int, index: int = -1):
         self.__is_nursing_home = None # TODO Extract from event log
         self.__hh_id = hh_id
+        self.__index = index
         self.__num_children = 0
+        self.__infectious_composition = None
 
-        self._num_per_disease_state = defaultdict(int)
-        self._num_per_disease_state_per_age_group = defaultdict(lambda: defaultdict(int))
-        self._num_per_disease_state_per_age_group_per_sex = defaultdict(lambda: defaultdict(int))
+        self.__num_age_groups = 0
+        self.__counts = None
         self.__members = []
 
     def get_id(self) -> int:
@@ -25,6 +32,14 @@ class HouseHold:
         """
         return self.__hh_id
 
+    def get_index(self) -> int:
+        """
+        Function to retrieve the dense index of the household, as referenced by the population store.
+
+        :return: (number) index of the household
+        """
+        return self.__index
+
     def member_gen(self):
         """
         Function to produce a generator over the members of the household.
@@ -40,15 +55,35 @@ class HouseHold:
 
         :param individual: (Individual) individual to add to the household
         """
+        individual.set_member_position(len(self.__members))
         self.__members.append(individual)
 
     def remove_member(self, individual: Individual):
         """
-       Function to remove a member from the household.
+        Function to remove a member from the household, in constant time. The last member takes the position of
+        the removed member.
 
-       :param individual: (Individual) individual to add to the household
-       """
-        self.__members.remove(individual)
+        :param individual: (Individual) individual to remove from the household
+        """
+        position = individual.get_member_position()
+        if not 0 <= position < len(self.__members) or self.__members[position] is not individual:
+            raise ValueError(f"Individual {individual.get_id()} is not a member of household {self.__hh_id}")
+
+        last = self.__members.pop()
+        if last is not individual:
+            self.__members[position] = last
+            last.set_member_position(position)
+
+        individual.set_member_position(-1)
+
+    def change_num_children(self, num: int):
+        """
+        Function to update the number of children in the household, e.g., as children
+        join or leave the household or become adults.
+
+        :param num: (number) number of children to add, negative to remove
+        """
+        self.__num_children += num
 
     def has_children(self) -> bool:
         """
@@ -72,7 +107,11 @@ class HouseHold:
 
         :return: (number) number of infected people
         """
-        return self._num_per_disease_state[disease_state]
+        if self.__counts is None:
+            return 0
+
+        start = disease_state.value * self.__num_age_groups * 2
+        return sum(self.__counts[start:start + self.__num_age_groups * 2])
 
     def get_num_for_disease_state(self, disease_state: DiseaseStateEnum, age_group: int) -> int:
         """
@@ -80,7 +119,11 @@ class HouseHold:
 
         :return: (number) number of infected people
         """
-        return self._num_per_disease_state_per_age_group[disease_state][age_group]
+        if self.__counts is None or not 0 <= age_group < self.__num_age_groups:
+            return 0
+
+        position = self.__position(disease_state, age_group, False)
+        return self.__counts[position] + self.__counts[position + 1]
 
     def get_num_for_disease_state_by_ag_by_sex(self, disease_state: DiseaseStateEnum, hh_age_group: int, sex: bool):
         """
@@ -88,7 +131,10 @@ class HouseHold:
 
         :return: (number) number of infected people
         """
-        return self._num_per_disease_state_per_age_group_per_sex[disease_state][(hh_age_group, sex)]
+        if self.__counts is None or not 0 <= hh_age_group < self.__num_age_groups:
+            return 0
+
+        return self.__counts[self.__position(disease_state, hh_age_group, sex)]
 
     def get_num_for_disease_state_gen(self, disease_state: DiseaseStateEnum):
         """
@@ -97,9 +143,31 @@ class HouseHold:
 
         :return: (generator) through infected by sex
         """
-        for (age_group, sex) in self._num_per_disease_state_per_age_group_per_sex[disease_state]:
-            yield (age_group, sex, self._num_per_disease_state_per_age_group_per_sex[disease_state][(age_group, sex)])
+        if self.__counts is None:
+            return
+
+        for age_group in range(self.__num_age_groups):
+            for sex in (False, True):
+                num = self.__counts[self.__position(disease_state, age_group, sex)]
+                if num > 0:
+                    yield (age_group, sex, num)
+
+    def get_infectious_composition(self) -> tuple:
+        """
+        Function to retrieve the composition of the infectious members of the household, i.e., the number
+        of infected, asymptomatic and symptomatic members per household age group and sex.
 
+        :return: (tuple) hashable composition, consisting of (disease state code, age group, sex, number) tuples
+        """
+        if self.__infectious_composition is None:
+            self.__infectious_composition = tuple(sorted(
+                (disease_state.value, age_group, sex, num)
+                for disease_state in PopulationStore.INFECTIOUS_STATES
+                for (age_group, sex, num) in self.get_num_for_disease_state_gen(disease_state)
+                if num > 0
+            ))
+
+        return self.__infectious_composition
 
     # def get_infected_age_distribution(self):
     #     """
@@ -110,19 +178,17 @@ class HouseHold:
     #     """
     #     return self.__age_distribution_inf
 
-    def compute_metrics(self, curr_date, max_child_age):
+    def compute_metrics(self):
         """
-        Function to compute the metrics of the household for the given date.
+        Function to compute the metrics of the household for the current date.
         """
-        self._num_per_disease_state = defaultdict(int)
-        self._num_per_disease_state_per_age_group = defaultdict(lambda: defaultdict(int))
-        self._num_per_disease_state_per_age_group_per_sex = defaultdict(lambda: defaultdict(int))
+        self.__infectious_composition = None
+        self.__num_age_groups = 1 + max((individual.get_household_age_group() for individual in self.__members), default=0)
+        self.__counts = array("H", bytes(2 * StateCounter.NUM_STATES * self.__num_age_groups * 2))
 
         for individual in self.__members:
+            self.__counts[self.__position(individual.get_disease_sate(), individual.get_household_age_group(), individual.get_sex())] += 1
 
-            self._num_per_disease_state[individual.get_disease_sate()] += 1
-            self._num_per_disease_state_per_age_group[individual.get_disease_sate()][individual.get_household_age_group()] += 1
-            self._num_per_disease_state_per_age_group_per_sex[individual.get_disease_sate()][(individual.get_household_age_group(), individual.get_sex())] += 1
-
-            if individual.is_child(curr_date, max_child_age):
-                self.__num_children += 1
+    def __position(self, disease_state: DiseaseStateEnum, age_group: int, sex: bool) -> int:
+        # Counters are ordered by disease state, household age group and sex
+        return (disease_state.value * self.__num_age_groups + age_group) * 2 + sex
@@ -1,89 +1,128 @@
+import sys
+
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from disease.disease_state import DiseaseStateEnum
+from population.store import DetachedRecord
+
+# Lookup of disease states by their code, as kept in the store
+_DISEASE_STATE_BY_CODE = {state.value: state for state in DiseaseStateEnum}
 
 
 class Individual:
     """
-    Class that represents an individual in the population.
+    Class that represents an individual in the population. The attributes of the individual
+    live in a columnar store (see PopulationStore), the individual is a view on its slot. Attributes
+    are declared as slots, such that individuals do not carry an instance dictionary.
     """
+    __slots__ = ("__store", "__slot", "__household", "__HH_position",
+                 "pre_symptomatic_duration", "hospitalized_duration", "remaining_time_infected")
+
     def __init__(self, ID: int, birth_date: datetime, sex: bool, disease_state: DiseaseStateEnum, population_age_group: int, household_age_group: int, HH_position: str, nursing_home: bool):
-        self.__ID = ID
-        self.__birth_date = birth_date
-        self.__disease_state = disease_state
-        self.__sex = sex
-        self.__population_age_group = population_age_group
-        self.__household_age_group = household_age_group
+        self.__store = DetachedRecord(
+            id=ID,
+            state=disease_state.value,
+            pop_age_group=population_age_group,
+            hh_age_group=household_age_group,
+            sex=sex,
+            nursing_home=nursing_home,
+            birth_day=birth_date.toordinal(),
+        )
+        self.__slot = 0
         self.__household = None
-        self.__HH_position = HH_position
-        self.__nursing_home = nursing_home
+        self.__HH_position = _intern(HH_position)
 
         # Parameters specific to the disease model, ideally they should be moved elsewhere.
         self.pre_symptomatic_duration = None
         self.hospitalized_duration = None
         self.remaining_time_infected = None
 
+    def get_store(self):
+        return self.__store
+
+    def get_slot(self) -> int:
+        return self.__slot
+
+    def set_store(self, store, slot: int):
+        self.__store = store
+        self.__slot = slot
+
     def get_disease_sate(self) -> DiseaseStateEnum:
-        return self.__disease_state
+        return _DISEASE_STATE_BY_CODE[self.__store.state[self.__slot]]
 
     def set_disease_state(self, disease_state):
-        self.__disease_state = disease_state
+        self.__store.set_disease_state(self.__slot, disease_state.value)
 
     def get_id(self) -> int:
-        return self.__ID
+        return int(self.__store.id[self.__slot])
 
     def get_birth_date(self) -> datetime:
-        return self.__birth_date
+        return datetime.fromordinal(int(self.__store.birth_day[self.__slot]))
 
     def get_sex(self) -> bool:
-        return self.__sex
+        return bool(self.__store.sex[self.__slot])
 
     def get_nursing_home(self) -> bool:
-        return self.__nursing_home
+        return bool(self.__store.nursing_home[self.__slot])
 
     def set_nursing_home(self, nursing_home: bool):
-        self.__nursing_home = nursing_home
+        self.__store.set_nursing_home(self.__slot, nursing_home)
 
     def get_population_age_group(self) -> int:
-        return self.__population_age_group
+        return int(self.__store.pop_age_group[self.__slot])
 
     def get_household_age_group(self) -> int:
-        return self.__household_age_group
+        return int(self.__store.hh_age_group[self.__slot])
 
     def set_population_age_group(self, pop_age_group):
-        self.__population_age_group = pop_age_group
+        self.__store.set_population_age_group(self.__slot, pop_age_group)
 
     def set_household_age_group(self, hh_age_group):
-        self.__household_age_group = hh_age_group
+        self.__store.hh_age_group[self.__slot] = hh_age_group
 
     def set_hh_position(self, hh_position):
-        self.__HH_position = hh_position
+        self.__HH_position = _intern(hh_position)
 
     def get_household(self):
         return self.__household
 
     def set_household(self, household):
         self.__household = household
+        self.__store.set_household(self.__slot, household.get_index() if household is not None else -1)
 
     def get_hh_position(self) -> str:
         return self.__HH_position
 
+    def get_member_position(self) -> int:
+        return int(self.__store.member_position[self.__slot])
+
+    def set_member_position(self, position: int):
+        self.__store.member_position[self.__slot] = position
+
     def get_age(self, current_date: datetime) -> int:
-        return relativedelta(current_date, self.__birth_date).years
+        # Ages of individuals in a population are maintained by its birthday calendar
+        age = self.__store.age[self.__slot]
+        if age >= 0:
+            return int(age)
+
+        return relativedelta(current_date, self.get_birth_date()).years
 
     def is_child(self, current_date: datetime, max_child_age) -> bool:
-        return relativedelta(current_date, self.__birth_date).years < max_child_age
+        return self.get_age(current_date) < max_child_age
 
     @staticmethod
-    def create(event, date_format):
+    def create(event):
         """
-        Function to create an individual from a dictionary.
+        Function to create an individual from a parsed row of the population or event log.
 
-        :param event: (dict) event to parse to an individual
-        :param date_format: (string) date format to use when parsing dates
+        :param event: (dict) event to parse to an individual, see events/table.py
         :return: (individual) as specified in the events
         """
-        id = int(event["ID"])
         sex = True if event["sex"] != "M" else False
-        nursing_home = True if int(event["NH"]) == 1 else False
-        return Individual(id, datetime.strptime(event["birth_date"], date_format), sex, DiseaseStateEnum.STATE_SUSCEPTIBLE, int(event["age_group_pop"]), int(event["age_group_hh"]), event["hh_position"], nursing_home)
+        nursing_home = True if event["NH"] == 1 else False
+        return Individual(event["ID"], event["birth_date"], sex, DiseaseStateEnum.STATE_SUSCEPTIBLE, event["age_group_pop"], event["age_group_hh"], event["hh_position"], nursing_home)
+
+
+def _intern(hh_position):
+    # Positions are shared by many individuals, each individual refers to a single copy of its position
+    return sys.intern(hh_position) if hh_position is not None else None
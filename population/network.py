@@ -0,0 +1,206 @@
+import csv
+import itertools
+import numpy as np
+
+from collections import defaultdict
+
+
+class ContactNetwork:
+    """
+    Contact network of the households, i.e., undirected edges between members of the same household. Edges are read
+    from a csv-formatted edge list with the columns 'ID_1', 'ID_2' and 'HH_ID'. Households that are not covered by
+    the edge list are fully connected, i.e., every member is in contact with every other member.
+
+    Edges are kept in compressed sparse row (CSR) form, indexed by the slots of the population store. Changes of
+    households are kept in an overlay: the edges in CSR form of an individual that leaves its household are masked,
+    the edges to the members of the household it joins are added to the overlay. The overlay is merged into the
+    CSR form periodically (see compact).
+
+    Note: the edge list is resolved against the population as it is when the network is created.
+    """
+    def __init__(self, config, population):
+        """
+        :param config: (dict) transmission configuration, i.e., 'edge_list' and 'network_compaction_period_in_days'
+        :param population: (Population) population to which the network applies
+        """
+        self.__store = population.get_store()
+        self.__compaction_period = config.get("network_compaction_period_in_days", 7)
+        self.__num_days = 0
+
+        self.__indptr = np.zeros(1, dtype=np.int64)
+        self.__indices = np.zeros(0, dtype=np.int64)
+        self.__masked = np.zeros(0, dtype=np.bool_)
+        self.__overlay = defaultdict(set)
+
+        sources, targets, households = self.__read_edge_list(config.get("edge_list", "./input/edgelist.csv"), population)
+        self.__num_listed_edges = len(sources)
+        self.__num_listed_households = len(households)
+
+        # Households that are not covered by the edge list are fully connected
+        for household in population.household_gen():
+            if household.get_id() not in households:
+                for source, target in itertools.combinations([member.get_slot() for member in household.member_gen()], 2):
+                    sources.append(source)
+                    targets.append(target)
+
+        self.__build(np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64))
+
+    def get_num_edges(self) -> int:
+        """
+        Function to retrieve the number of (undirected) edges of the network, including the overlay.
+
+        :return: (number) number of edges
+        """
+        num_edges = np.count_nonzero(self.__unmasked(self.__coo_rows()) & self.__unmasked(self.__indices)) // 2
+        return num_edges + sum(len(neighbours) for neighbours in self.__overlay.values()) // 2
+
+    def get_num_listed_edges(self) -> int:
+        """
+        Function to retrieve the number of edges of the edge list that apply to the population.
+
+        :return: (number) number of edges
+        """
+        return self.__num_listed_edges
+
+    def get_num_listed_households(self) -> int:
+        """
+        Function to retrieve the number of households that are covered by the edge list.
+
+        :return: (number) number of households
+        """
+        return self.__num_listed_households
+
+    def get_overlay_size(self) -> int:
+        """
+        Function to retrieve the size of the overlay, i.e., the number of masked slots and added edges.
+
+        :return: (number) size of the overlay
+        """
+        return int(np.count_nonzero(self.__masked)) + sum(len(neighbours) for neighbours in self.__overlay.values()) // 2
+
+    def add(self, slot: int, member_slots):
+        """
+        Function to connect an individual that joins a household to its members.
+
+        :param slot: (number) slot of the individual
+        :param member_slots: (list) slots of the (other) members of the household
+        """
+        for member_slot in member_slots:
+            self.__overlay[slot].add(member_slot)
+            self.__overlay[member_slot].add(slot)
+
+    def remove(self, slot: int):
+        """
+        Function to disconnect an individual that leaves its household, i.e., all of its edges are dropped.
+
+        :param slot: (number) slot of the individual
+        """
+        if slot < len(self.__masked):
+            self.__masked[slot] = True
+
+        for member_slot in self.__overlay.pop(slot, ()):
+            self.__overlay[member_slot].discard(slot)
+            if not self.__overlay[member_slot]:
+                del self.__overlay[member_slot]
+
+    def get_escape_probabilities(self, log_escape_by_state):
+        """
+        Function to compute the probability of escaping infection within the household, for all slots at once. An
+        individual escapes every infectious neighbour independently, hence the log of the probability is the product
+        of the adjacency matrix and the log escape probability of each slot. As the adjacency matrix is symmetric,
+        the product only visits the rows of the infectious slots. The overlay is compacted once per period.
+
+        :param log_escape_by_state: (ndarray) log of the probability to escape a single contact, indexed by disease
+            state code, 0 for disease states that are not infectious
+        :return: (ndarray) per slot, probability of escaping household disease transmission
+        """
+        self.__num_days += 1
+        if self.__compaction_period > 0 and self.__num_days % self.__compaction_period == 0:
+            self.compact()
+
+        num_slots = self.__store.size()
+        weights = log_escape_by_state[self.__store.state[:num_slots]]
+        infectious = np.flatnonzero(weights)
+
+        # Edges in CSR form, masked slots neither infect nor get infected along them
+        rows = infectious[infectious < len(self.__masked)]
+        rows = rows[self.__unmasked(rows)]
+        starts, lengths = self.__indptr[rows], self.__indptr[rows + 1] - self.__indptr[rows]
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        log_escape = np.bincount(self.__indices[positions], weights=np.repeat(weights[rows], lengths),
+                                 minlength=num_slots)
+        log_escape[:len(self.__masked)][self.__masked] = 0
+
+        for slot, neighbours in self.__overlay.items():
+            if weights[slot] != 0:
+                for member_slot in neighbours:
+                    log_escape[member_slot] += weights[slot]
+
+        return np.exp(log_escape)
+
+    def compact(self):
+        """
+        Function to merge the overlay into the CSR form.
+        """
+        rows = self.__coo_rows()
+        valid = self.__unmasked(rows) & self.__unmasked(self.__indices) & (rows < self.__indices)
+        sources, targets = [rows[valid]], [self.__indices[valid]]
+        for slot, neighbours in self.__overlay.items():
+            neighbours = np.fromiter(neighbours, dtype=np.int64, count=len(neighbours))
+            sources.append(np.full(np.count_nonzero(neighbours > slot), slot, dtype=np.int64))
+            targets.append(neighbours[neighbours > slot])
+
+        self.__build(np.concatenate(sources), np.concatenate(targets))
+
+    def __build(self, sources, targets):
+        """
+        Function to (re)build the CSR form from the given undirected edges, the overlay is cleared.
+
+        :param sources: (ndarray) slots of the one end of the edges
+        :param targets: (ndarray) slots of the other end of the edges
+        """
+        # Duplicate edges and self-loops are dropped
+        num_slots = self.__store.size()
+        edges = np.unique(np.stack([np.minimum(sources, targets), np.maximum(sources, targets)], axis=1), axis=0)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        rows, columns = np.concatenate([edges[:, 0], edges[:, 1]]), np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((columns, rows))
+        self.__indices = columns[order]
+        self.__indptr = np.zeros(num_slots + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_slots), out=self.__indptr[1:])
+        self.__masked = np.zeros(num_slots, dtype=np.bool_)
+        self.__overlay = defaultdict(set)
+
+    def __coo_rows(self):
+        return np.repeat(np.arange(len(self.__indptr) - 1), np.diff(self.__indptr))
+
+    def __unmasked(self, slots):
+        return ~self.__masked[slots]
+
+    @staticmethod
+    def __read_edge_list(location, population):
+        """
+        Function to read a csv-formatted edge list. Edges of which an individual is not part of the population, or
+        not a member of the household of the edge, are skipped.
+
+        :param location: (str) location of the edge list
+        :param population: (Population) population to resolve the individuals in
+        :return: (tuple) slots of the ends of the edges, and identifiers of the covered households
+        """
+        sources, targets, households = [], [], set()
+        with open(location) as csv_file:
+            for row in csv.DictReader(csv_file):
+                if not (row["ID_1"].isdigit() and row["ID_2"].isdigit() and row["HH_ID"].isdigit()):
+                    continue
+
+                individuals = [population.get_or_none(int(row[column])) for column in ["ID_1", "ID_2"]]
+                hh_id = int(row["HH_ID"])
+                if any(individual is None or individual.get_household() is None
+                       or individual.get_household().get_id() != hh_id for individual in individuals):
+                    continue
+
+                sources.append(individuals[0].get_slot())
+                targets.append(individuals[1].get_slot())
+                households.add(hh_id)
+
+        return sources, targets, households
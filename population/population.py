@@ -1,15 +1,26 @@
-import random
+import datetime as dt
+from datetime import datetime
+from libraries.random_service import RandomService
+from population.calendar import BirthdayCalendar
 from population.household import HouseHold
 from population.individual import Individual
+from population.network import ContactNetwork
+from population.store import PopulationStore
 
 
 class Population:
-    def __init__(self, config, global_config):
-        random.seed(global_config["seed"])
+    def __init__(self, config, global_config, random: RandomService, store: PopulationStore = None):
+        self.__random = random
         self.__age_child_limit = config.get("age_child_limit", 18)
         self.__base_age_distribution = None
+        self.__store = store if store is not None else PopulationStore()
         self.__population = dict()
         self.__households = dict()
+        self.__household_index = []
+        self.__free_household_indices = []
+        self.__birthday_calendar = BirthdayCalendar()
+        self.__current_date = None
+        self.__network = None
 
     def get_age_child_limit(self):
         """
@@ -18,6 +29,54 @@ class Population:
         """
         return self.__age_child_limit
 
+    def get_current_date(self) -> datetime:
+        """
+        Function to retrieve the current date of the population, i.e., the date according to which ages are maintained.
+
+        :return: (datetime) current date
+        """
+        return self.__current_date
+
+    def set_current_date(self, date: datetime):
+        """
+        Function to advance the current date of the population. Ages of the individuals that had their birthday
+        in the meantime are incremented, households are updated as children become adults.
+
+        :param date: (datetime) new current date
+        """
+        if self.__current_date is not None:
+            day = self.__current_date + dt.timedelta(days=1)
+            while day <= date:
+                self.__process_birthdays(day)
+                day += dt.timedelta(days=1)
+
+        self.__current_date = date
+
+    def get_store(self) -> PopulationStore:
+        """
+        Function to retrieve the columnar store that backs the individuals in the population.
+
+        :return: (PopulationStore) population store
+        """
+        return self.__store
+
+    def get_network(self) -> ContactNetwork:
+        """
+        Function to retrieve the contact network of the households, if any.
+
+        :return: (ContactNetwork) contact network, None if household contacts are not given by a network
+        """
+        return self.__network
+
+    def set_network(self, network: ContactNetwork):
+        """
+        Function to supply the contact network of the households, which is kept up to date as individuals
+        change household.
+
+        :param network: (ContactNetwork) contact network
+        """
+        self.__network = network
+
     def set_base_distribution(self, base_distribution):
         self.__base_age_distribution = base_distribution
 
@@ -29,16 +88,17 @@ class Population:
         """
         return self.__base_age_distribution
 
-    def random_gen(self, amount):
+    def random_susceptible_gen(self, amount):
         """
-        Generator to retrieve a number of random individuals in the population.
+        Generator to retrieve a number of random susceptible individuals in the population, drawn from the
+        susceptible slots maintained by the store (see SusceptibleStrata).
 
-        :param amount: (number) number of individuals to sample
-        :return: (generator) random individuals generator
+        :param amount: (number) number of individuals to sample, at most the number of susceptible individuals
+        :return: (generator) random susceptible individuals generator
         """
-        individuals = random.sample(list(self.__population.values()), amount)
-        for ind in individuals:
-            yield ind
+        strata = self.__store.susceptible_strata
+        for slot in strata.sample(min(amount, len(strata)), self.__random.get_generator()):
+            yield self.__store.individuals[slot]
 
     def individual_gen(self):
         """
@@ -49,6 +109,26 @@ class Population:
         for individual in self.__population:
             yield self.__population[individual]
 
+    def individual_for_disease_state_gen(self, disease_state):
+        """
+        Generator to iterate individuals in the population that are in the given disease state.
+
+        :param disease_state: (DiseaseStateEnum) disease state of the individuals
+        :return: (generator) individuals in the given disease state
+        """
+        for slot in self.__store.slots_for_disease_state(disease_state.value):
+            yield self.__store.individuals[slot]
+
+    def active_household_gen(self):
+        """
+        Generator to iterate the households that currently contain infectious members, i.e.,
+        infected, asymptomatic or symptomatic individuals.
+
+        :return: (generator) households with infectious members
+        """
+        for index in list(self.__store.infectious_households):
+            yield self.__household_index[index]
+
     def household_gen(self):
         """
         Generator to iterate the households in the population.
@@ -67,6 +147,8 @@ class Population:
         """
         self.remove_from_household(individual)
         del self.__population[individual.get_id()]
+        self.__birthday_calendar.remove(individual.get_slot(), individual.get_birth_date())
+        self.__store.detach(individual)
 
     def add(self, individual: Individual, hh_id):
         """
@@ -76,6 +158,11 @@ class Population:
         :param individual: (individual) to add to the population
         :param hh_id: (number) household to which the individual belongs
         """
+        slot = self.__store.attach(individual)
+        if self.__current_date is not None:
+            self.__store.age[slot] = BirthdayCalendar.age_on(individual.get_birth_date(), self.__current_date)
+
+        self.__birthday_calendar.add(slot, individual.get_birth_date())
         self.__population[individual.get_id()] = individual
         self.add_to_household(individual, hh_id)
 
@@ -87,12 +174,23 @@ class Population:
         :param hh_id: (number) id of the household to add the individual to
         """
         if hh_id not in self.__households:
-            self.__households[hh_id] = HouseHold(hh_id)
+            index = self.__free_household_indices.pop() if self.__free_household_indices else len(self.__household_index)
+            if index == len(self.__household_index):
+                self.__household_index.append(None)
+
+            self.__households[hh_id] = HouseHold(hh_id, index)
+            self.__household_index[index] = self.__households[hh_id]
 
         household = self.__households[hh_id]
+        if self.__network is not None:
+            self.__network.add(individual.get_slot(), [member.get_slot() for member in household.member_gen()])
+
         household.add_member(individual)
         individual.set_household(household)
 
+        if self.__is_child(individual):
+            household.change_num_children(1)
+
     def remove_from_household(self, individual: Individual):
         """
         Function to remove the given individual from their household.
@@ -102,12 +200,35 @@ class Population:
         household = individual.get_household()
 
         if household is not None:
+            if self.__network is not None:
+                self.__network.remove(individual.get_slot())
+
             self.__households[household.get_id()].remove_member(individual)
             individual.set_household(None)
 
+            if self.__is_child(individual):
+                household.change_num_children(-1)
+
             if self.__households[household.get_id()].get_size() == 0:
                 # TODO Should this happen? What in case if events get out of order?
                 del self.__households[household.get_id()]
+                self.__household_index[household.get_index()] = None
+                self.__free_household_indices.append(household.get_index())
+
+    def __is_child(self, individual: Individual) -> bool:
+        return self.__current_date is not None and individual.is_child(self.__current_date, self.__age_child_limit)
+
+    def __process_birthdays(self, date: datetime):
+        """
+        Function to increment the ages of the individuals that have their birthday on the given date.
+
+        :param date: (datetime) date to process
+        """
+        for slot in self.__birthday_calendar.slots_for_date(date):
+            self.__store.age[slot] += 1
+
+            if self.__store.age[slot] == self.__age_child_limit and self.__store.household[slot] >= 0:
+                self.__household_index[self.__store.household[slot]].change_num_children(-1)
 
     def get(self, individual_id) -> Individual:
         """
@@ -118,6 +239,15 @@ class Population:
         """
         return self.__population[individual_id]
 
+    def get_or_none(self, individual_id) -> Individual:
+        """
+        Function to retrieve a specific individual from the population, if present.
+
+        :param individual_id: (number) id of the individual
+        :return: (Individual) individual, None if the individual is not part of the population
+        """
+        return self.__population.get(individual_id)
+
     def get_household(self, hh_id) -> HouseHold:
         """
         Function to retrieve a specific household from the population.
@@ -127,6 +257,15 @@ class Population:
         """
         return self.__households[hh_id]
 
+    def get_household_by_index(self, index) -> HouseHold:
+        """
+        Function to retrieve a specific household by its dense index.
+
+        :param index: (number) index of the household, as referenced by the population store
+        :return: (HouseHold) household
+        """
+        return self.__household_index[index]
+
     def size(self) -> int:
         """
         Function to retrieve the size of the population, i.e.,
@@ -0,0 +1,450 @@
+import numpy as np
+
+from disease.disease_state import DiseaseStateEnum
+
+
+class PopulationStore:
+    """
+    Columnar store of the individuals in the population. Every individual occupies a slot, i.e.,
+    an index into a set of parallel arrays. Slots of removed individuals are recycled.
+
+    Note: not thread safe.
+    """
+    # Column name, data type and value of an unused slot
+    COLUMNS = [
+        ("id", np.int64, -1),
+        ("state", np.int8, 0),
+        ("pop_age_group", np.int16, 0),
+        ("hh_age_group", np.int16, 0),
+        ("sex", np.bool_, False),
+        ("nursing_home", np.bool_, False),
+        ("household", np.int32, -1),
+        ("member_position", np.int32, -1),
+        ("birth_day", np.int32, 0),
+        ("age", np.int16, -1),
+    ]
+
+    # Disease states in which an individual is infectious to its household
+    INFECTIOUS_STATES = [DiseaseStateEnum.STATE_INFECTED, DiseaseStateEnum.STATE_ASYMPTOMATIC, DiseaseStateEnum.STATE_SYMPTOMATIC]
+
+    def __init__(self, capacity=1024, buffer=None):
+        """
+        :param capacity: (number) initial number of slots
+        :param buffer: (buffer) memory to hold the columns, e.g., of a multiprocessing.shared_memory segment of
+            (at least) get_buffer_size(capacity) bytes. A store in a given buffer has a fixed capacity.
+        """
+        self._capacity = 0
+        self._size = 0
+        self._free_slots = []
+        self._fixed_capacity = buffer is not None
+        self.in_use = np.zeros(0, dtype=np.bool_)
+        self.individuals = []
+        self.counter = StateCounter()
+        self.susceptible_strata = SusceptibleStrata()
+
+        # Index of the households that contain infectious members, i.e., household index to number of infectious members
+        self.infectious_households = dict()
+        self.__is_infectious = [False] * StateCounter.NUM_STATES
+        for state in self.INFECTIOUS_STATES:
+            self.__is_infectious[state.value] = True
+
+        if buffer is not None:
+            for name, column in self.map_columns(buffer, capacity).items():
+                column[:] = self.__get_default(name)
+                setattr(self, name, column)
+
+            self.individuals = [None] * capacity
+            self._capacity = capacity
+            return
+
+        for name, dtype, default in self.COLUMNS:
+            setattr(self, name, np.full(0, default, dtype=dtype))
+
+        self.__grow(max(1, capacity))
+
+    @classmethod
+    def get_buffer_size(cls, capacity) -> int:
+        """
+        Function to determine the number of bytes that a buffer needs to hold the columns of a store.
+
+        :param capacity: (number) number of slots of the store
+        :return: (number) size of the buffer in bytes
+        """
+        return sum(cls.__get_column_size(dtype, capacity) for _, dtype in cls.__get_layout())
+
+    @classmethod
+    def map_columns(cls, buffer, capacity) -> dict:
+        """
+        Function to map the columns of a store onto a buffer, e.g., to inspect the store of another process
+        through shared memory. Columns are laid out one after the other, including the 'in_use' column.
+
+        :param buffer: (buffer) memory that holds the columns
+        :param capacity: (number) number of slots of the store
+        :return: (dict) column name to array
+        """
+        columns, offset = dict(), 0
+        for name, dtype in cls.__get_layout():
+            columns[name] = np.ndarray(capacity, dtype=dtype, buffer=buffer, offset=offset)
+            offset += cls.__get_column_size(dtype, capacity)
+
+        return columns
+
+    @classmethod
+    def __get_layout(cls):
+        return [("in_use", np.bool_)] + [(name, dtype) for name, dtype, _ in cls.COLUMNS]
+
+    @classmethod
+    def __get_default(cls, name):
+        return next((default for column, _, default in cls.COLUMNS if column == name), False)
+
+    @staticmethod
+    def __get_column_size(dtype, capacity) -> int:
+        # Columns are aligned to 8 bytes
+        return -(-np.dtype(dtype).itemsize * capacity // 8) * 8
+
+    def size(self) -> int:
+        """
+        Function to retrieve the number of slots that have been handed out, including
+        the slots that are currently free. Arrays are only meaningful up to this size.
+
+        :return: (number) high-water mark of the slots
+        """
+        return self._size
+
+    def attach(self, individual) -> int:
+        """
+        Function to move the given individual into the store, the individual is
+        rebound to its new slot.
+
+        :param individual: (Individual) individual to move into the store
+        :return: (number) slot of the individual
+        """
+        slot = self.__allocate()
+        record, record_slot = individual.get_store(), individual.get_slot()
+
+        for name, _, _ in self.COLUMNS:
+            getattr(self, name)[slot] = getattr(record, name)[record_slot]
+
+        self.in_use[slot] = True
+        self.individuals[slot] = individual
+        self.counter.add(self.state[slot], self.pop_age_group[slot])
+        self.susceptible_strata.add(self, slot)
+        individual.set_store(self, slot)
+        return slot
+
+    def detach(self, individual):
+        """
+        Function to move the given individual out of the store, its slot is
+        released for re-use.
+
+        :param individual: (Individual) individual to move out of the store
+        """
+        slot = individual.get_slot()
+        record = DetachedRecord(**{name: getattr(self, name)[slot] for name, _, _ in self.COLUMNS})
+        individual.set_store(record, 0)
+        self.counter.add(self.state[slot], self.pop_age_group[slot], -1)
+        self.susceptible_strata.remove(self, slot)
+
+        for name, _, default in self.COLUMNS:
+            getattr(self, name)[slot] = default
+
+        self.in_use[slot] = False
+        self.individuals[slot] = None
+        self._free_slots.append(slot)
+
+    def set_disease_state(self, slot: int, state_code: int):
+        """
+        Function to change the disease state of the individual in the given slot.
+
+        :param slot: (number) slot of the individual
+        :param state_code: (number) code of the new disease state
+        """
+        self.counter.move(self.state[slot], self.pop_age_group[slot], state_code, self.pop_age_group[slot])
+        self.susceptible_strata.remove(self, slot)
+
+        was_infectious, is_infectious = self.__is_infectious[self.state[slot]], self.__is_infectious[state_code]
+        if was_infectious != is_infectious and self.household[slot] >= 0:
+            self.__count_infectious(self.household[slot], 1 if is_infectious else -1)
+
+        self.state[slot] = state_code
+        self.susceptible_strata.add(self, slot)
+
+    def set_population_age_group(self, slot: int, age_group: int):
+        """
+        Function to change the population age group of the individual in the given slot.
+
+        :param slot: (number) slot of the individual
+        :param age_group: (number) new population age group
+        """
+        self.counter.move(self.state[slot], self.pop_age_group[slot], self.state[slot], age_group)
+        self.susceptible_strata.remove(self, slot)
+        self.pop_age_group[slot] = age_group
+        self.susceptible_strata.add(self, slot)
+
+    def set_nursing_home(self, slot: int, nursing_home: bool):
+        """
+        Function to change the nursing home flag of the individual in the given slot.
+
+        :param slot: (number) slot of the individual
+        :param nursing_home: (bool) whether the individual resides in a nursing home
+        """
+        self.susceptible_strata.remove(self, slot)
+        self.nursing_home[slot] = nursing_home
+        self.susceptible_strata.add(self, slot)
+
+    def set_household(self, slot: int, household_index: int):
+        """
+        Function to change the household of the individual in the given slot.
+
+        :param slot: (number) slot of the individual
+        :param household_index: (number) index of the new household, -1 if the individual has no household
+        """
+        if self.__is_infectious[self.state[slot]]:
+            if self.household[slot] >= 0:
+                self.__count_infectious(self.household[slot], -1)
+            if household_index >= 0:
+                self.__count_infectious(household_index, 1)
+
+        self.household[slot] = household_index
+
+    def active_slots(self):
+        """
+        Function to retrieve the slots that are currently occupied.
+
+        :return: (ndarray) occupied slots
+        """
+        return np.flatnonzero(self.in_use[:self._size])
+
+    def slots_for_disease_state(self, state_code: int, in_household=False):
+        """
+        Function to retrieve the occupied slots of individuals in the given disease state.
+
+        :param state_code: (number) code of the disease state
+        :param in_household: (bool) whether to only consider individuals that belong to a household
+        :return: (ndarray) matching slots
+        """
+        mask = self.in_use[:self._size] & (self.state[:self._size] == state_code)
+        if in_household:
+            mask &= self.household[:self._size] >= 0
+
+        return np.flatnonzero(mask)
+
+    def __count_infectious(self, household_index, num):
+        household_index = int(household_index)
+        count = self.infectious_households.get(household_index, 0) + num
+
+        if count > 0:
+            self.infectious_households[household_index] = count
+        else:
+            del self.infectious_households[household_index]
+
+    def __allocate(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        if self._size == self._capacity:
+            self.__grow(2 * self._capacity)
+
+        self._size += 1
+        return self._size - 1
+
+    def __grow(self, capacity):
+        if self._fixed_capacity:
+            raise ValueError(f"Unable to grow the population store beyond its fixed capacity of {self._capacity} slots.")
+
+        extra = capacity - self._capacity
+        self.in_use = np.concatenate([self.in_use, np.zeros(extra, dtype=np.bool_)])
+        self.individuals.extend([None] * extra)
+
+        for name, dtype, default in self.COLUMNS:
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(extra, default, dtype=dtype)]))
+
+        self._capacity = capacity
+
+
+class DetachedRecord:
+    """
+    Single-row stand-in for the store, holds the attributes of an individual
+    that is not (or no longer) part of a population.
+    """
+    __slots__ = tuple(name for name, _, _ in PopulationStore.COLUMNS)
+
+    def __init__(self, **values):
+        for name, _, default in PopulationStore.COLUMNS:
+            setattr(self, name, [values.get(name, default)])
+
+    def set_disease_state(self, slot: int, state_code: int):
+        self.state[slot] = state_code
+
+    def set_population_age_group(self, slot: int, age_group: int):
+        self.pop_age_group[slot] = age_group
+
+    def set_nursing_home(self, slot: int, nursing_home: bool):
+        self.nursing_home[slot] = nursing_home
+
+    def set_household(self, slot: int, household_index: int):
+        self.household[slot] = household_index
+
+
+class SlotIndex:
+    """
+    Set of slots that supports insertion, removal and uniform sampling in constant time (per element).
+    """
+    def __init__(self):
+        self.__slots = []
+        self.__positions = dict()
+
+    def __len__(self):
+        return len(self.__slots)
+
+    def get(self, position: int) -> int:
+        return self.__slots[position]
+
+    def add(self, slot: int):
+        self.__positions[slot] = len(self.__slots)
+        self.__slots.append(slot)
+
+    def remove(self, slot: int):
+        # Swap the last element into the position of the removed slot
+        position = self.__positions.pop(slot)
+        last = self.__slots.pop()
+
+        if last != slot:
+            self.__slots[position] = last
+            self.__positions[last] = position
+
+    def sample(self, num: int, rng) -> list:
+        """
+        Function to draw a number of distinct slots, uniformly at random.
+
+        :param num: (number) number of slots to draw
+        :param rng: (numpy.random.Generator) random generator to draw with
+        :return: (list) drawn slots
+        """
+        return [self.__slots[position] for position in rng.choice(len(self.__slots), size=num, replace=False)]
+
+    def to_array(self):
+        return np.array(self.__slots, dtype=np.int64)
+
+
+class SusceptibleStrata:
+    """
+    Index of the susceptible individuals in the store, grouped by stratum, i.e., by
+    (population age group, nursing home flag).
+    """
+    def __init__(self):
+        self.__strata = dict()
+
+    def __len__(self):
+        return sum(len(index) for index in self.__strata.values())
+
+    def items(self):
+        """
+        Function to iterate the non-empty strata.
+
+        :return: (list) of ((age group, nursing home), SlotIndex) tuples
+        """
+        return [(stratum, index) for stratum, index in self.__strata.items() if len(index) > 0]
+
+    def add(self, store, slot: int):
+        if store.state[slot] == DiseaseStateEnum.STATE_SUSCEPTIBLE.value:
+            stratum = (int(store.pop_age_group[slot]), bool(store.nursing_home[slot]))
+            if stratum not in self.__strata:
+                self.__strata[stratum] = SlotIndex()
+
+            self.__strata[stratum].add(int(slot))
+
+    def remove(self, store, slot: int):
+        if store.state[slot] == DiseaseStateEnum.STATE_SUSCEPTIBLE.value:
+            self.__strata[(int(store.pop_age_group[slot]), bool(store.nursing_home[slot]))].remove(int(slot))
+
+    def sample(self, num: int, rng) -> list:
+        """
+        Function to draw a number of distinct susceptible slots, uniformly at random over all strata.
+
+        :param num: (number) number of slots to draw
+        :param rng: (numpy.random.Generator) random generator to draw with
+        :return: (list) drawn slots
+        """
+        indexes = [index for _, index in self.items()]
+        ends = np.cumsum([len(index) for index in indexes])
+        if num == 0 or len(indexes) == 0:
+            return []
+
+        # Positions are drawn over the concatenation of the strata, and mapped onto the stratum they fall in
+        positions = rng.choice(int(ends[-1]), size=num, replace=False)
+        strata = np.searchsorted(ends, positions, side="right")
+        return [indexes[stratum].get(int(position - ends[stratum] + len(indexes[stratum])))
+                for position, stratum in zip(positions, strata)]
+
+
+class StateCounter:
+    """
+    Number of individuals per (disease state, population age group), maintained incrementally
+    by the store as individuals are added, removed or change state or age group.
+    """
+    NUM_STATES = max(state.value for state in DiseaseStateEnum) + 1
+
+    def __init__(self, num_age_groups=1):
+        self.__counts = np.zeros((self.NUM_STATES, num_age_groups), dtype=np.int64)
+
+    def add(self, state_code: int, age_group: int, num=1):
+        """
+        Function to add (or remove, for negative numbers) individuals to the given disease state and age group.
+        """
+        if age_group >= self.__counts.shape[1]:
+            self.__counts = self.__pad(self.__counts, age_group + 1)
+
+        self.__counts[state_code, age_group] += num
+
+    def move(self, from_state_code: int, from_age_group: int, to_state_code: int, to_age_group: int):
+        """
+        Function to move an individual from one (disease state, age group) to another.
+        """
+        self.add(from_state_code, from_age_group, -1)
+        self.add(to_state_code, to_age_group)
+
+    def snapshot(self):
+        """
+        Function to take a snapshot of the counts.
+
+        :return: (ndarray) copy of the counts, indexed by disease state code and age group
+        """
+        return self.__counts.copy()
+
+    def check_consistency(self, store: PopulationStore):
+        """
+        Function to verify the counts against a full rescan of the store, intended for debugging.
+
+        :param store: (PopulationStore) store to rescan
+        """
+        rescan = self.rescan(store)
+        num_age_groups = max(rescan.shape[1], self.__counts.shape[1])
+        rescan, counts = self.__pad(rescan, num_age_groups), self.__pad(self.__counts, num_age_groups)
+        mismatch = np.argwhere(rescan != counts)
+
+        if len(mismatch) > 0:
+            state_code, age_group = mismatch[0]
+            raise ValueError(f"Population summary out of sync for {len(mismatch)} entries, e.g., state {state_code} "
+                             f"and age group {age_group}: counted {counts[state_code, age_group]}, "
+                             f"rescanned {rescan[state_code, age_group]}")
+
+    @staticmethod
+    def rescan(store: PopulationStore):
+        """
+        Function to count the individuals per (disease state, age group) in a single pass over the store.
+
+        :param store: (PopulationStore) store to count
+        :return: (ndarray) counts, indexed by disease state code and age group
+        """
+        slots = store.active_slots()
+        states = store.state[slots].astype(np.int64)
+        age_groups = store.pop_age_group[slots].astype(np.int64)
+        num_age_groups = int(age_groups.max()) + 1 if len(age_groups) > 0 else 1
+
+        counts = np.bincount(states * num_age_groups + age_groups, minlength=StateCounter.NUM_STATES * num_age_groups)
+        return counts.reshape(StateCounter.NUM_STATES, num_age_groups)
+
+    @staticmethod
+    def __pad(counts, num_age_groups):
+        return np.pad(counts, ((0, 0), (0, num_age_groups - counts.shape[1])))
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from population.population import Population
 from disease.disease_state import DiseaseStateEnum
 
@@ -6,41 +5,41 @@ from disease.disease_state import DiseaseStateEnum
 class PopulationSummary:
     """
     Class that summarize some of the most prevalent metrics of the population, class
-    is leveraged as a cache to avoid repeated computation.
+    is leveraged as a cache to avoid repeated computation. The summary is a snapshot of the
+    counters that the population store maintains incrementally, unless the counts are given (e.g., summed over
+    the shards of a sharded run).
     """
-    def __init__(self, population: Population, initial_summary):
+    def __init__(self, population: Population, initial_summary, counts=None):
         self._initial_summary = initial_summary
         self._population = population
-        self._num_susceptible = 0
-
-        self._num_per_disease_state = defaultdict(int)
-        self._num_per_disease_state_per_age_group = defaultdict(lambda: defaultdict(int))
-        self._total_per_age_group = defaultdict(int)
-        self._prepare()
+        self._counts = counts if counts is not None else population.get_store().counter.snapshot()
 
     def num_for_disease_state_gen(self, disease_state: DiseaseStateEnum):
-        for age_group in self._num_per_disease_state_per_age_group[disease_state]:
-            yield (age_group, self._num_per_disease_state_per_age_group[disease_state][age_group])
+        for age_group, num in enumerate(self._counts[disease_state.value]):
+            if num > 0:
+                yield (age_group, int(num))
 
     def get_num_for_disease_state_per_ag(self, disease_state: DiseaseStateEnum, age_group: int) -> int:
-        return self._num_per_disease_state_per_age_group[disease_state][age_group]
+        if age_group >= self._counts.shape[1]:
+            return 0
+
+        return int(self._counts[disease_state.value, age_group])
 
     def get_total_for_disease_state(self, disease_state: DiseaseStateEnum) -> int:
-        return self._num_per_disease_state[disease_state]
+        return int(self._counts[disease_state.value].sum())
 
     def get_total(self, age_group):
-        return self._total_per_age_group[age_group]
-
-    def get_adjustment(self, age_group):
-        return self._initial_summary[age_group-1] / max(self._total_per_age_group[age_group], 1)
+        if age_group >= self._counts.shape[1]:
+            return 0
 
-    def _prepare(self):
-        for individual in self._population.individual_gen():
+        return int(self._counts[:, age_group].sum())
 
-            self._total_per_age_group[individual.get_population_age_group()] += 1
-
-            # Increment number with disease state
-            self._num_per_disease_state[individual.get_disease_sate()] += 1
-
-            # Increment number with disease state, grouped by age group
-            self._num_per_disease_state_per_age_group[individual.get_disease_sate()][individual.get_population_age_group()] += 1
\ No newline at end of file
+    def get_adjustment(self, age_group):
+        return self._initial_summary[age_group-1] / max(self.get_total(age_group), 1)
+
+    def check_consistency(self):
+        """
+        Function to verify the counters of the population against a full rescan, intended for debugging.
+        """
+        store = self._population.get_store()
+        store.counter.check_consistency(store)
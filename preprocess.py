@@ -0,0 +1,22 @@
+from events.table import EVENT_LOG_COLUMNS, POPULATION_COLUMNS, preprocess
+from libraries.args_handler import ConfigHandler
+
+
+def main():
+    """
+    Entry point to convert the initial population and event log of a configuration into their binary
+    form. Simulations that reference the same inputs use the binary form automatically, as long as the
+    inputs and date format remain unchanged.
+    """
+    config = ConfigHandler()
+    config.load_from_args()
+    player_config = config.get_simulation_config().get("log_player")
+    date_format = config.get_global_config().get("date_format", "%Y-%m-%d")
+
+    for location, columns in [(player_config.get("initial_population"), POPULATION_COLUMNS),
+                              (player_config.get("event_log"), EVENT_LOG_COLUMNS)]:
+        print(f"Preprocessed '{location}' into '{preprocess(location, columns, date_format)}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ from dateutil.relativedelta import relativedelta
 from population.summary import PopulationSummary
 from disease.disease_state import DiseaseStateEnum
 import os
+import queue
+import threading
 
 
 def _pad(target_str, dest_len):
@@ -15,6 +17,13 @@ def _pad(target_str, dest_len):
 
 
 class Reporter:
+    """
+    Reporter of the progress of the simulation. Output is handed to a sink worker thread through a bounded queue,
+    such that the simulation does not wait for the sink (e.g., the console or a file on a network filesystem).
+    Reports are rendered by the worker from a snapshot of the counters. Repeated messages are coalesced, messages
+    that do not fit the queue are dropped and counted instead. A failure of the sink is raised on the next
+    submission (or flush) of output.
+    """
     def __init__(self, config, global_config):
         self._start_time = 0
         self._end_time = 0
@@ -22,6 +31,9 @@ class Reporter:
         self._error_count = 0
         self._event_count_per_type = defaultdict(int)
         self._error_count_per_type = defaultdict(int)
+        self._rejected_count_per_type = defaultdict(int)
+        self._prefetch_stats = None
+        self._profile_summary = []
 
         self._initial_iteration = None
         self._iteration = None
@@ -31,7 +43,7 @@ class Reporter:
         sink_name = config.get("sink", "console")
         sink_config = config.get("sinks").get(sink_name)
         sink_config = sink_config if sink_config else {}
-        self._sink = get_sink_module(sink_name)(sink_config)
+        self._sink = get_sink_module(sink_name)(sink_config, global_config)
         self._sink.initialize()
 
         # Reporting
@@ -39,6 +51,8 @@ class Reporter:
         self._reporting_period_in_days = config.get("report_period_in_days")
         self._log_level = config.get("log_level", [])
         self._line_length = config.get("line_length", 100)
+        self._queue_size = config.get("queue_size", 1024)
+        self._reset_worker()
 
         # Disease
         self.__date_format = global_config.get("date_format", "%Y-%m-%d")
@@ -51,11 +65,11 @@ class Reporter:
 
     def error(self, message):
         if "error" in self._log_level:
-            self._sink.write("[ERROR] " + message)
+            self._submit_message("[ERROR] " + message)
 
     def info(self, message):
         if "info" in self._log_level:
-            self._sink.write("[INFO] " + message)
+            self._submit_message("[INFO] " + message)
 
     def set_population_summary(self, summary: PopulationSummary):
         self._population_summary = summary
@@ -67,79 +81,247 @@ class Reporter:
                 relativedelta(self._initial_iteration, self._iteration).days % self._reporting_period_in_days == 0:
             self.report()
 
-    def add_event(self, event_type):
-        self._event_count += 1
-        self._event_count_per_type[event_type] += 1
+    def add_event(self, event_type, num=1):
+        self._event_count += num
+        self._event_count_per_type[event_type] += num
 
     def add_error(self, event_type):
         self._error_count += 1
         self._error_count_per_type[event_type] += 1
 
+    def add_rejected(self, event_type):
+        # Rejected adds, i.e., of individuals that are already in the population, count as errors of their own
+        self._error_count += 1
+        self._rejected_count_per_type[event_type] += 1
+
+    def get_counts(self, event_types) -> list:
+        """
+        Function to retrieve the event and error counters, e.g., to sum them over the shards of a sharded run.
+
+        :param event_types: (list) event types to retrieve the counters of
+        :return: (list) total number of events and errors, followed by the number of events, errors and rejected
+            events per type
+        """
+        return [self._event_count, self._error_count] + \
+            [self._event_count_per_type.get(event_type, 0) for event_type in event_types] + \
+            [self._error_count_per_type.get(event_type, 0) for event_type in event_types] + \
+            [self._rejected_count_per_type.get(event_type, 0) for event_type in event_types]
+
+    def set_counts(self, counts, event_types):
+        """
+        Function to replace the event and error counters, e.g., by their sums over the shards of a sharded run. The
+        errors of individual events are kept as is.
+
+        :param counts: (list) counters, as retrieved by get_counts
+        :param event_types: (list) event types of the counters
+        """
+        num_types = len(event_types)
+        counts = [int(count) for count in counts]
+        self._event_count, self._error_count = counts[0], counts[1]
+        for index, counters in enumerate([self._event_count_per_type, self._error_count_per_type,
+                                          self._rejected_count_per_type]):
+            for event_type, count in zip(event_types, counts[2 + index * num_types:2 + (index + 1) * num_types]):
+                if count > 0 or event_type in counters:
+                    counters[event_type] = count
+
+    def set_prefetch_stats(self, average_depth, stall_time):
+        self._prefetch_stats = (average_depth, stall_time)
+
+    def set_profile_summary(self, lines: list):
+        self._profile_summary = lines
+
     def final_report(self):
         self.report(True)
 
     def teardown(self):
-        self._sink.close()
+        """
+        Function to write the pending output and stop the sink worker, after which the sink is closed.
+        """
+        try:
+            self.flush()
+        finally:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+                self._worker = None
+
+            self._sink.close()
+
+    def flush(self):
+        """
+        Function to wait until the sink worker has written all of the submitted output.
+        """
+        self._submit_repetitions()
+        if self._worker is not None:
+            self._queue.join()
+
+        self._raise_sink_error()
 
     def report(self, force=False):
         if force or self._enabled:
-            self._sink.write(self._format_report())
-
-    def _format_report(self):
-        self._end_time = time.time()
+            # Reports are never dropped, they are infrequent compared to messages
+            self._submit_repetitions()
+            self._raise_sink_error()
+            self._start_worker()
+            self._queue.put(self._snapshot())
+
+    def __getstate__(self):
+        # Threads can not be pickled, the pending output is written such that the sink is checkpointed consistently
+        self.flush()
+        state = self.__dict__.copy()
+        for attribute in ["_queue", "_worker", "_num_dropped", "_dropped_lock", "_sink_error"]:
+            del state[attribute]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_worker()
+
+    def _reset_worker(self):
+        self._queue = queue.Queue(maxsize=self._queue_size)
+        self._worker = None
+        self._sink_error = None
+
+        # Messages are dropped by the simulation and reported by the sink worker
+        self._num_dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._last_message = None
+        self._num_repeated = 0
+
+    def _start_worker(self):
+        # The worker is started on first use, e.g., not before a loaded simulation forks its ensemble workers
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._write, name="reporter-sink", daemon=True)
+            self._worker.start()
+
+    def _submit_message(self, message):
+        # Consecutive identical messages are submitted once, followed by the number of repetitions
+        if message == self._last_message:
+            self._num_repeated += 1
+            return
+
+        self._submit_repetitions()
+        self._last_message = message
+        self._submit(message)
+
+    def _submit_repetitions(self):
+        if self._num_repeated > 0:
+            self._submit(f"{self._last_message} (repeated {self._num_repeated} more times)")
+
+        self._last_message, self._num_repeated = None, 0
+
+    def _submit(self, message):
+        self._raise_sink_error()
+        self._start_worker()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._dropped_lock:
+                self._num_dropped += 1
+
+    def _raise_sink_error(self):
+        if self._sink_error is not None:
+            sink_error, self._sink_error = self._sink_error, None
+            raise sink_error
+
+    def _snapshot(self) -> dict:
+        """
+        Function to capture the counters of a report, the report itself is rendered by the sink worker.
+
+        :return: (dict) snapshot of the counters
+        """
+        return {
+            "time": time.time(),
+            "iteration": self._iteration,
+            "population_summary": self._population_summary,
+            "event_count": self._event_count,
+            "event_count_per_type": dict(self._event_count_per_type),
+            "error_count": self._error_count,
+            "error_count_per_type": dict(self._error_count_per_type),
+            "rejected_count_per_type": dict(self._rejected_count_per_type),
+            "prefetch_stats": self._prefetch_stats,
+            "profile_summary": list(self._profile_summary),
+        }
+
+    def _write(self):
+        """
+        Function that runs the sink worker, i.e., writes the submitted messages and renders the submitted reports.
+        The worker keeps running when the sink fails, such that the simulation never waits for it.
+        """
+        while True:
+            item = self._queue.get()
+            try:
+                if item is not None:
+                    self._sink.write(item if isinstance(item, str) else self._format_report(item))
+
+                # Dropped messages are reported once the queue runs empty
+                if self._queue.empty() or item is None:
+                    with self._dropped_lock:
+                        num_dropped, self._num_dropped = self._num_dropped, 0
+
+                    if num_dropped > 0:
+                        self._sink.write(f"[INFO] Dropped {num_dropped} messages, the reporter could not keep up.")
+            except Exception as e:
+                self._sink_error = e
+            finally:
+                self._queue.task_done()
+
+            if item is None:
+                return
+
+    def _format_report(self, snapshot) -> str:
+        """
+        Function to render a report from a snapshot of the counters.
+
+        :param snapshot: (dict) snapshot of the counters (see _snapshot)
+        :return: (str) rendered report
+        """
+        self._end_time = snapshot["time"]
         elapsed_time = self._end_time - self._start_time
         elapsed_time_formatted = str(dt.timedelta(seconds=elapsed_time))
-        iteration = self._iteration.strftime(self.__date_format)
+        iteration = snapshot["iteration"].strftime(self.__date_format)
+        summary = snapshot["population_summary"]
+        line, thin_line = "=" * self._line_length, "-" * self._line_length
 
-        msg = "\n"
-        msg += "=" * self._line_length + "\n"
-        msg += f"Iteration: {iteration} \n"
-        msg += "=" * self._line_length + "\n"
-        msg += "Population: Current distribution" + "\n"
-        msg += '=' * self._line_length + "\n"
-
-        msg += _pad("Age group", 12) + " "
-        for disease_state in DiseaseStateEnum:
-            msg += _pad(disease_state.name.lower().split("_")[1], 12) + " "
-
-        msg += "\n"
-        msg += '-' * self._line_length + "\n"
+        lines = ["", line, f"Iteration: {iteration} ", line, "Population: Current distribution", line]
+        lines.append(_pad("Age group", 12) + " " + "".join(_pad(disease_state.name.lower().split("_")[1], 12) + " "
+                                                           for disease_state in DiseaseStateEnum))
+        lines.append(thin_line)
 
         for ag in range(1, self.__num_pop_age_groups + 1):
-            msg += _pad(str(ag), 12) + " "
-
-            for disease_state in DiseaseStateEnum:
-                msg += _pad(str(self._population_summary.get_num_for_disease_state_per_ag(disease_state, ag)), 12) + " "
-
-            msg += "\n"
-
-        msg += '-' * self._line_length + "\n"
-        msg += _pad("total", 12) + " "
-        for disease_state in DiseaseStateEnum:
-            msg += _pad(str(self._population_summary.get_total_for_disease_state(disease_state)), 12) + " "
-
-        msg += "\n"
-
-        msg += "=" * self._line_length + "\n"
-
-        msg += f"Log: Processed {self._event_count} events in {elapsed_time}s.\n"
-        msg += '-' * self._line_length + "\n"
-
-        for event_type in self._event_count_per_type:
-            msg += f"\tProcessed {self._event_count_per_type[event_type]} {event_type} events.\n"
-
-        msg += "-" * self._line_length + "\n"
-        msg += f"Elapsed Time: {elapsed_time_formatted}\n"
-        msg += '-' * self._line_length + "\n"
-        msg += f"Total events: {self._event_count}\n"
-        msg += f"Total errors: {self._error_count}\n"
-
-        for event_type in self._error_count_per_type:
-            msg += f"\t {self._error_count_per_type[event_type]} errors in {event_type} events.\n"
-
-        msg += "=" * self._line_length + "\n"
-
-        return msg
+            lines.append(_pad(str(ag), 12) + " " + "".join(
+                _pad(str(summary.get_num_for_disease_state_per_ag(disease_state, ag)), 12) + " "
+                for disease_state in DiseaseStateEnum))
+
+        lines.append(thin_line)
+        lines.append(_pad("total", 12) + " " + "".join(_pad(str(summary.get_total_for_disease_state(disease_state)), 12) + " "
+                                                       for disease_state in DiseaseStateEnum))
+        lines.append(line)
+
+        lines.append(f"Log: Processed {snapshot['event_count']} events in {elapsed_time}s.")
+        if snapshot["prefetch_stats"] is not None:
+            average_depth, stall_time = snapshot["prefetch_stats"]
+            lines.append(f"Log: Prefetched {average_depth:.1f} days on average, stalled for {stall_time:.3f}s.")
+
+        lines.append(thin_line)
+        for event_type, num in snapshot["event_count_per_type"].items():
+            lines.append(f"\tProcessed {num} {event_type} events.")
+
+        lines += [thin_line, f"Elapsed Time: {elapsed_time_formatted}", thin_line]
+        lines.append(f"Total events: {snapshot['event_count']}")
+        lines.append(f"Total errors: {snapshot['error_count']}")
+        for event_type, num in snapshot["error_count_per_type"].items():
+            lines.append(f"\t {num} errors in {event_type} events.")
+
+        for event_type, num in snapshot["rejected_count_per_type"].items():
+            lines.append(f"\t {num} {event_type} events rejected, individual already in population.")
+
+        if snapshot["profile_summary"]:
+            lines += [line] + snapshot["profile_summary"]
+
+        lines.append(line)
+        return "\n".join(lines) + "\n"
 
 
 def get_sink_module(sink_name):
@@ -0,0 +1,235 @@
+import argparse
+import csv
+import heapq
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import connection
+from disease.disease_state import DiseaseStateEnum
+from ensemble import OUTPUT_PATHS, apply_overrides, split_config, tagged_output_path
+from events.compiled_log import EVENT_TYPES
+from events.table import EVENT_LOG_COLUMNS, POPULATION_COLUMNS, BinaryTable, load_binary
+from libraries.args_handler import get_config
+from libraries.sharding import Shard, ShardExchange, partition
+from population.store import StateCounter
+from simulation import Simulation
+
+# Logs of the individuals that are merged over the shards, as paths into the configuration, along with their date column
+MERGED_LOGS = [
+    (("simulation", "disease", "logger", "tans_log_file_name"), 0),
+    (("simulation", "disease", "logger", "disease_log_file_name"), 1),
+]
+
+# Tables that are loaded by the parent process, the forked workers take their shard of them
+_population = None
+_event_log = None
+
+
+def main():
+    """
+    Entry point to run a single simulation on multiple cores. The households are partitioned into shards, each of
+    which is simulated by a worker process. The workers only synchronize on the population summary (and on influx
+    and termination), which is summed over the shards once per simulated day. The outputs of a shard are written to
+    a 'shard-<index>' directory next to the configured output locations, the transmission and disease logs of the
+    shards are merged into the configured locations afterwards.
+    """
+    global _population, _event_log
+
+    args = process_args_as_dict()
+    config = get_config(args.get("conf"))
+    simulation_config, global_config = split_config(config)
+    date_format = global_config.get("date_format", "%Y-%m-%d")
+    num_shards = args.get("shards")
+
+    player_config = simulation_config.get("log_player")
+    _population = load_table(player_config.get("initial_population"), POPULATION_COLUMNS, date_format)
+    _event_log = load_table(player_config.get("event_log"), EVENT_LOG_COLUMNS, date_format)
+    population_rows, event_rows, loads = partition(_population, _event_log, num_shards)
+    for index, load in enumerate(loads):
+        print(f"[SHARDS] Shard {index}: {len(population_rows[index])} individuals, {len(event_rows[index])} events, "
+              f"{load:.0f} slots.")
+
+    print(f"[SHARDS] Imbalance of the shards {max(loads) / max(loads.mean(), 1):.3f} (largest over mean).")
+    sys.stdout.flush()
+
+    # Counts are exchanged for all age groups that occur in the inputs
+    num_age_groups = 1 + max(int(_population.get_column("age_group_pop").max(initial=0)),
+                             int(_event_log.get_column("age_group_pop").max(initial=0)))
+    context = multiprocessing.get_context("fork")
+    # Exchanges are either the population summary, or the event and error counters (see Reporter.get_counts)
+    exchange = ShardExchange(num_shards, max(StateCounter.NUM_STATES * num_age_groups, 2 + 3 * len(EVENT_TYPES)),
+                             context)
+    shards = [Shard(index, int(load), num_age_groups, exchange, global_config["seed"])
+              for index, load in enumerate(loads)]
+
+    start = time.time()
+    workers = []
+    for shard in shards:
+        task = split_config(apply_overrides(config, shard_overrides(config, shard.get_index())))
+        workers.append(context.Process(target=_run_shard, name=f"shard-{shard.get_index()}", args=(
+            shard, population_rows[shard.get_index()], event_rows[shard.get_index()]) + task))
+        workers[-1].start()
+
+    # Workers that wait for an exchange are released when one of them fails
+    failed = False
+    remaining = {worker.sentinel: worker for worker in workers}
+    while remaining:
+        for sentinel in connection.wait(list(remaining)):
+            worker = remaining.pop(sentinel)
+            worker.join()
+            if worker.exitcode != 0 and not failed:
+                print(f"[SHARDS] Worker of {worker.name} failed (exit code {worker.exitcode}).")
+                exchange.abort()
+                failed = True
+
+    if not failed:
+        print(f"[SHARDS] Simulation finished in {time.time() - start:.1f}s, {summarize(shards)}.")
+        for path, date_column in MERGED_LOGS:
+            merge_logs(config, path, date_column, num_shards, date_format)
+
+    for shard in shards:
+        shard.release()
+
+    exchange.release()
+    if failed:
+        sys.exit(1)
+
+
+def _run_shard(shard: Shard, population_rows, event_rows, simulation_config, global_config):
+    start = time.time()
+    simulation_config["log_player"]["initial_population"] = _population.take(population_rows)
+    simulation_config["log_player"]["event_log"] = _event_log.take(event_rows)
+    Simulation(simulation_config, global_config, shard).run()
+    print(f"[SHARDS] Shard {shard.get_index()} finished in {time.time() - start:.1f}s.", flush=True)
+
+
+def shard_overrides(config, index) -> dict:
+    """
+    Function to compose the configuration overrides of a shard, i.e., its output locations. Shards do not
+    checkpoint and read their part of the inputs as a whole. The simulation log is global, it is written by the
+    first shard. Other shards only report errors.
+
+    :param config: (dict) configuration of the simulation
+    :param index: (number) index of the shard
+    :return: (dict) overrides, configuration path to value
+    """
+    tag = f"shard-{index}"
+    overrides = {
+        ("simulation", "checkpoint_file"): None,
+        ("simulation", "checkpoint_period_in_days"): 0,
+        ("simulation", "log_player", "prefetch_days"): 0,
+    }
+    for path in OUTPUT_PATHS:
+        file_name = config
+        for key in path:
+            file_name = file_name.get(key, {}) if isinstance(file_name, dict) else None
+
+        if file_name and path != ("simulation", "checkpoint_file"):
+            overrides[path] = tagged_output_path(file_name, tag)
+
+    # Rows of a result database are tagged with the shard, rather than merged
+    logger_config = config.get("simulation", {}).get("disease", {}).get("logger", {})
+    if logger_config.get("database"):
+        overrides[("simulation", "disease", "logger", "run_id")] = f"{logger_config.get('run_id', 'default')}-{tag}"
+
+    if index == 0:
+        overrides[("simulation", "disease", "logger", "sim_log_file_name")] = logger_config.get("sim_log_file_name")
+    else:
+        overrides[("simulation", "disease", "logger", "sim_log_file_name")] = None
+        overrides[("simulation", "reporter", "sink")] = "console"
+        overrides[("simulation", "reporter", "enabled")] = False
+        overrides[("simulation", "reporter", "log_level")] = ["error"]
+
+    return overrides
+
+
+def load_table(location, columns, date_format) -> BinaryTable:
+    """
+    Function to load a csv-formatted table as a whole, its binary form is used when it is fresh (see preprocess.py).
+
+    :param location: (str) location of the csv file
+    :param columns: (list) columns of the table, i.e., column name and type
+    :param date_format: (str) date format to use when parsing dates
+    :return: (BinaryTable) table
+    """
+    table = load_binary(location, columns, date_format)
+    return table if table is not None else BinaryTable.from_csv(location, columns, date_format)
+
+
+def summarize(shards) -> str:
+    """
+    Function to summarize the final population of the shards, as read from their population stores.
+
+    :param shards: (list) shards of the run
+    :return: (str) number of individuals per disease state
+    """
+    counts = np.zeros(StateCounter.NUM_STATES, dtype=np.int64)
+    for shard in shards:
+        # Views on the shared memory are dropped, such that it can be released
+        columns = shard.map_store()
+        counts += np.bincount(columns["state"][columns["in_use"]], minlength=StateCounter.NUM_STATES)
+        del columns
+
+    return ", ".join(f"{state.name.lower()} {counts[state.value]}" for state in DiseaseStateEnum)
+
+
+def merge_logs(config, path, date_column, num_shards, date_format):
+    """
+    Function to merge a csv-formatted log of the shards into the configured location, ordered by date. Rows of the
+    same date are ordered by shard. The logs of the shards are removed afterwards.
+
+    :param config: (dict) configuration of the simulation
+    :param path: (tuple) path of the location of the log in the configuration
+    :param date_column: (number) index of the date column of the log
+    :param num_shards: (number) number of shards
+    :param date_format: (str) date format of the log
+    """
+    logger_config = config.get("simulation", {}).get("disease", {}).get("logger", {})
+    file_name = logger_config.get(path[-1])
+    if not logger_config.get("enabled", False) or logger_config.get("database") or not file_name:
+        return
+
+    parse_date = lru_cache(maxsize=None)(lambda value: datetime.strptime(value, date_format))
+    shard_file_names = [tagged_output_path(file_name, f"shard-{index}") for index in range(num_shards)]
+    shard_files = [open(shard_file_name, newline="") for shard_file_name in shard_file_names]
+    try:
+        readers = [csv.reader(shard_file) for shard_file in shard_files]
+        header = [next(reader) for reader in readers][0]
+        with open(file_name, "w") as out_file:
+            writer = csv.writer(out_file)
+            writer.writerow(header)
+            writer.writerows(heapq.merge(*readers, key=lambda row: parse_date(row[date_column])))
+    finally:
+        for shard_file in shard_files:
+            shard_file.close()
+
+    for shard_file_name in shard_file_names:
+        os.remove(shard_file_name)
+        if not os.listdir(os.path.dirname(shard_file_name)):
+            os.rmdir(os.path.dirname(shard_file_name))
+
+
+def process_args_as_dict():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--conf", "--config",
+        help="Location of the config file of the simulation",
+        required=True)
+
+    parser.add_argument(
+        "--shards",
+        help="Number of shards, i.e., worker processes, defaults to the number of cores",
+        type=int,
+        default=os.cpu_count())
+
+    return vars(parser.parse_args())  # Convert args to dict
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,24 @@
 import datetime as dt
+import signal
 from datetime import datetime
 
 from disease.disease import Disease
+from disease.logger import DiseaseLogger
+from libraries import checkpoint
+from libraries.profiler import Profiler
+from libraries.random_service import RandomService
 from population.population import Population
 from reporter import Reporter
+from events.compiled_log import EVENT_TYPES
 from events.log import EventLogPlayer
 from dateutil.relativedelta import relativedelta
 
 
 class Simulation:
     """
-    Class that represents the disease simulation.
+    Class that represents the disease simulation, of the whole population or of a shard of it (see sharded.py).
     """
-    def __init__(self, config, global_config):
+    def __init__(self, config, global_config, shard=None):
         # Parse configuration
         self.date_format = global_config.get("date_format", "%Y-%m-%d")
         self.simulation_start = datetime.strptime(config.get("start_date"), self.date_format)
@@ -21,6 +27,17 @@ class Simulation:
         self.num_influx_per_period = config.get("num_influx_per_period", 0)
         self.influx_period_in_days = config.get("influx_period_in_days", 1)
         self.terminate_prematurely = config.get("terminate_on_zero_infected", False)
+        self.simulation_curr = None
+        self.shard = shard
+        self.__parse_checkpoint_config(config)
+
+        # Initialize the random service, the single source of randomness of the simulation. Shards draw from
+        # a stream of their own.
+        seed = global_config["seed"] if shard is None else shard.get_seed(global_config["seed"])
+        self.random = RandomService(seed, global_config.get("rng_block_size", 65536))
+
+        # Initialize the profiler, which times the phases of each simulated day
+        self.profiler = Profiler(config.get("profiler", {}))
 
         # Initialize Reporter
         reporter_config = config.get("reporter")
@@ -28,7 +45,9 @@ class Simulation:
 
         # Initialize Population
         population_config = config.get("population")
-        self.population = Population(population_config, global_config)
+        store = shard.create_store() if shard is not None else None
+        self.population = Population(population_config, global_config, self.random, store)
+        self.population.set_current_date(self.simulation_start)
 
         # Initialize EventLogPlayer
         player_config = config.get("log_player")
@@ -36,21 +55,53 @@ class Simulation:
 
         # Initialize disease
         disease_config = config.get("disease")
-        self.disease = Disease(disease_config, global_config, self.population, self.reporter)
+        self.disease = Disease(disease_config, global_config, self.population, self.reporter, self.random, self.profiler)
+        if shard is not None:
+            self.disease.set_shard(shard)
+
+    def prepare_run(self, config, global_config):
+        """
+        Function to prepare the loaded simulation for a run with a different seed and outputs, e.g., in a forked
+        ensemble worker. Only the seed and the checkpoint, reporter and logger settings of the given configuration
+        are applied, the inputs remain those of the loaded simulation.
+
+        :param config: (dict) simulation configuration of the run
+        :param global_config: (dict) global configuration of the run
+        """
+        self.random.reseed(global_config["seed"])
+        self.__parse_checkpoint_config(config)
+        self.reporter = Reporter(config.get("reporter"), global_config)
+        self.log_player.set_reporter(self.reporter)
+        self.disease.set_reporter(self.reporter)
+        self.disease.set_logger(DiseaseLogger(config.get("disease").get("logger"), global_config))
+        self.profiler = Profiler(config.get("profiler", {}))
+        self.disease.set_profiler(self.profiler)
 
     def run(self):
         """
-        Function responsible for delegating the simulation.
+        Function responsible for delegating the simulation. A restored simulation continues from its checkpoint.
         """
-        simulation_curr = self.simulation_start
+        if self.simulation_curr is None:
+            self.simulation_curr = self.simulation_start
+            self.reporter.init(self.simulation_curr)
+            self.disease_influx(self.initial_influx, self.simulation_curr)
+            self.reporter.info(f"Initial influx of {self.initial_influx} individuals.")
+        else:
+            self.reporter.info(f"Resuming simulation at '{self.simulation_curr.strftime(self.date_format)}'.")
+
         terminated_prematurely = False
-        self.reporter.init(simulation_curr)
-        self.disease_influx(self.initial_influx, simulation_curr)
-        self.reporter.info(f"Initial influx of {self.initial_influx} individuals.")
+        checkpointed = False
+        self.__install_signal_handlers()
+        self.profiler.start_loop()
+
+        while self.simulation_curr <= self.simulation_end:
+            simulation_curr = self.simulation_curr
+            self.profiler.set_day(simulation_curr)
+            self.profiler.start("day")
 
-        while simulation_curr <= self.simulation_end:
-            # Set iteration for reporter
+            # Set iteration for reporter and age the population
             self.reporter.set_iteration(simulation_curr)
+            self.population.set_current_date(simulation_curr)
 
             # Check whether influx should occur
             if self.num_influx_per_period > 0 \
@@ -60,33 +111,137 @@ class Simulation:
 
             # Disease model
             self.disease.spread_disease(simulation_curr)
-            if self.terminate_prematurely and self.disease.get_num_infected() == 0:
+            if self.terminate_prematurely and self.get_num_infected() == 0:
+                self.profiler.stop("day")
                 self.reporter.info("Prematurely terminating simulation, number of infected individuals reached zero.")
                 terminated_prematurely = True
                 break
 
             # Fast forward
-            self.log_player.fast_forward(simulation_curr)
+            self.profiler.start("fast_forward")
+            num_events = self.log_player.fast_forward(simulation_curr)
+            self.profiler.stop("fast_forward", num_events)
+            self.profiler.stop("day", 1)
 
             # Prepare next iteration
-            simulation_curr += dt.timedelta(days=1)
+            self.simulation_curr += dt.timedelta(days=1)
+
+            # Checkpoint in between iterations, i.e., when the state of the simulation is consistent
+            checkpointed = self.__checkpoint_requested or (self.checkpoint_file is not None and
+                self.checkpoint_period_in_days > 0 and
+                (self.simulation_curr - self.simulation_start).days % self.checkpoint_period_in_days == 0)
+            if checkpointed:
+                self.checkpoint()
+
+            if self.__stop_requested:
+                self.profiler.stop_loop()
+                self.reporter.info(f"Received termination signal, stopped at checkpoint '{self.checkpoint_file}'.")
+                self.reporter.teardown()
+                self.disease.teardown()
+                self.log_player.teardown()
+                return
+
+        self.profiler.stop_loop()
+
+        # A checkpoint of the final state allows to extend the simulation past its end date, unless the last
+        # iteration has just written it
+        if self.checkpoint_file is not None and not terminated_prematurely and not checkpointed:
+            self.checkpoint()
+
+        hh_escape_cache = self.disease.get_hh_escape_cache()
+        self.reporter.info(f"Household escape cache: {hh_escape_cache.get_hits()} hits, {hh_escape_cache.get_misses()} misses, {len(hh_escape_cache)} entries.")
 
         if not terminated_prematurely:
             self.reporter.info(f"Simulation reached end date '{self.simulation_end.strftime(self.date_format)}', terminating...")
-            self.reporter.final_report()
+            self.reporter.set_profile_summary(self.profiler.get_summary())
+
+            # Reports of the population are global, hence only the first shard of a sharded run reports, after
+            # the event and error counters are summed over all shards
+            if self.shard is not None:
+                self.reporter.set_counts(self.shard.all_reduce(self.reporter.get_counts(EVENT_TYPES)), EVENT_TYPES)
+
+            if self.shard is None or self.shard.get_index() == 0:
+                self.reporter.final_report()
 
         self.reporter.teardown()
+        self.disease.teardown()
+        self.log_player.teardown()
+
+    def checkpoint(self):
+        """
+        Function to write a checkpoint of the simulation, i.e., the population and households, the disease
+        queue, the position in the event log, the reporter counters, the random state and the positions up to
+        which the outputs have been written. The simulation can be continued from the checkpoint by means of
+        'restore', with output identical to an uninterrupted run.
+        """
+        if self.checkpoint_file is None:
+            raise ValueError("Unable to checkpoint the simulation, no checkpoint file is configured.")
+
+        self.__checkpoint_requested = False
+        checkpoint.save(self, self.checkpoint_file)
+        self.reporter.info(f"Checkpointed simulation at '{self.simulation_curr.strftime(self.date_format)}'.")
+
+    @staticmethod
+    def restore(config, global_config):
+        """
+        Function to restore a simulation from the checkpoint file in the given configuration. The end date and
+        checkpoint settings are taken from the configuration, such that a finished simulation can be extended past
+        its end date. The remaining settings are those of the checkpointed simulation.
+
+        :param config: (dict) simulation configuration
+        :param global_config: (dict) global configuration
+        :return: (Simulation) restored simulation
+        """
+        simulation = checkpoint.load(config.get("checkpoint_file"))
+        simulation.simulation_end = datetime.strptime(config.get("end_date"), simulation.date_format)
+        simulation.__parse_checkpoint_config(config)
+        return simulation
+
+    def __parse_checkpoint_config(self, config):
+        self.checkpoint_file = config.get("checkpoint_file", None)
+        self.checkpoint_period_in_days = config.get("checkpoint_period_in_days", 0)
+        self.__checkpoint_requested = False
+        self.__stop_requested = False
+
+    def __install_signal_handlers(self):
+        """
+        Function to checkpoint the simulation on signals, i.e., on SIGUSR1 (on demand) and on SIGTERM (after which
+        the simulation stops). Checkpoints are taken at the end of the current iteration.
+        """
+        if self.checkpoint_file is None:
+            return
+
+        def request_checkpoint(signum, frame):
+            self.__checkpoint_requested = True
+            self.__stop_requested = self.__stop_requested or signum == signal.SIGTERM
+
+        signal.signal(signal.SIGUSR1, request_checkpoint)
+        signal.signal(signal.SIGTERM, request_checkpoint)
+
+    def get_num_infected(self) -> int:
+        """
+        Function to retrieve the number of infected individuals, over all shards of a sharded run.
+
+        :return: (number) number of infected individuals
+        """
+        if self.shard is None:
+            return self.disease.get_num_infected()
+
+        return int(self.shard.all_reduce([self.disease.get_num_infected()])[0])
 
     def disease_influx(self, amount, curr_date: datetime):
         """
-        Function to infect a number of random individuals.
+        Function to infect a number of random susceptible individuals, individuals that are already in the
+        disease state machine are not drawn. In a sharded run, the amount is divided over the shards as if the
+        individuals were drawn from the whole population.
 
         :param amount: (number) number of people to infect
         :param curr_date: (datetime) date at which people are infected
         """
-        for individual in self.population.random_gen(amount):
+        if self.shard is not None:
+            amount = self.shard.split(amount, len(self.population.get_store().susceptible_strata))
 
-            # TODO: What happens when individual is already in the disease state machine? Should we ignore? - LVI
+        for individual in self.population.random_susceptible_gen(amount):
             self.disease.transmit(individual, curr_date, influx=True)
 
 
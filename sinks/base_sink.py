@@ -1,5 +1,5 @@
 class BaseSink:
-    def __init__(self, config):
+    def __init__(self, config, global_config):
         ...
 
     def initialize(self):
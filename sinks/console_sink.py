@@ -1,7 +1,7 @@
 from sinks.base_sink import BaseSink
 
 class ConsoleSink(BaseSink):
-    def __init__(self, config):
+    def __init__(self, config, global_config):
         pass
 
     def initialize(self):
@@ -1,9 +1,10 @@
+from libraries.checkpoint import get_output_position, reopen_output
 from sinks.base_sink import BaseSink
 import os
 
 
 class FileSink(BaseSink):
-    def __init__(self, config):
+    def __init__(self, config, global_config):
         self.output_file = None
         self.ouput_file_name = config.get("output_file_name", None)
 
@@ -21,4 +22,18 @@ class FileSink(BaseSink):
         self.output_file.close()
 
     def write(self, message):
-        self.output_file.write(message + "\n")
\ No newline at end of file
+        self.output_file.write(message + "\n")
+
+    def __getstate__(self):
+        # Open files can not be pickled, record the position up to which the output has been written instead
+        state = self.__dict__.copy()
+        if self.output_file is not None:
+            state["output_file"] = get_output_position(self.output_file)
+
+        return state
+
+    def __setstate__(self, state):
+        if state["output_file"] is not None:
+            state["output_file"] = reopen_output(state["ouput_file_name"], state["output_file"])
+
+        self.__dict__.update(state)
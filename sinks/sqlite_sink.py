@@ -0,0 +1,41 @@
+from libraries.result_store import ResultTable
+from sinks.base_sink import BaseSink
+
+
+class SqliteSink(BaseSink):
+    """
+    Sink that writes the reporter output to a table of a result database (see libraries/result_store.py), messages
+    are inserted in batches of 'batch_size'.
+    """
+    def __init__(self, config, global_config):
+        self.__database = config.get("database", "./output/results.sqlite")
+        self.__run_id = config.get("run_id", "default")
+        self.__batch_size = config.get("batch_size", 1000)
+        self.__seed = global_config.get("seed")
+        self.__table = None
+        self.__messages = []
+        self.__position = 0
+
+    def initialize(self):
+        self.__table = ResultTable(self.__database, "reporter_output", ["position", "message"], self.__run_id,
+                                   self.__seed, "position")
+
+    def close(self):
+        self.__flush()
+        self.__table.close()
+
+    def write(self, message):
+        self.__messages.append((self.__position, message))
+        self.__position += 1
+        if len(self.__messages) >= self.__batch_size:
+            self.__flush()
+
+    def __getstate__(self):
+        # Pending messages are inserted first, such that the table records the last message of the checkpoint
+        self.__flush()
+        return self.__dict__.copy()
+
+    def __flush(self):
+        if self.__messages:
+            self.__table.insert(self.__messages)
+            self.__messages = []
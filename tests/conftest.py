@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules of the simulation are imported relative to the root of the repository, as by its entry points
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,68 @@
+import copy
+import hashlib
+import os
+
+import pytest
+import toml
+
+from conftest import ROOT
+from simulation import Simulation
+
+# Logs that have to be identical between the engines, by name of the logger setting
+COMPARED_LOGS = ["tans_log_file_name", "disease_log_file_name", "sim_log_file_name"]
+
+
+def run_engine(config, engine, output_directory) -> dict:
+    """
+    Function to simulate a short horizon of the sample population by means of an engine.
+
+    :param config: (dict) configuration of the simulation, see 'config/settings.toml'
+    :param engine: (str) disease engine
+    :param output_directory: (str) directory to write the logs to
+    :return: (dict) md5 digest of each compared log
+    """
+    config = copy.deepcopy(config)
+    simulation_config = config["simulation"]
+    simulation_config["disease"]["engine"] = engine
+    logger_config = simulation_config["disease"]["logger"]
+    for name in COMPARED_LOGS:
+        logger_config[name] = os.path.join(output_directory, f"{engine}-{name}.csv")
+
+    Simulation(simulation_config, config["global"]).run()
+    digests = dict()
+    for name in COMPARED_LOGS:
+        with open(logger_config[name], "rb") as log_file:
+            digests[name] = hashlib.md5(log_file.read()).hexdigest()
+
+    return digests
+
+
+@pytest.fixture
+def config(monkeypatch):
+    # Inputs of the configuration are relative to the root of the repository
+    monkeypatch.chdir(ROOT)
+    config = toml.load(os.path.join(ROOT, "config", "settings.toml"))
+    simulation_config = config["simulation"]
+    simulation_config.update(end_date="2011-01-07", initial_influx=30, checkpoint_file=None)
+    simulation_config["reporter"].update(enabled=False, log_level=[])
+    simulation_config["log_player"].update(initial_population="./input/pop_sample_NH.csv",
+                                           event_log="./input/event_log_sample_NH.csv")
+    simulation_config["disease"]["logger"].update(enabled=True, database=None)
+    return config
+
+
+@pytest.mark.parametrize("household_contacts", ["matrix", "network"])
+@pytest.mark.parametrize("community_sampling", ["individual", "stratified"])
+def test_numba_engine_equals_python_engine(config, tmp_path, community_sampling, household_contacts):
+    # Without Numba, the kernels of the numba engine run interpreted
+    disease_config = config["simulation"]["disease"]
+    disease_config.update(community_sampling=community_sampling, numba_fallback="interpreted")
+    disease_config["transmission"]["household_contacts"] = household_contacts
+
+    python_digests = run_engine(config, "python", str(tmp_path))
+    numba_digests = run_engine(config, "numba", str(tmp_path))
+    assert numba_digests == python_digests
+
+    # The horizon covers transmission, i.e., the comparison is not trivial
+    with open(os.path.join(tmp_path, "python-tans_log_file_name.csv")) as log_file:
+        assert sum(1 for _ in log_file) > 1 + config["simulation"]["initial_influx"]